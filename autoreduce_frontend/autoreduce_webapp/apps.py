@@ -0,0 +1,27 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+App configuration for the web app
+"""
+from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
+
+
+class AutoreduceWebappConfig(AppConfig):
+    """
+    Configuration for the autoreduce_webapp app
+    """
+    name = "autoreduce_frontend.autoreduce_webapp"
+    label = "autoreduce_webapp"
+
+    def ready(self):
+        # pylint:disable=import-outside-toplevel
+        from autoreduce_db.reduction_viewer.models import Notification
+        from autoreduce_frontend.autoreduce_webapp.notification_cache import NotificationCache
+
+        post_save.connect(NotificationCache.invalidate, sender=Notification, dispatch_uid="notification_cache_save")
+        post_delete.connect(NotificationCache.invalidate, sender=Notification, dispatch_uid="notification_cache_delete")
@@ -0,0 +1,132 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Circuit breakers that stop calls to an external service while it is failing
+"""
+import logging
+import threading
+import time
+
+from autoreduce_frontend.autoreduce_webapp.settings import CIRCUIT_BREAKER_COOLDOWN, CIRCUIT_BREAKER_FAILURES
+
+LOGGER = logging.getLogger(__package__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+# Every breaker created in this process, by name, so their state can be reported
+BREAKERS = {}
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a service whose circuit breaker is open
+    """
+
+
+class CircuitBreaker:
+    """
+    Tracks failures of calls to an external service. After failure_threshold
+    failures in a row the breaker opens, and calls fail straight away with
+    CircuitOpenError instead of waiting for the service to time out. Once the
+    cooldown has passed the breaker is half-open: a single call is let through
+    as a probe, closing the breaker if it succeeds or re-opening it if it fails.
+
+    :param name: (str) The name of the service, used when reporting its state
+    :param failure_threshold: (int) The number of failures in a row that open the breaker
+    :param cooldown: (float) The number of seconds to fail fast for before probing the service again
+    :param ignored: (tuple) Exception types that are a normal response from the service, not a failure
+    :param neutral: (tuple) Exception types raised before the service is reached, which say nothing
+                    about its health, so are counted as neither a success nor a failure
+    """
+
+    def __init__(self, name: str, failure_threshold: int, cooldown: float, ignored: tuple = (), neutral: tuple = ()):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.ignored = ignored
+        self.neutral = neutral
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+        BREAKERS[name] = self
+
+    def _before_call(self):
+        """ Raise CircuitOpenError unless the call is allowed through. """
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                LOGGER.info("Circuit breaker for %s is half-open, probing the service", self.name)
+                self.state = HALF_OPEN
+            if self.state == OPEN or (self.state == HALF_OPEN and self._probing):
+                raise CircuitOpenError(f"{self.name} is currently unavailable")
+            if self.state == HALF_OPEN:
+                self._probing = True
+
+    def record_success(self):
+        """ Record a successful call, closing the breaker. """
+        with self._lock:
+            if self.state != CLOSED:
+                LOGGER.info("Circuit breaker for %s is closed", self.name)
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def release_probe(self):
+        """ Let another call probe the service, as this one didn't reach it. """
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        """ Record a failed call, opening the breaker if there have been too many or the probe failed. """
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    LOGGER.error("Circuit breaker for %s is open after %s failures", self.name, self.failures)
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+    def call(self, func, *args, **kwargs):
+        """
+        Call func if the breaker allows it, recording whether it succeeded.
+        :raises CircuitOpenError: If the breaker is open
+        """
+        self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except self.neutral:
+            self.release_probe()
+            raise
+        except self.ignored:
+            self.record_success()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def snapshot(self) -> dict:
+        """ Return the current state of the breaker, for monitoring. """
+        with self._lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+            return {"name": self.name, "state": self.state, "failures": self.failures, "retry_in": retry_in}
+
+
+def make_breaker(name: str, ignored: tuple = (), neutral: tuple = ()) -> CircuitBreaker:
+    """ Create a breaker for a service using the thresholds from the settings. """
+    return CircuitBreaker(name,
+                          failure_threshold=CIRCUIT_BREAKER_FAILURES,
+                          cooldown=CIRCUIT_BREAKER_COOLDOWN,
+                          ignored=ignored,
+                          neutral=neutral)
@@ -9,18 +9,39 @@ Chached data from the ICAT service
 """
 import datetime
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
+from django.db import connection, transaction
+from django.db.models import Max
 from django.utils import timezone
 
 # models have to be imported via absolute path or Django can't run the server properly
-from autoreduce_frontend.autoreduce_webapp.models import UserCache, InstrumentCache, ExperimentCache
+from autoreduce_frontend.autoreduce_webapp.models import Cache, UserCache, InstrumentCache, ExperimentCache
+from autoreduce_frontend.autoreduce_webapp.circuit_breaker import CircuitOpenError
 from autoreduce_frontend.autoreduce_webapp.icat_communication import ICATCommunication
-from autoreduce_frontend.autoreduce_webapp.settings import CACHE_LIFETIME
+from autoreduce_frontend.autoreduce_webapp.memory_cache import MemoryCache
+from autoreduce_frontend.autoreduce_webapp.settings import (CACHE_LIFETIME, CACHE_RETENTION, CACHE_STALE_GRACE,
+                                                            ICAT_FILL_WORKERS, ICAT_MEMORY_CACHE_SIZE,
+                                                            ICAT_REFRESH_WORKERS)
 
 LOGGER = logging.getLogger(__package__)
 
 DEFAULT_MESSAGE = "ISIS ICAT is currently unavailable"
 
+# Per-process tier in front of the database-backed cache models. Entries are keyed
+# by (model name, id_name) and expire at the same time as the row they hold.
+MEMORY_CACHE = MemoryCache(max_size=ICAT_MEMORY_CACHE_SIZE, lifetime=CACHE_LIFETIME)
+
+# Background workers that refresh expired cache objects which have already been served stale.
+# REFRESHING holds the (model name, id_name) of every refresh queued or running in this process.
+REFRESH_EXECUTOR = ThreadPoolExecutor(max_workers=ICAT_REFRESH_WORKERS, thread_name_prefix="icat-refresh")
+REFRESHING = set()
+REFRESHING_LOCK = threading.Lock()
+
+# Bounded pool of threads used to send the independent queries filling a UserCache concurrently
+FILL_EXECUTOR = ThreadPoolExecutor(max_workers=ICAT_FILL_WORKERS, thread_name_prefix="icat-fill")
+
 
 class ICATConnectionException(Exception):
     """
@@ -31,12 +52,53 @@ class ICATConnectionException(Exception):
         super().__init__(message)
 
 
+def connect_icat(**kwargs) -> ICATCommunication:
+    """ Open an ICAT session, raising ICATConnectionException if it can't be opened. """
+    try:
+        return ICATCommunication(**kwargs)
+    except Exception as excep:
+        # pylint: disable=no-member,protected-access
+        LOGGER.error("Failed to connect to ICAT: %s - %s", type(excep).__name__, excep)
+        raise ICATConnectionException() from excep
+
+
+class ICATQueryBatch:
+    """
+    Sends ICATCommunication queries concurrently on FILL_EXECUTOR, all in one
+    ICAT session, memoizing the result of every (query, arguments) pair for the
+    lifetime of the batch, so a query needed by several cache fields is only
+    sent to ICAT once. The session's icat.Client isn't thread-safe, so each
+    query goes through its FILL_EXECUTOR thread's own client.
+    """
+
+    def __init__(self, icat: ICATCommunication):
+        self.icat = icat
+        self._futures = {}
+
+    def _run(self, func, *args):
+        return getattr(self.icat.for_thread(), func)(*args)
+
+    def submit(self, func, *args):
+        """ Start sending the query in the background, unless it has already been started. """
+        if (func, args) not in self._futures:
+            self._futures[(func, args)] = FILL_EXECUTOR.submit(self._run, func, *args)
+        return self._futures[(func, args)]
+
+    def result(self, func, *args):
+        """ Wait for and return the result of the query, starting it if needed. """
+        return self.submit(func, *args).result()
+
+
 class ICATCache:
     """
     A wrapper for ICATCommunication that caches information, and in the case of
     ICAT failure will try to use this cache.
     It stores Cache models in the database, and will get all fields from
     ICATCommunication if a model is requested but has expired or doesn't exist.
+    Fresh models are also held in MEMORY_CACHE, so repeated lookups within the
+    same worker process don't need to query the database.
+    Models that expired less than stale_grace seconds ago are returned as they
+    are while a fresh copy is fetched in the background.
     Most of the methods it wraps from ICATCommunication are templated
     rather than declared explicitly; see below.
     """
@@ -45,6 +107,7 @@ class ICATCache:
         self.kwargs = kwargs
         self.icat = None
         self.cache_lifetime = CACHE_LIFETIME
+        self.stale_grace = CACHE_STALE_GRACE
 
     def __enter__(self):
         return self
@@ -56,30 +119,104 @@ class ICATCache:
 
     def open_icat(self):
         """ Try to open an ICAT session, if we don't have one already. """
-        try:
-            if self.icat is None:
-                self.icat = ICATCommunication(**self.kwargs)
-        except Exception as excep:
-            # pylint: disable=no-member,protected-access
-            LOGGER.error("Failed to connect to ICAT: %s - %s", type(excep).__name__, excep)
-            raise ICATConnectionException() from excep
+        if self.icat is None:
+            self.icat = connect_icat(**self.kwargs)
 
     def is_valid(self, cache_obj):
         """ Check whether a cache object is fresh and is not None. """
         return cache_obj and (cache_obj.created + datetime.timedelta(seconds=self.cache_lifetime) > timezone.now())
 
+    def is_servable_stale(self, cache_obj):
+        """ Check whether an expired cache object is still within the grace window for serving it stale. """
+        stale_lifetime = datetime.timedelta(seconds=self.cache_lifetime + self.stale_grace)
+        return self.stale_grace > 0 and cache_obj and (cache_obj.created + stale_lifetime > timezone.now())
+
+    def refresh_in_background(self, obj_type, obj_id):
+        """
+        Queue a refresh of a cache object on REFRESH_EXECUTOR. Only one refresh
+        per (obj_type, obj_id) is queued or running at a time in this process;
+        requests arriving while one is in flight don't queue another.
+        """
+        key = (obj_type.__name__, obj_id)
+        with REFRESHING_LOCK:
+            if key in REFRESHING:
+                return
+            REFRESHING.add(key)
+        REFRESH_EXECUTOR.submit(self._refresh, obj_type, obj_id)
+
+    def _refresh(self, obj_type, obj_id):
+        """ Fetch a fresh copy of a cache object from ICAT. Runs on a REFRESH_EXECUTOR thread. """
+        try:
+            with ICATCache(**self.kwargs) as icat:
+                icat.remember(icat.update_cache(obj_type, obj_id))
+        # pylint: disable=broad-except
+        except Exception as excep:
+            LOGGER.warning("Background refresh of %s %s failed: %s - %s", obj_type.__name__, obj_id,
+                           type(excep).__name__, excep)
+        finally:
+            with REFRESHING_LOCK:
+                REFRESHING.discard((obj_type.__name__, obj_id))
+            # Each worker thread gets its own database connection, which Django won't close for us
+            connection.close()
+
+    def remember(self, cache_obj):
+        """ Hold a fresh cache object in MEMORY_CACHE until the point it expires. """
+        expires_at = cache_obj.created + datetime.timedelta(seconds=self.cache_lifetime)
+        MEMORY_CACHE.set((type(cache_obj).__name__, cache_obj.id_name),
+                         cache_obj,
+                         lifetime=(expires_at - timezone.now()).total_seconds())
+
+    @staticmethod
+    def memory_stats() -> dict:
+        """ Return the hit and miss counters of this process's MEMORY_CACHE. """
+        return MEMORY_CACHE.stats()
+
     @staticmethod
-    def to_list(target_list):
-        """Change list to map"""
-        return ",".join(map(str, target_list))
-
-    def cull_invalid(self, target_list):
-        """ Removes all objects in the list that have expired. """
-        rlist = []
-        for obj in target_list:
-            # pylint: disable=expression-not-assigned
-            obj.delete() if not self.is_valid(obj) else rlist.append(obj)
-        return rlist
+    def to_list(target_list, list_type):
+        """
+        Convert each element of a list returned by ICAT to list_type, for storing
+        in a cache list field. Empty elements and those that can't be converted
+        (e.g. non-numeric experiment names) are left out.
+        """
+        converted = []
+        for element in target_list:
+            try:
+                if element is not None and str(element):
+                    converted.append(list_type(element))
+            except ValueError:
+                LOGGER.debug("Leaving %s out of the cache as it is not a valid %s", element, list_type.__name__)
+        return converted
+
+    def fill_user_cache(self, user_number) -> dict:
+        """
+        Query ICAT for every UserCache field of a user, returning them keyed by
+        the ICATCommunication function each is named after in FUNC_LIST.
+
+        Rather than calling each ICATCommunication function in turn, which
+        repeats the is_admin and get_owned_instruments queries, the underlying
+        queries are sent once each and concurrently, in this ICATCache's ICAT
+        session, and the derived fields are worked out from their results in the
+        same way ICATCommunication does.
+        """
+        self.open_icat()
+        batch = ICATQueryBatch(self.icat)
+        for func in ("get_owned_instruments", "is_admin", "get_experiment_instruments", "get_associated_experiments"):
+            batch.submit(func, user_number)
+        owned_instruments = batch.result("get_owned_instruments", user_number)
+        is_admin = batch.result("is_admin", user_number)
+        if is_admin:
+            valid_instruments = batch.result("get_all_instruments")
+        else:
+            valid_instruments = sorted(
+                set(owned_instruments).union(batch.result("get_experiment_instruments", user_number)))
+
+        return {
+            "get_owned_instruments": owned_instruments,
+            "get_valid_instruments": valid_instruments,
+            "is_admin": is_admin,
+            "is_instrument_scientist": bool(owned_instruments),
+            "get_associated_experiments": batch.result("get_associated_experiments", user_number),
+        }
 
     def update_cache(self, obj_type, obj_id):
         """
@@ -87,19 +224,27 @@ class ICATCache:
         querying ICAT - and returns the object.
         E.g., obj_type = InstrumentCache, obj_id = "WISH".
         """
-        self.open_icat()  # Open an ICAT session if we don't have one open.
-
-        if obj_type != ExperimentCache:
+        if obj_type == UserCache:
+            # The UserCache fields overlap, so they are queried together as one batch
+            values = self.fill_user_cache(obj_id)
+            new_obj = obj_type(
+                **{
+                    attr: values[func] if typ is None else self.to_list(values[func], typ)
+                    for (func, model, attr, typ) in FUNC_LIST if model == obj_type
+                })
+        elif obj_type != ExperimentCache:
+            self.open_icat()  # Open an ICAT session if we don't have one open.
             # Check func_list for the attributes that each model should have,
             # and the corresponding ICATCommunication function to query for it;
             #  call it for each, building a dict, and then splice it into the constructor kwargs.
             new_obj = obj_type(
                 **{
                     attr: (getattr(self.icat, func)
-                           (obj_id) if typ is None else self.to_list(getattr(self.icat, func)(obj_id)))
+                           (obj_id) if typ is None else self.to_list(getattr(self.icat, func)(obj_id), typ))
                     for (func, model, attr, typ) in FUNC_LIST if model == obj_type
                 })
         else:
+            self.open_icat()
             # In this case, ICATCommunication returns all the ExperimentCache
             # fields in one query, so we splice that into the constructor.
             new_obj = obj_type(
@@ -116,20 +261,28 @@ class ICATCache:
         """
         Checks the cache for an object of type obj_type and id obj_id -
         querying for a new one if there isn't a fresh copy - and returns it.
+        The in-process MEMORY_CACHE is checked before the database.
+        If the newest copy has expired but is within the stale grace window,
+        return it straight away and refresh it in the background.
         If ICAT is unavailable, use a local copy if it exists.
         If we can't use anything, return None.
         """
-        in_cache = obj_type.objects.filter(id_name=obj_id).order_by("-created")
-        ret_obj = None
-        if in_cache:
-            ret_obj = in_cache[0]
+        ret_obj = MEMORY_CACHE.get((obj_type.__name__, obj_id))
+        if ret_obj is not None:
+            return ret_obj
+
+        ret_obj = obj_type.objects.filter(id_name=obj_id).order_by("-created").first()
         if not self.is_valid(ret_obj):
+            if self.is_servable_stale(ret_obj):
+                self.refresh_in_background(obj_type, obj_id)
+                return ret_obj
             try:
                 ret_obj = self.update_cache(obj_type, obj_id)
-                self.cull_invalid(in_cache)
-            except ICATConnectionException:
-                pass
+            except (ICATConnectionException, CircuitOpenError):
+                # ICAT is unavailable, or its circuit breaker is open
+                return ret_obj
 
+        self.remember(ret_obj)
         return ret_obj
 
     # pylint: disable=invalid-name
@@ -142,7 +295,7 @@ class ICATCache:
         """
         experiment_dict = {}
         # pylint: disable=no-member
-        user_experiments = set(self.get_associated_experiments(user_number))
+        user_experiments = self.get_associated_experiments(user_number)
         for instrument_name in instruments:
             instrument_experiments = self.get_valid_experiments_for_instrument(instrument_name)
             experiment_dict[instrument_name] = list(user_experiments.intersection(instrument_experiments))
@@ -153,7 +306,39 @@ class ICATCache:
         Return experiment information as a dictionary
         """
         experiment = self.check_cache(ExperimentCache, experiment_number)
-        return experiment.__dict__
+        # Copy the fields so callers can't modify an object shared through MEMORY_CACHE
+        return dict(experiment.__dict__)
+
+
+def sweep_cache(retention=CACHE_RETENTION) -> dict:
+    """
+    Delete cache rows that are no longer needed with set-based deletes, rather
+    than deleting expired rows one at a time during requests.
+
+    A row is deleted if a newer row exists for the same id_name, or if it was
+    created more than retention seconds ago. The newest row for each id_name is
+    otherwise kept after it expires, as check_cache falls back to it when ICAT
+    is unavailable.
+
+    The cache models inherit from Cache, so QuerySet.delete would fetch every
+    row to collect the parents. Instead the child rows are deleted directly,
+    then the Cache rows left without a child are deleted in one go.
+    :return: (dict) The number of rows deleted for each cache model
+    """
+    cutoff = timezone.now() - datetime.timedelta(seconds=retention)
+    deleted = {}
+    # pylint: disable=protected-access
+    with transaction.atomic():
+        for model in (UserCache, InstrumentCache, ExperimentCache):
+            database = model.objects.db
+            old = model.objects.filter(created__lt=cutoff)._raw_delete(database)
+            # Rows are only ever inserted, so the highest pk is the newest row for each id_name
+            newest = model.objects.values("id_name").annotate(newest=Max("pk")).values("newest")
+            superseded = model.objects.exclude(pk__in=newest)._raw_delete(database)
+            deleted[model.__name__] = old + superseded
+        Cache.objects.filter(usercache__isnull=True, instrumentcache__isnull=True,
+                             experimentcache__isnull=True)._raw_delete(Cache.objects.db)
+    return deleted
 
 
 # Here we define (ICATCommunication function to wrap, Cache object type,
@@ -173,31 +358,16 @@ def make_member_func(obj_type, cache_attr, list_type):
     are local to the function and not globals; i.e., these are closures.
     """
 
-    def isvalid(obj_str):
-        """
-        Check object string validity
-        """
-        try:
-            obj_type(obj_str)
-            return bool(obj_str)
-        # pylint: disable=broad-except
-        except Exception as exception:
-            print(str(exception))
-            return False
-
     def member_func(self, obj_id):
         """
-        Remove expired objects, then check if the relevant object is in the cache,
-        putting it in if it isn't.
+        Check if the relevant object is in the cache, putting it in if it isn't.
+        List fields are returned as a frozenset.
         """
         new_obj = self.check_cache(obj_type, obj_id)
 
-        # Get the attribute we want, parsing it as a list if we should.
-        attr = getattr(new_obj, cache_attr)
         if list_type is not None:
-            attr = map(list_type, filter(isvalid, attr.split(",")))
-
-        return attr
+            return new_obj.as_frozenset(cache_attr)
+        return getattr(new_obj, cache_attr)
 
     return member_func
 
@@ -7,22 +7,244 @@
 """
 Deals with communication with ICAT service
 """
+import copy
 import datetime
+import hashlib
 import logging
 import sys
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
 
 import icat
 from django.utils.encoding import smart_str
 
-from autoreduce_frontend.autoreduce_webapp.settings import ICAT, BASE_DIR
+from autoreduce_frontend.autoreduce_webapp.circuit_breaker import make_breaker
+from autoreduce_frontend.autoreduce_webapp.settings import (ICAT, ICAT_SESSION_LIFETIME, ICAT_SESSION_POOL_SIZE,
+                                                            ICAT_SESSION_POOL_TIMEOUT, ICAT_SESSION_REFRESH_MARGIN,
+                                                            BASE_DIR)
 
 LOGGER = logging.getLogger(__package__)
 sys.path.insert(0, BASE_DIR)
 
 
+class ICATSessionPoolExhausted(Exception):
+    """
+    Raised when no ICAT session becomes free before the pool timeout
+    """
+
+
+class PooledSession:
+    """
+    A logged in icat.Client along with the time its session is expected to expire.
+    :param client: (icat.Client) The logged in client
+    :param lifetime: (float) The number of seconds a session lasts after a login or refresh
+    """
+
+    def __init__(self, client, lifetime: float):
+        self.client = client
+        self.lifetime = lifetime
+        self.expires_at = time.monotonic() + lifetime
+
+    def refresh(self):
+        """ Extend the session on the ICAT server and reset its expiry time. """
+        self.client.refresh()
+        self.expires_at = time.monotonic() + self.lifetime
+
+    def logout(self):
+        """ End the session, ignoring failures as the session may have already expired. """
+        try:
+            self.client.logout()
+        # pylint: disable=broad-except
+        except Exception as exception:
+            LOGGER.debug("Failed to log out of ICAT session: %s", exception)
+
+
+class ICATSessionPool:
+    """
+    Keeps logged in ICAT sessions open so they can be reused, instead of logging
+    in and out of ICAT for every query.
+
+    Sessions are keyed by the URL, authenticator and credentials they were
+    opened with, so service account sessions are shared between requests while
+    'uows' sessions are only reused for the same UOWS sessionid. A session is
+    checked out by a single thread at a time. Sessions close to expiry are
+    refreshed when they are checked out, and once max_sessions are open the
+    least recently used idle session is logged out to make room for a new one.
+    Sessions that are evicted or thrown away are logged out on logout_executor,
+    so that the request that needed the room doesn't wait for ICAT to do it.
+
+    :param max_sessions: (int) The maximum number of sessions open at once
+    :param refresh_margin: (float) Refresh sessions expiring within this many seconds
+    :param timeout: (float) Seconds to wait for a session to become free when all are in use
+    :param session_lifetime: (float) Seconds ICAT keeps a session for, or None to ask ICAT
+                             on the first login to each URL with each authenticator
+    :param logout_executor: (Executor) Runs the logouts of sessions that are no longer wanted
+    """
+
+    def __init__(self,
+                 max_sessions: int,
+                 refresh_margin: float,
+                 timeout: float,
+                 session_lifetime: float = None,
+                 logout_executor: Executor = None):
+        self.max_sessions = max_sessions
+        self.refresh_margin = refresh_margin
+        self.timeout = timeout
+        self.session_lifetime = session_lifetime
+        self.logout_executor = logout_executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="icat-logout")
+        self._lifetimes = {}  # (url, auth) -> seconds, measured on the first login when session_lifetime is None
+        self._idle = []  # (key, PooledSession) ordered from least to most recently used
+        self._checked_out = {}  # id(client) -> PooledSession
+        self._reserved = 0  # Sessions being refreshed or logged in, that aren't idle or checked out yet
+        self._condition = threading.Condition()
+
+    @staticmethod
+    def make_key(url: str, auth: str, credentials: dict) -> tuple:
+        """ Return the pool key for a session, without holding the credentials in plain text. """
+        digest = hashlib.sha256(repr(sorted(credentials.items())).encode("utf-8")).hexdigest()
+        return url, auth, digest
+
+    @property
+    def open_sessions(self) -> int:
+        """ The number of sessions currently open or being opened, both idle and checked out. """
+        return len(self._idle) + len(self._checked_out) + self._reserved
+
+    def _take_idle(self, key):
+        """ Remove and return the most recently used idle session for key, if there is one. """
+        for index in range(len(self._idle) - 1, -1, -1):
+            if self._idle[index][0] == key:
+                return self._idle.pop(index)[1]
+        return None
+
+    def _reserve(self, key):
+        """
+        Wait for either an idle session for key, or room to open a new one, and
+        reserve its place in the pool.
+        :return: (tuple) The idle session or None, and a session that has been evicted to make room or None
+        """
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            while True:
+                session = self._take_idle(key)
+                evicted = None
+                if session is None and self.open_sessions >= self.max_sessions and self._idle:
+                    evicted = self._idle.pop(0)[1]
+                if session is not None or evicted is not None or self.open_sessions < self.max_sessions:
+                    self._reserved += 1
+                    return session, evicted
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._condition.wait(remaining):
+                    raise ICATSessionPoolExhausted(f"All {self.max_sessions} ICAT sessions are in use")
+
+    def _login(self, url: str, auth: str, credentials: dict) -> PooledSession:
+        """
+        Open a new ICAT session. Unless the session lifetime is configured, ICAT is
+        asked how long it keeps sessions for on the first login only.
+        """
+        LOGGER.debug("Logging in to ICAT at %s", url)
+        client = icat.Client(url=url)
+        client.login(auth, credentials)
+        lifetime = self.session_lifetime or self._lifetimes.get((url, auth))
+        if lifetime is None:
+            lifetime = client.getRemainingMinutes() * 60
+            self._lifetimes[(url, auth)] = lifetime
+        return PooledSession(client, lifetime)
+
+    def _logout_later(self, session: PooledSession):
+        """ Log out of the session on the logout executor, off the calling thread. """
+        self.logout_executor.submit(session.logout)
+
+    def acquire(self, url: str, auth: str, credentials: dict):
+        """
+        Check out a logged in icat.Client for the given credentials, reusing an
+        open session where possible. The client must be handed back with release.
+        """
+        session, evicted = self._reserve(self.make_key(url, auth, credentials))
+        if evicted is not None:
+            self._logout_later(evicted)
+
+        if session is not None and session.expires_at - time.monotonic() < self.refresh_margin:
+            try:
+                session.refresh()
+            # pylint: disable=broad-except
+            except Exception as exception:
+                LOGGER.debug("Failed to refresh ICAT session, logging in again: %s", exception)
+                self._logout_later(session)
+                session = None
+
+        if session is None:
+            try:
+                session = self._login(url, auth, credentials)
+            except Exception:
+                with self._condition:
+                    self._reserved -= 1
+                    self._condition.notify()
+                raise
+
+        with self._condition:
+            self._reserved -= 1
+            self._checked_out[id(session.client)] = session
+        return session.client
+
+    def release(self, url: str, auth: str, credentials: dict, client, discard: bool = False):
+        """
+        Hand a client checked out with acquire back to the pool. If discard is
+        True the session is logged out instead of being kept for reuse.
+        """
+        with self._condition:
+            session = self._checked_out.pop(id(client), None)
+            if session is not None and not discard:
+                self._idle.append((self.make_key(url, auth, credentials), session))
+            self._condition.notify()
+        if session is not None and discard:
+            self._logout_later(session)
+
+    def clear(self):
+        """ Log out of every idle session. """
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for _, session in idle:
+            session.logout()
+
+
+SESSION_POOL = ICATSessionPool(max_sessions=ICAT_SESSION_POOL_SIZE,
+                               refresh_margin=ICAT_SESSION_REFRESH_MARGIN,
+                               timeout=ICAT_SESSION_POOL_TIMEOUT,
+                               session_lifetime=ICAT_SESSION_LIFETIME)
+
+# Errors raised by ICAT itself mean it is up, so only failures to reach it count against the breaker
+# An exhausted pool means this process is busy, not that ICAT is failing or has recovered
+ICAT_BREAKER = make_breaker("ICAT", ignored=(icat.ICATError, ), neutral=(ICATSessionPoolExhausted, ))
+
+# Each thread's own icat.Client for every ICAT URL, used to send queries in a session checked out by another thread
+_THREAD_CLIENTS = threading.local()
+
+
+def thread_client(url: str):
+    """
+    Return the calling thread's icat.Client for url, creating it on the first
+    call so the WSDL is only fetched and parsed once per thread. The client is
+    never logged in itself; its sessionId is set to a pooled session's, so it
+    must not log that session out when the process exits.
+    """
+    clients = getattr(_THREAD_CLIENTS, "clients", None)
+    if clients is None:
+        clients = _THREAD_CLIENTS.clients = {}
+    if url not in clients:
+        client = ICAT_BREAKER.call(icat.Client, url=url)
+        client.autoLogout = False
+        clients[url] = client
+    return clients[url]
+
+
 class ICATCommunication:
     """
-    Handles communication with the ICAT service
+    Handles communication with the ICAT service.
+    Sessions are checked out of SESSION_POOL on creation and handed back on exit.
+    Logins and queries go through ICAT_BREAKER, so they fail fast with
+    CircuitOpenError while ICAT is unreachable.
     """
 
     # pylint: disable=unsubscriptable-object
@@ -38,18 +260,36 @@ class ICATCommunication:
             kwargs['PASSWORD'] = ICAT['PASSWORD']
         if 'SESSION' not in kwargs:
             kwargs['SESSION'] = {'username': kwargs['USER'], 'password': kwargs['PASSWORD']}
-            LOGGER.debug("Logging in to ICAT at %s", kwargs['URL'])
-        self.client = icat.Client(url=kwargs['URL'])
+        self._session_args = (kwargs['URL'], kwargs['AUTH'], kwargs['SESSION'])
+        self.client = ICAT_BREAKER.call(SESSION_POOL.acquire, *self._session_args)
         # pylint: disable=invalid-name
-        self.sessionId = self.client.login(kwargs['AUTH'], kwargs['SESSION'])
+        self.sessionId = self.client.sessionId
 
     def __enter__(self):
         return self
 
     # pylint: disable=redefined-builtin
     def __exit__(self, type, value, traceback):
-        LOGGER.debug("Logging out of ICAT")
-        self.client.logout()
+        LOGGER.debug("Returning ICAT session to the pool")
+        # A session that ICAT has rejected can't be reused, so log it out rather than keeping it
+        SESSION_POOL.release(*self._session_args, self.client, discard=isinstance(value, icat.ICATSessionError))
+
+    def for_thread(self):
+        """
+        Return a copy of this ICATCommunication that sends its queries through the
+        calling thread's own icat.Client, in the same pooled session. The pooled
+        icat.Client isn't thread-safe, so queries sent from other threads while
+        the session is checked out go through a copy instead. The copy doesn't
+        own the session, so it must not be used to hand the session back.
+        """
+        view = copy.copy(self)
+        view.client = thread_client(self._session_args[0])
+        view.client.sessionId = self.sessionId
+        return view
+
+    def _search(self, query):
+        """ Run a query against ICAT through ICAT_BREAKER. """
+        return ICAT_BREAKER.call(self.client.search, query)
 
     @staticmethod
     def _add_list_to_set(my_list, my_set):
@@ -69,9 +309,9 @@ class ICATCommunication:
 
         if reference_number > 0:
             try:
-                investigation = self.client.search("SELECT i from Investigation i where i.name = '" +
-                                                   str(reference_number) + "' INCLUDE i.investigationInstruments."
-                                                   "instrument, i.investigationUsers.user")
+                investigation = self._search("SELECT i from Investigation i where i.name = '" + str(reference_number) +
+                                             "' INCLUDE i.investigationInstruments."
+                                             "instrument, i.investigationUsers.user")
 
                 trimmed_investigation = {
                     'reference_number': investigation[0].name,
@@ -111,18 +351,39 @@ class ICATCommunication:
         if not isinstance(user_number, int):
             raise TypeError("User number must be a number")
 
-        instruments = set()
         if self.is_admin(user_number):
-            self._add_list_to_set(self.client.search("SELECT inst.fullName FROM Instrument inst"), instruments)
-        else:
-            self._add_list_to_set(self.get_owned_instruments(user_number), instruments)
-            self._add_list_to_set(
-                self.client.search("SELECT inst.fullName FROM Instrument inst"
-                                   " JOIN inst.investigationInstruments ii"
-                                   " WHERE ii.investigation.id IN"
-                                   " (SELECT i.id from Investigation i JOIN"
-                                   " i.investigationUsers iu WHERE"
-                                   " iu.user.name = 'uows/" + str(user_number) + "')"), instruments)
+            return self.get_all_instruments()
+
+        instruments = set()
+        self._add_list_to_set(self.get_owned_instruments(user_number), instruments)
+        self._add_list_to_set(self.get_experiment_instruments(user_number), instruments)
+        return sorted(instruments)
+
+    def get_all_instruments(self):
+        """
+        Returns every instrument known to ICAT
+        """
+        LOGGER.debug("Calling ICATCommunication.get_all_instruments")
+        instruments = set()
+        self._add_list_to_set(self._search("SELECT inst.fullName FROM Instrument inst"), instruments)
+        return sorted(instruments)
+
+    def get_experiment_instruments(self, user_number):
+        """
+        Returns all instruments used by experiments the given user is on the experiment team for
+        """
+        LOGGER.debug("Calling ICATCommunication.get_experiment_instruments")
+        if not isinstance(user_number, int):
+            raise TypeError("User number must be a number")
+
+        instruments = set()
+        self._add_list_to_set(
+            self._search("SELECT inst.fullName FROM Instrument inst"
+                         " JOIN inst.investigationInstruments ii"
+                         " WHERE ii.investigation.id IN"
+                         " (SELECT i.id from Investigation i JOIN"
+                         " i.investigationUsers iu WHERE"
+                         " iu.user.name = 'uows/" + str(user_number) + "')"), instruments)
         return sorted(instruments)
 
     def get_owned_instruments(self, user_number):
@@ -135,9 +396,9 @@ class ICATCommunication:
 
         instruments = set()
         self._add_list_to_set(
-            self.client.search("SELECT ins.instrument.fullName from"
-                               " InstrumentScientist ins WHERE"
-                               " ins.user.name = 'uows/" + str(user_number) + "'"), instruments)
+            self._search("SELECT ins.instrument.fullName from"
+                         " InstrumentScientist ins WHERE"
+                         " ins.user.name = 'uows/" + str(user_number) + "'"), instruments)
         return sorted(instruments)
 
     def is_instrument_scientist(self, user_number):
@@ -159,10 +420,10 @@ class ICATCommunication:
                 isinstance(reference_number, int):
             raise TypeError("User number and reference number must be a number")
 
-        is_on_team = self.client.search("SELECT i.name from Investigation i JOIN"
-                                        " i.investigationUsers iu where"
-                                        " iu.user.name = 'uows/" + str(user_number) + "' and i.name = '" +
-                                        str(reference_number) + "'")
+        is_on_team = self._search("SELECT i.name from Investigation i JOIN"
+                                  " i.investigationUsers iu where"
+                                  " iu.user.name = 'uows/" + str(user_number) + "' and i.name = '" +
+                                  str(reference_number) + "'")
         if is_on_team:
             return True
         return False
@@ -178,9 +439,9 @@ class ICATCommunication:
 
         experiments = set()
         self._add_list_to_set(
-            self.client.search("SELECT i.name from Investigation i JOIN"
-                               " i.investigationUsers iu where"
-                               " iu.user.name = 'uows/" + str(user_number) + "'"), experiments)
+            self._search("SELECT i.name from Investigation i JOIN"
+                         " i.investigationUsers iu where"
+                         " iu.user.name = 'uows/" + str(user_number) + "'"), experiments)
         return sorted(experiments, reverse=True)
 
     # pylint: disable=invalid-name
@@ -202,11 +463,11 @@ class ICATCommunication:
         for instrument in instruments:
             experiments = set()
             self._add_list_to_set(
-                self.client.search("SELECT i.name FROM Investigation i"
-                                   " JOIN i.investigationInstruments inst"
-                                   " WHERE i.name NOT LIKE 'CAL%' and"
-                                   " i.endDate > '" + str(years_back) + "' and (inst.instrument.name = '" + instrument +
-                                   "' OR inst.instrument.fullName = '" + instrument + "')"), experiments)
+                self._search("SELECT i.name FROM Investigation i"
+                             " JOIN i.investigationInstruments inst"
+                             " WHERE i.name NOT LIKE 'CAL%' and"
+                             " i.endDate > '" + str(years_back) + "' and (inst.instrument.name = '" + instrument +
+                             "' OR inst.instrument.fullName = '" + instrument + "')"), experiments)
 
             instruments_dict[instrument] = sorted(experiments, reverse=True)
 
@@ -224,11 +485,11 @@ class ICATCommunication:
 
         experiments = set()
         self._add_list_to_set(
-            self.client.search("SELECT i.name FROM Investigation i JOIN"
-                               " i.investigationInstruments inst WHERE"
-                               " i.name NOT LIKE 'CAL%' and i.endDate > '" + str(years_back) +
-                               "' and (inst.instrument.name = '" + instrument + "' OR inst.instrument.fullName = '" +
-                               instrument + "')"), experiments)
+            self._search("SELECT i.name FROM Investigation i JOIN"
+                         " i.investigationInstruments inst WHERE"
+                         " i.name NOT LIKE 'CAL%' and i.endDate > '" + str(years_back) +
+                         "' and (inst.instrument.name = '" + instrument + "' OR inst.instrument.fullName = '" +
+                         instrument + "')"), experiments)
         return sorted(experiments, reverse=True)
 
     # pylint: disable=invalid-name
@@ -242,12 +503,12 @@ class ICATCommunication:
 
         experiments = set()
         self._add_list_to_set(
-            self.client.search("SELECT i.name FROM Investigation i JOIN"
-                               " i.investigationInstruments inst WHERE"
-                               " i.name NOT LIKE 'CAL%' and"
-                               " i.endDate > CURRENT_TIMESTAMP and"
-                               " (inst.instrument.name = '" + instrument + "' OR inst.instrument.fullName = '" +
-                               instrument + "')"), experiments)
+            self._search("SELECT i.name FROM Investigation i JOIN"
+                         " i.investigationInstruments inst WHERE"
+                         " i.name NOT LIKE 'CAL%' and"
+                         " i.endDate > CURRENT_TIMESTAMP and"
+                         " (inst.instrument.name = '" + instrument + "' OR inst.instrument.fullName = '" + instrument +
+                         "')"), experiments)
         return sorted(experiments, reverse=True)
 
     def is_admin(self, user_number):
@@ -256,8 +517,8 @@ class ICATCommunication:
         """
         LOGGER.debug("Calling ICATCommunication.is_admin")
         admin_group = 'Autoreduce Admins'
-        if self.client.search("SELECT g FROM Grouping g JOIN g.userGroups ug WHERE g.name = '" + admin_group +
-                              "' and ug.user.name = 'uows/" + str(user_number) + "'"):
+        if self._search("SELECT g FROM Grouping g JOIN g.userGroups ug WHERE g.name = '" + admin_group +
+                        "' and ug.user.name = 'uows/" + str(user_number) + "'"):
             return True
         return False
 
@@ -273,14 +534,13 @@ class ICATCommunication:
         if not end_run_number:
             raise Exception("At least one run_number must be supplied")
 
-        return self.client.search("SELECT dfp FROM DatafileParameter dfp JOIN "
-                                  "dfp.datafile.dataset.investigation.investigationInstruments "
-                                  "ii WHERE dfp.type.name='run_number' and dfp.numericValue >= " +
-                                  str(start_run_number) + " and dfp.numericValue <= " + str(end_run_number) +
-                                  " and ii.instrument.fullName = '" + instrument +
-                                  "' and dfp.datafile.dataset.investigation.name "
-                                  "not LIKE 'CAL%%' include "
-                                  "dfp.datafile.dataset.investigation")
+        return self._search("SELECT dfp FROM DatafileParameter dfp JOIN "
+                            "dfp.datafile.dataset.investigation.investigationInstruments "
+                            "ii WHERE dfp.type.name='run_number' and dfp.numericValue >= " + str(start_run_number) +
+                            " and dfp.numericValue <= " + str(end_run_number) + " and ii.instrument.fullName = '" +
+                            instrument + "' and dfp.datafile.dataset.investigation.name "
+                            "not LIKE 'CAL%%' include "
+                            "dfp.datafile.dataset.investigation")
 
     @staticmethod
     def post_process(_):
@@ -0,0 +1,49 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Custom manage.py command to mark instruments active or inactive
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+
+from autoreduce_db.reduction_viewer.models import Instrument, ReductionRun
+from autoreduce_qp.queue_processor.reduction.service import ReductionScript
+
+
+def reconcile_instruments() -> list:
+    """
+    Set is_active on every instrument, saving only the ones that changed.
+
+    Active: instruments that have a script file, or have previous runs
+    with a stored script.
+
+    :return: (list) The instruments whose is_active was changed
+    """
+    instruments = Instrument.objects.annotate(has_runs=Exists(ReductionRun.objects.filter(instrument=OuterRef("pk"))))
+    changed = []
+    for instrument in instruments:
+        # Only look for a script on disk when the runs haven't already decided it
+        is_active = instrument.has_runs or ReductionScript(instrument.name).exists()
+        if instrument.is_active != is_active:
+            instrument.is_active = is_active
+            changed.append(instrument)
+    Instrument.objects.bulk_update(changed, ["is_active"])
+    return changed
+
+
+class Command(BaseCommand):
+    """
+    Activates instruments that have a reduction script or runs, and
+    deactivates the rest. Intended to be run periodically, e.g. every few
+    minutes from cron.
+    """
+    help = 'Marks instruments active if they have a reduction script or runs, and inactive otherwise'
+
+    def handle(self, *args, **options):
+        """ Reconcile the instruments and report which ones changed. """
+        for instrument in reconcile_instruments():
+            self.stdout.write(f"{instrument.name}: {'activated' if instrument.is_active else 'deactivated'}")
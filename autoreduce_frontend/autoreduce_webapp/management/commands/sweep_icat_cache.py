@@ -0,0 +1,32 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Custom manage.py command to remove old rows from the ICAT cache tables
+"""
+from django.core.management.base import BaseCommand
+
+from autoreduce_frontend.autoreduce_webapp.icat_cache import sweep_cache
+from autoreduce_frontend.autoreduce_webapp.settings import CACHE_RETENTION
+
+
+class Command(BaseCommand):
+    """
+    Deletes superseded and long-expired ICAT cache rows. Intended to be run
+    periodically, e.g. hourly from cron.
+    """
+    help = 'Deletes superseded and long-expired rows from the ICAT cache tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention',
+                            type=int,
+                            default=CACHE_RETENTION,
+                            help='Delete rows created more than this many seconds ago, even if they are the newest')
+
+    def handle(self, *args, **options):
+        """ Sweep each cache table and report how many rows were deleted. """
+        for model_name, count in sweep_cache(options['retention']).items():
+            self.stdout.write(f"{model_name}: deleted {count} rows")
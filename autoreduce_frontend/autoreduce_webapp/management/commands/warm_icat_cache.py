@@ -0,0 +1,118 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Custom manage.py command to fill the ICAT caches ahead of time
+"""
+# pylint:disable=imported-auth-user,no-member
+import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from autoreduce_db.reduction_viewer.models import Experiment, Instrument
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+
+from autoreduce_frontend.autoreduce_webapp.icat_cache import ICATCache
+from autoreduce_frontend.autoreduce_webapp.models import ExperimentCache, InstrumentCache, UserCache
+
+
+class Command(BaseCommand):
+    """
+    Fills InstrumentCache, UserCache and ExperimentCache for every instrument,
+    and for the users and experiments active within the last few days, so the
+    first visitors after a deploy don't have to wait for ICAT.
+    """
+    help = 'Fills the ICAT caches for all instruments and recently active users and experiments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days',
+                            type=int,
+                            default=7,
+                            help='Warm users who logged in, and experiments with runs, within this many days')
+        parser.add_argument('--margin',
+                            type=int,
+                            default=600,
+                            help='Only refresh entries that are missing or expire within this many seconds')
+        parser.add_argument('--concurrency', type=int, default=4, help='Maximum number of entries filled at once')
+        parser.add_argument('--url', help='ICAT URL to use instead of the one in the settings, e.g. a local fake ICAT')
+
+    def handle(self, *args, **options):
+        """
+        Work out which cache entries are missing or about to expire, then fill
+        them in parallel, reporting how long each one took.
+        """
+        since = timezone.now() - datetime.timedelta(days=options['days'])
+        usernames = User.objects.filter(last_login__gte=since).values_list('username', flat=True)
+        # Experiments with a reference number of 0 or below are placeholders that ICAT doesn't know about
+        experiments = Experiment.objects.filter(reduction_runs__created__gte=since, reference_number__gt=0)
+        candidates = {
+            InstrumentCache: list(Instrument.objects.values_list('name', flat=True)),
+            UserCache: [int(username) for username in usernames if username.isdigit()],
+            ExperimentCache: list(experiments.values_list('reference_number', flat=True).distinct()),
+        }
+
+        icat_kwargs = {'URL': options['url']} if options['url'] else {}
+        entries = [(obj_type, obj_id) for obj_type, obj_ids in candidates.items()
+                   for obj_id in self.needing_refresh(obj_type, obj_ids, options['margin'])]
+        self.stdout.write(f"Warming {len(entries)} ICAT cache entries")
+
+        start = time.perf_counter()
+        if options['concurrency'] > 1:
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+                futures = [
+                    executor.submit(self.fill_in_thread, obj_type, obj_id, icat_kwargs) for obj_type, obj_id in entries
+                ]
+                results = (future.result() for future in as_completed(futures))
+                failures = sum(not self.report(*result) for result in results)
+        else:
+            failures = sum(not self.report(*self.fill(obj_type, obj_id, icat_kwargs)) for obj_type, obj_id in entries)
+
+        self.stdout.write(f"Warmed {len(entries) - failures} of {len(entries)} entries in "
+                          f"{time.perf_counter() - start:.2f}s")
+
+    @staticmethod
+    def needing_refresh(obj_type, obj_ids, margin):
+        """ Return the obj_ids whose newest cache entry is missing or expires within margin seconds. """
+        refresh_before = timezone.now() - datetime.timedelta(seconds=ICATCache().cache_lifetime - margin)
+        latest = dict(
+            obj_type.objects.filter(id_name__in=obj_ids).values('id_name').annotate(latest=Max('created')).values_list(
+                'id_name', 'latest'))
+        return [obj_id for obj_id in obj_ids if obj_id not in latest or latest[obj_id] < refresh_before]
+
+    @staticmethod
+    def fill(obj_type, obj_id, icat_kwargs):
+        """
+        Query ICAT for a fresh cache entry.
+        :return: (tuple) obj_type, obj_id, seconds taken and the exception raised, or None
+        """
+        start = time.perf_counter()
+        try:
+            with ICATCache(**icat_kwargs) as icat:
+                icat.update_cache(obj_type, obj_id)
+        # pylint: disable=broad-except
+        except Exception as exception:
+            return obj_type, obj_id, time.perf_counter() - start, exception
+        return obj_type, obj_id, time.perf_counter() - start, None
+
+    def fill_in_thread(self, obj_type, obj_id, icat_kwargs):
+        """ Run fill on a worker thread, closing the database connection Django opened for it. """
+        try:
+            return self.fill(obj_type, obj_id, icat_kwargs)
+        finally:
+            connection.close()
+
+    def report(self, obj_type, obj_id, seconds, exception) -> bool:
+        """ Write out the result of filling one entry, returning whether it succeeded. """
+        if exception is not None:
+            self.stderr.write(f"{obj_type.__name__} {obj_id}: failed after {seconds:.2f}s - "
+                              f"{type(exception).__name__}: {exception}")
+            return False
+        self.stdout.write(f"{obj_type.__name__} {obj_id}: filled in {seconds:.2f}s")
+        return True
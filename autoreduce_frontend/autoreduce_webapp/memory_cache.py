@@ -0,0 +1,84 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Bounded in-process cache with least-recently-used eviction and per-entry expiry
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryCache:
+    """
+    A thread-safe, size-bounded LRU cache held in the memory of a single worker process.
+
+    Every entry carries its own expiry time. Expired entries are treated as
+    misses and dropped when they are next looked up. When the cache is full the
+    least recently used entry is evicted to make room.
+
+    :param max_size: (int) The maximum number of entries held at once
+    :param lifetime: (float) The default number of seconds an entry lives for
+    """
+
+    def __init__(self, max_size: int, lifetime: float):
+        self.max_size = max_size
+        self.lifetime = lifetime
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """
+        Return the value stored under key, or default if it is missing or has expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, lifetime: float = None):
+        """
+        Store value under key for lifetime seconds (the cache default if not given).
+        Values that would already be expired are not stored.
+        """
+        if lifetime is None:
+            lifetime = self.lifetime
+        if lifetime <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + lifetime)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """ Remove key from the cache if it is present. """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """ Remove every entry and reset the hit and miss counters. """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """ Return the hit and miss counters along with the current and maximum size. """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "max_size": self.max_size}
@@ -0,0 +1,83 @@
+import json
+
+from django.db import migrations, models
+
+# The comma-joined list fields of each cache model, and the type of their elements
+LIST_FIELDS = {
+    "UserCache": {
+        "associated_experiments": int,
+        "owned_instruments": str,
+        "valid_instruments": str,
+    },
+    "InstrumentCache": {
+        "upcoming_experiments": int,
+        "valid_experiments": int,
+    },
+}
+
+
+def _parse(text, list_type):
+    parsed = []
+    for element in text.split(","):
+        try:
+            if element:
+                parsed.append(list_type(element))
+        except ValueError:
+            pass
+    return parsed
+
+
+def comma_joined_to_json(apps, _):
+    """Rewrite the existing comma-joined values as JSON lists, so the columns can become JSON."""
+    for model_name, fields in LIST_FIELDS.items():
+        model = apps.get_model("autoreduce_webapp", model_name)
+        for obj in model.objects.all():
+            for field, list_type in fields.items():
+                setattr(obj, field, json.dumps(_parse(getattr(obj, field), list_type)))
+            obj.save(update_fields=list(fields))
+
+
+def json_to_comma_joined(apps, _):
+    """Rewrite JSON lists back into comma-joined text."""
+    for model_name, fields in LIST_FIELDS.items():
+        model = apps.get_model("autoreduce_webapp", model_name)
+        for obj in model.objects.all():
+            for field in fields:
+                setattr(obj, field, ",".join(map(str, json.loads(getattr(obj, field) or "[]"))))
+            obj.save(update_fields=list(fields))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autoreduce_webapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(comma_joined_to_json, json_to_comma_joined),
+        migrations.AlterField(
+            model_name='instrumentcache',
+            name='upcoming_experiments',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='instrumentcache',
+            name='valid_experiments',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='usercache',
+            name='associated_experiments',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='usercache',
+            name='owned_instruments',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='usercache',
+            name='valid_instruments',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
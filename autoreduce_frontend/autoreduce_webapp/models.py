@@ -20,15 +20,25 @@ class Cache(models.Model):
     def __str__(self):
         return f"{self.id_name}"
 
+    def as_frozenset(self, field_name: str) -> frozenset:
+        """
+        Return a list field as a frozenset. The set is built on first use and
+        kept on the object, so membership checks don't rebuild it each time.
+        """
+        frozen = self.__dict__.setdefault("_frozen_fields", {})
+        if field_name not in frozen:
+            frozen[field_name] = frozenset(getattr(self, field_name))
+        return frozen[field_name]
+
 
 class UserCache(Cache):
     """
     Model representing the cached values for the users
     """
     id_name = models.IntegerField(blank=False)
-    associated_experiments = models.TextField(blank=True)
-    owned_instruments = models.TextField(blank=True)
-    valid_instruments = models.TextField(blank=True)
+    associated_experiments = models.JSONField(default=list, blank=True)
+    owned_instruments = models.JSONField(default=list, blank=True)
+    valid_instruments = models.JSONField(default=list, blank=True)
     is_admin = models.BooleanField(default=False)
     is_instrument_scientist = models.BooleanField(default=False)
 
@@ -38,8 +48,8 @@ class InstrumentCache(Cache):
     Model representing the cached values for the instruments
     """
     id_name = models.CharField(max_length=80)
-    upcoming_experiments = models.TextField(blank=True)
-    valid_experiments = models.TextField(blank=True)
+    upcoming_experiments = models.JSONField(default=list, blank=True)
+    valid_experiments = models.JSONField(default=list, blank=True)
 
 
 class ExperimentCache(Cache):
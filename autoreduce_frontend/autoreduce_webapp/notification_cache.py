@@ -0,0 +1,71 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Per-process cache of the active notifications shown at the top of every page
+"""
+import threading
+import uuid
+
+from django.core.cache import cache
+
+from autoreduce_db.reduction_viewer.models import Notification
+
+# Key in the shared Django cache holding the current version of the notifications.
+# Every worker process compares it with the version of its own copy before using it.
+VERSION_KEY = "autoreduce_webapp.notifications.version"
+
+
+def _new_version() -> str:
+    return uuid.uuid4().hex
+
+
+class NotificationCache:
+    """
+    Holds the active notifications for staff and for everyone else, each
+    queried once per version. The version lives in the shared Django cache and
+    is replaced whenever a Notification is saved or deleted, so every worker
+    process drops its copy on the next page render.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._notifications = {}
+
+    def get(self, staff: bool) -> list:
+        """
+        Return the active notifications, including the staff only ones if staff is True.
+        """
+        version = cache.get_or_set(VERSION_KEY, _new_version, timeout=None)
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._notifications = {}
+            notifications = self._notifications.get(staff)
+
+        if notifications is None:
+            query = Notification.objects.filter(is_active=True)
+            if not staff:
+                query = query.filter(is_staff_only=False)
+            notifications = tuple(query)
+            with self._lock:
+                # Don't keep the result if the notifications changed while it was being queried
+                if version == self._version:
+                    self._notifications[staff] = notifications
+
+        return list(notifications)
+
+    @staticmethod
+    def invalidate(**_):
+        """
+        Replace the shared version so every process queries the notifications again.
+        Connected to the post_save and post_delete signals of Notification.
+        """
+        cache.set(VERSION_KEY, _new_version(), timeout=None)
+
+
+NOTIFICATION_CACHE = NotificationCache()
@@ -0,0 +1,31 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Per-process cache of whether each instrument has a reduction script
+"""
+from autoreduce_qp.queue_processor.reduction.service import ReductionScript
+
+from autoreduce_frontend.autoreduce_webapp.memory_cache import MemoryCache
+from autoreduce_frontend.autoreduce_webapp.settings import (REDUCTION_SCRIPT_CACHE_LIFETIME,
+                                                            REDUCTION_SCRIPT_CACHE_SIZE)
+
+SCRIPT_EXISTS_CACHE = MemoryCache(REDUCTION_SCRIPT_CACHE_SIZE, REDUCTION_SCRIPT_CACHE_LIFETIME)
+
+
+def reduction_script_exists(instrument: str) -> bool:
+    """
+    Return whether the instrument's reduce.py exists, checking the scripts
+    share at most once every REDUCTION_SCRIPT_CACHE_LIFETIME seconds.
+
+    Args:
+        instrument: The name of the instrument.
+    """
+    exists = SCRIPT_EXISTS_CACHE.get(instrument)
+    if exists is None:
+        exists = ReductionScript(instrument).exists()
+        SCRIPT_EXISTS_CACHE.set(instrument, exists)
+    return exists
@@ -6,6 +6,7 @@
 # ############################################################################### #
 # pylint: skip-file
 import os
+import tempfile
 
 from autoreduce_db.autoreduce_django.settings import DATABASES as autoreduce_db_settings
 
@@ -77,6 +78,14 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Shared by every worker process on the host, so a change noted by one is seen by the others
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('DJANGO_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'autoreduce_django_cache')),
+    }
+}
+
 CRISPY_TEMPLATE_PACK = 'bootstrap4'
 DJANGO_TABLES2_TEMPLATE = "django_tables2/bootstrap4.html"
 
@@ -145,17 +154,26 @@ ICAT = {
     'USER': os.getenv('ICAT_USER'),
     'PASSWORD': os.getenv('ICAT_PASSWORD')
 }
+ICAT_SESSION_POOL_SIZE = 20  # Maximum number of ICAT sessions each worker process keeps open at once.
+ICAT_SESSION_REFRESH_MARGIN = 600  # Pooled ICAT sessions expiring within this many seconds are refreshed before use.
+ICAT_SESSION_POOL_TIMEOUT = 10  # Seconds to wait for a pooled ICAT session when they are all in use.
+ICAT_SESSION_LIFETIME = None  # Seconds ICAT keeps a session for. If None, ICAT is asked on the first login.
 
 # Outdated Browsers
 
 OUTDATED_BROWSERS = {
     'IE': 9,
 }
+USER_AGENT_CACHE_SIZE = 512  # Number of distinct User-Agent strings whose browser check is remembered.
 
 # UserOffice WebService
 
 UOWS_URL = 'https://api.facilities.rl.ac.uk/ws/UserOfficeWebService?wsdl'
 UOWS_LOGIN_URL = 'https://users.facilities.rl.ac.uk/auth/?service=https://reduce.isis.cclrc.ac.uk&redirecturl='
+# Parsed copies of the UOWS WSDL are kept here, and shared by every worker process on the host.
+UOWS_WSDL_CACHE_DIR = os.getenv('UOWS_WSDL_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'autoreduce_suds'))
+UOWS_WSDL_CACHE_DAYS = 1  # Days a parsed UOWS WSDL is reused for before it is downloaded again.
+UOWS_SESSION_CACHE_LIFETIME = 60  # Seconds a session the UOWS has said is valid is trusted for without asking again.
 
 # Email for notifications
 
@@ -171,6 +189,24 @@ SESSION_COOKIE_AGE = 3600  # The MAX length before user is logged out, 1 hour in
 FACILITY = "ISIS"
 PRELOAD_RUNS_UNDER = 100  # If the index run list has fewer than this many runs to show the user, preload them all.
 CACHE_LIFETIME = 3600  # Objects in ICATCache live this many seconds when ICAT is available to update them.
+# Expired ICATCache objects are served for this many more seconds while they refresh in the background. 0 disables this.
+CACHE_STALE_GRACE = 900
+CACHE_RETENTION = 604800  # Expired ICATCache objects are kept this many seconds as a fallback for when ICAT is down.
+ICAT_REFRESH_WORKERS = 2  # Number of threads each worker process uses to refresh expired ICATCache objects.
+ICAT_FILL_WORKERS = 4  # Number of threads each worker process uses to send the UserCache queries concurrently.
+ICAT_MEMORY_CACHE_SIZE = 1000  # Maximum number of ICATCache objects each worker process also holds in memory.
+CIRCUIT_BREAKER_FAILURES = 5  # Failures in a row before calls to ICAT or the UOWS fail fast.
+CIRCUIT_BREAKER_COOLDOWN = 30  # Seconds to fail fast for before a single call is let through to probe the service.
+STARTED_BY_CACHE_LIFETIME = 600  # Seconds the name of a user who submitted runs is remembered for.
+STARTED_BY_CACHE_SIZE = 256  # Maximum number of those names each worker process remembers.
+REDUCTION_SCRIPT_CACHE_LIFETIME = 30  # Seconds whether an instrument has a reduce.py is remembered for.
+REDUCTION_SCRIPT_CACHE_SIZE = 100  # Maximum number of instruments each worker process remembers that for.
+PLOT_LISTING_CACHE_LIFETIME = 60  # Seconds the plot files found in a reduction directory are remembered for.
+PLOT_LISTING_CACHE_SIZE = 500  # Maximum number of reduction directories each worker process remembers that for.
+# Header the front web server sends plot files for, X-Sendfile (Apache) or X-Accel-Redirect (nginx).
+# If it's empty the webapp streams the plot files itself.
+PLOT_SENDFILE_HEADER = os.getenv('AUTOREDUCE_PLOT_SENDFILE_HEADER', '')
+PLOT_SENDFILE_PREFIX = os.getenv('AUTOREDUCE_PLOT_SENDFILE_PREFIX', '')  # Put before plot paths in that header.
 USER_ACCESS_CHECKS = False  # Should the webapp prevent users from accessing runs/instruments they're not allowed to?
 
 # If the installation is in a development environment, set this variable to True so that
@@ -0,0 +1,54 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Tests for the memoized browser check used by render_with.
+"""
+from unittest.mock import patch
+
+from parameterized import parameterized
+
+from autoreduce_frontend.autoreduce_webapp.view_utils import BrowserCheck, check_browser
+
+CHROME = ("Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+          "Chrome/103.0.5060.53 Safari/537.36")
+
+
+@parameterized.expand([
+    [CHROME, BrowserCheck("Chrome", 103, False)],
+    ["", BrowserCheck("", 0, False)],
+    ["curl/7.81.0", BrowserCheck("", 0, False)],
+])
+def test_check_browser(user_agent, expected):
+    """
+    Test: The browser family and major version are extracted
+    When: Checking a User-Agent string
+    """
+    assert check_browser(user_agent) == expected
+
+
+@patch("autoreduce_frontend.autoreduce_webapp.view_utils.BAD_BROWSERS", (("Chrome", 103), ))
+def test_check_browser_outdated():
+    """
+    Test: The browser is reported as outdated
+    When: Its version is no newer than the outdated version in the settings
+    """
+    check_browser.cache_clear()
+    assert check_browser(CHROME).outdated
+    check_browser.cache_clear()
+
+
+def test_check_browser_memoized():
+    """
+    Test: The User-Agent is only parsed once
+    When: The same User-Agent is checked repeatedly
+    """
+    check_browser.cache_clear()
+    with patch("autoreduce_frontend.autoreduce_webapp.view_utils.httpagentparser.detect", return_value={}) as detect:
+        for _ in range(3):
+            check_browser(CHROME)
+    detect.assert_called_once_with(CHROME)
+    check_browser.cache_clear()
@@ -0,0 +1,173 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Tests for the CircuitBreaker used in front of ICAT and the UOWS.
+"""
+import json
+import unittest
+from unittest.mock import Mock, patch
+
+import pytest
+from django.core.exceptions import PermissionDenied
+from django.test import RequestFactory
+
+from autoreduce_frontend.autoreduce_webapp.circuit_breaker import (BREAKERS, CLOSED, HALF_OPEN, OPEN, CircuitBreaker,
+                                                                   CircuitOpenError)
+from autoreduce_frontend.reduction_viewer.views.status import service_status
+
+
+class ServiceDown(Exception):
+    """ Stands in for a timeout connecting to a service. """
+
+
+class ServiceAnswer(Exception):
+    """ Stands in for an error response from a service that is up. """
+
+
+class ServiceBusy(Exception):
+    """ Stands in for running out of connections before the service is called. """
+
+
+@patch.dict(BREAKERS)
+@patch("autoreduce_frontend.autoreduce_webapp.circuit_breaker.time.monotonic", return_value=0)
+class TestCircuitBreaker(unittest.TestCase):
+
+    @staticmethod
+    def make_open_breaker():
+        """ Return a breaker that has just opened after two failures. """
+        breaker = CircuitBreaker("test", failure_threshold=2, cooldown=30, ignored=(ServiceAnswer, ))
+        for _ in range(2):
+            with pytest.raises(ServiceDown):
+                breaker.call(Mock(side_effect=ServiceDown))
+        return breaker
+
+    def test_opens_after_threshold(self, _):
+        """
+        Test: Calls fail fast without reaching the service
+        When: The failure threshold has been reached
+        """
+        breaker = self.make_open_breaker()
+        service = Mock()
+        with pytest.raises(CircuitOpenError):
+            breaker.call(service)
+        service.assert_not_called()
+        assert breaker.state == OPEN
+
+    def test_success_resets_failures(self, _):
+        """
+        Test: The failure count is reset
+        When: A call succeeds between failures
+        """
+        breaker = CircuitBreaker("test", failure_threshold=2, cooldown=30)
+        with pytest.raises(ServiceDown):
+            breaker.call(Mock(side_effect=ServiceDown))
+        assert breaker.call(Mock(return_value=1)) == 1
+        with pytest.raises(ServiceDown):
+            breaker.call(Mock(side_effect=ServiceDown))
+        assert breaker.state == CLOSED
+
+    def test_ignored_errors_do_not_count(self, _):
+        """
+        Test: The breaker stays closed and the error is still raised
+        When: The service answers with an ignored error type
+        """
+        breaker = CircuitBreaker("test", failure_threshold=1, cooldown=30, ignored=(ServiceAnswer, ))
+        with pytest.raises(ServiceAnswer):
+            breaker.call(Mock(side_effect=ServiceAnswer))
+        assert breaker.state == CLOSED
+
+    def test_neutral_errors_do_not_count(self, monotonic):
+        """
+        Test: The breaker stays half-open and the next call probes the service instead
+        When: The probe is stopped by a neutral error before it reaches the service
+        """
+        breaker = self.make_open_breaker()
+        breaker.neutral = (ServiceBusy, )
+        monotonic.return_value = 30
+        with pytest.raises(ServiceBusy):
+            breaker.call(Mock(side_effect=ServiceBusy))
+        assert breaker.state == HALF_OPEN
+        assert breaker.failures == 2
+        assert breaker.call(Mock(return_value="up")) == "up"
+        assert breaker.state == CLOSED
+
+    def test_single_probe_when_half_open(self, monotonic):
+        """
+        Test: Only one call is let through, and its success closes the breaker
+        When: The cooldown has passed
+        """
+        breaker = self.make_open_breaker()
+        monotonic.return_value = 30
+
+        def probe():
+            # Another request arriving while the probe is in flight still fails fast
+            assert breaker.state == HALF_OPEN
+            with pytest.raises(CircuitOpenError):
+                breaker.call(Mock())
+            return "up"
+
+        assert breaker.call(probe) == "up"
+        assert breaker.state == CLOSED
+
+    def test_failed_probe_reopens(self, monotonic):
+        """
+        Test: The breaker opens again for a full cooldown
+        When: The half-open probe fails
+        """
+        breaker = self.make_open_breaker()
+        monotonic.return_value = 30
+        with pytest.raises(ServiceDown):
+            breaker.call(Mock(side_effect=ServiceDown))
+        assert breaker.state == OPEN
+        monotonic.return_value = 59
+        with pytest.raises(CircuitOpenError):
+            breaker.call(Mock())
+
+    def test_snapshot(self, monotonic):
+        """
+        Test: The snapshot reports the state and time until the next probe
+        When: The breaker is open
+        """
+        breaker = self.make_open_breaker()
+        monotonic.return_value = 10
+        assert breaker.snapshot() == {"name": "test", "state": OPEN, "failures": 2, "retry_in": 20}
+
+
+def staff_request():
+    """ Return a request for the status page from a member of staff. """
+    request = RequestFactory().get("/status/")
+    request.user = Mock(is_staff=True)
+    return request
+
+
+@patch("autoreduce_frontend.autoreduce_webapp.view_utils.DEVELOPMENT_MODE", True)
+class TestServiceStatus(unittest.TestCase):
+
+    @patch.dict(BREAKERS, clear=True)
+    def test_reports_breakers(self):
+        """
+        Test: Every breaker's state is returned as JSON
+        When: The status page is requested
+        """
+        CircuitBreaker("test", failure_threshold=2, cooldown=30)
+        response = service_status(staff_request())
+        assert json.loads(response.content)["circuit_breakers"] == [{
+            "name": "test",
+            "state": CLOSED,
+            "failures": 0,
+            "retry_in": None
+        }]
+
+    def test_staff_only(self):
+        """
+        Test: Access is denied
+        When: The status page is requested by a user who isn't staff
+        """
+        request = RequestFactory().get("/status/")
+        request.user = Mock(is_staff=False)
+        with pytest.raises(PermissionDenied):
+            service_status(request)
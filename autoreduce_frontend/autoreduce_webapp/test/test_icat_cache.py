@@ -0,0 +1,223 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Tests for the ICATCache wrapper.
+"""
+# pylint:disable=no-member
+import datetime
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from parameterized import parameterized
+
+from autoreduce_frontend.autoreduce_webapp.circuit_breaker import CircuitOpenError
+from autoreduce_frontend.autoreduce_webapp.icat_cache import (MEMORY_CACHE, REFRESHING, ICATCache,
+                                                              ICATConnectionException, sweep_cache)
+from autoreduce_frontend.autoreduce_webapp.models import Cache, UserCache
+
+
+class FakeICATCommunication:
+    """Stands in for ICATCommunication, counting the queries sent to it."""
+    calls = Counter()
+    results = {
+        "is_admin": False,
+        "get_owned_instruments": ["WISH"],
+        "get_experiment_instruments": ["MARI", "WISH"],
+        "get_associated_experiments": [1234567, 7654321],
+        "get_all_instruments": ["MARI", "WISH", "ZOOM"],
+    }
+
+    def __init__(self, **_):
+        self.calls["__init__"] += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        pass
+
+    def for_thread(self):
+        """The fake is safe to share between threads, so it stands in for its own copies."""
+        return self
+
+    def __getattr__(self, name):
+
+        def query(*_):
+            self.calls[name] += 1
+            return self.results[name]
+
+        return query
+
+
+class TestICATCache(TestCase):
+
+    def setUp(self):
+        MEMORY_CACHE.clear()
+        self.addCleanup(MEMORY_CACHE.clear)
+        self.addCleanup(REFRESHING.clear)
+
+    @patch("autoreduce_frontend.autoreduce_webapp.icat_cache.ICATCommunication")
+    def test_check_cache_uses_memory_tier(self, icat_communication):
+        """
+        Test: The database is only queried on the first lookup
+        When: The same fresh cache object is requested twice
+        """
+        UserCache.objects.create(id_name=1234, owned_instruments=["WISH"])
+        icat = ICATCache()
+        with self.assertNumQueries(1):
+            first = icat.check_cache(UserCache, 1234)
+        with self.assertNumQueries(0):
+            second = icat.check_cache(UserCache, 1234)
+        assert first is second
+        assert ICATCache.memory_stats()["hits"] == 1
+        icat_communication.assert_not_called()
+
+    @parameterized.expand([[ICATConnectionException], [CircuitOpenError]])
+    @patch("autoreduce_frontend.autoreduce_webapp.icat_cache.ICATCache.update_cache")
+    def test_check_cache_does_not_remember_expired_objects(self, error, update_cache):
+        """
+        Test: The stale database object is returned, and not put in the memory tier
+        When: ICAT is unavailable, or its circuit breaker is open
+        """
+        update_cache.side_effect = error
+        UserCache.objects.create(id_name=1234)
+        UserCache.objects.filter(id_name=1234).update(created="2000-01-01T00:00:00Z")
+
+        assert ICATCache().check_cache(UserCache, 1234).id_name == 1234
+        assert len(MEMORY_CACHE) == 0
+
+    @patch("autoreduce_frontend.autoreduce_webapp.icat_cache.FILL_EXECUTOR", ThreadPoolExecutor(max_workers=1))
+    @patch("autoreduce_frontend.autoreduce_webapp.icat_cache.ICATCommunication", FakeICATCommunication)
+    def test_update_user_cache_sends_each_query_once(self):
+        """
+        Test: Every ICAT query needed is sent exactly once, in one ICAT session, and the fields are derived from them
+        When: A UserCache object is filled
+        """
+        FakeICATCommunication.calls.clear()
+        with ICATCache() as icat:
+            user = icat.update_cache(UserCache, 1234)
+
+        assert FakeICATCommunication.calls == Counter({
+            "__init__": 1,
+            "get_owned_instruments": 1,
+            "is_admin": 1,
+            "get_experiment_instruments": 1,
+            "get_associated_experiments": 1
+        })
+        assert user.owned_instruments == ["WISH"]
+        assert user.valid_instruments == ["MARI", "WISH"]
+        assert user.associated_experiments == [1234567, 7654321]
+        assert user.is_instrument_scientist
+        assert not user.is_admin
+
+    @patch.dict(FakeICATCommunication.results, {"is_admin": True})
+    @patch("autoreduce_frontend.autoreduce_webapp.icat_cache.FILL_EXECUTOR", ThreadPoolExecutor(max_workers=1))
+    @patch("autoreduce_frontend.autoreduce_webapp.icat_cache.ICATCommunication", FakeICATCommunication)
+    def test_update_user_cache_gets_all_instruments_for_admins(self):
+        """
+        Test: Every instrument is queried, and used as the valid instruments
+        When: A UserCache object is filled for an admin
+        """
+        FakeICATCommunication.calls.clear()
+        with ICATCache() as icat:
+            user = icat.update_cache(UserCache, 1234)
+
+        assert FakeICATCommunication.calls["get_all_instruments"] == 1
+        assert user.valid_instruments == ["MARI", "WISH", "ZOOM"]
+        assert user.is_admin
+
+    @patch("autoreduce_frontend.autoreduce_webapp.icat_cache.ICATCommunication")
+    def test_update_user_cache_sends_queries_concurrently(self, icat_communication):
+        """
+        Test: The queries filling the cache are all in flight at the same time
+        When: A UserCache object is filled
+        """
+        # Each query waits for the other three, so sending them one after another breaks the barrier
+        barrier = threading.Barrier(4, timeout=5)
+
+        def query(result):
+
+            def wait(*_):
+                barrier.wait()
+                return result
+
+            return wait
+
+        icat_thread = icat_communication.return_value.for_thread.return_value
+        icat_thread.get_owned_instruments.side_effect = query([])
+        icat_thread.is_admin.side_effect = query(False)
+        icat_thread.get_experiment_instruments.side_effect = query(["MARI"])
+        icat_thread.get_associated_experiments.side_effect = query([1234567])
+        with ICATCache() as icat:
+            user = icat.update_cache(UserCache, 1234)
+
+        assert user.valid_instruments == ["MARI"]
+        assert user.associated_experiments == [1234567]
+        icat_thread.get_all_instruments.assert_not_called()
+
+    @patch("autoreduce_frontend.autoreduce_webapp.icat_cache.REFRESH_EXECUTOR")
+    @patch("autoreduce_frontend.autoreduce_webapp.icat_cache.ICATCache.update_cache")
+    def test_check_cache_serves_stale_within_grace(self, update_cache, refresh_executor):
+        """
+        Test: The expired object is returned without waiting for ICAT, and one refresh is queued
+        When: The newest object has expired within the grace window and is requested twice
+        """
+        stale = UserCache.objects.create(id_name=1234)
+        icat = ICATCache()
+        UserCache.objects.filter(pk=stale.pk).update(created=timezone.now() -
+                                                     datetime.timedelta(seconds=icat.cache_lifetime + 1))
+
+        assert icat.check_cache(UserCache, 1234).pk == stale.pk
+        assert icat.check_cache(UserCache, 1234).pk == stale.pk
+        update_cache.assert_not_called()
+        refresh_executor.submit.assert_called_once()
+        assert len(MEMORY_CACHE) == 0
+
+    def test_list_fields_are_frozensets(self):
+        """
+        Test: List fields are returned as the same prebuilt frozenset on each call
+        When: A cached list field is requested twice
+        """
+        UserCache.objects.create(id_name=1234, associated_experiments=[1234567, 7654321])
+        icat = ICATCache()
+        experiments = icat.get_associated_experiments(1234)
+        assert experiments == frozenset({1234567, 7654321})
+        assert icat.get_associated_experiments(1234) is experiments
+
+    def test_to_list_drops_invalid_elements(self):
+        """
+        Test: Elements that can't be converted are left out
+        When: ICAT returns empty and non-numeric experiment names
+        """
+        assert ICATCache.to_list(["1234567", "", "CAL123", None, 7654321], int) == [1234567, 7654321]
+
+    def test_sweep_cache_deletes_superseded_and_old_rows(self):
+        """
+        Test: Superseded rows and rows older than the retention are deleted, the newest expired row is kept
+        When: sweep_cache is run
+        """
+        superseded = UserCache.objects.create(id_name=1234)
+        newest = UserCache.objects.create(id_name=1234)
+        expired = UserCache.objects.create(id_name=5678)
+        too_old = UserCache.objects.create(id_name=9999)
+        UserCache.objects.filter(pk=expired.pk).update(created=timezone.now() - datetime.timedelta(hours=2))
+        UserCache.objects.filter(pk=too_old.pk).update(created=timezone.now() - datetime.timedelta(days=30))
+
+        with CaptureQueriesContext(connection) as queries:
+            deleted = sweep_cache(retention=7 * 24 * 3600)
+
+        # The rows are deleted in the database, not fetched to be deleted one at a time
+        assert not [query for query in queries if query["sql"].startswith("SELECT")]
+        assert deleted == {"UserCache": 2, "InstrumentCache": 0, "ExperimentCache": 0}
+        assert set(UserCache.objects.values_list("pk", flat=True)) == {newest.pk, expired.pk}
+        assert not Cache.objects.filter(pk__in=[superseded.pk, too_old.pk]).exists()
@@ -0,0 +1,172 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Tests for the pool of ICAT sessions used by ICATCommunication, and the clients
+used to share them between threads.
+"""
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+from autoreduce_frontend.autoreduce_webapp.icat_communication import (ICATCommunication, ICATSessionPool,
+                                                                      ICATSessionPoolExhausted)
+
+URL = "https://icat.example"
+SERVICE = {"username": "reduce", "password": "secret"}
+UOWS = {"sessionid": "abc123"}
+
+
+@patch("autoreduce_frontend.autoreduce_webapp.icat_communication.icat.Client")
+class TestICATSessionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.logout_executor = ThreadPoolExecutor(max_workers=1)
+        self.pool = ICATSessionPool(max_sessions=2, refresh_margin=60, timeout=0, logout_executor=self.logout_executor)
+
+    def tearDown(self):
+        self.logout_executor.shutdown(wait=True)
+
+    def wait_for_logouts(self):
+        """ Wait for the logouts handed to the logout executor to finish. """
+        self.logout_executor.shutdown(wait=True)
+
+    @staticmethod
+    def _new_client(*_, **__):
+        client = Mock()
+        client.getRemainingMinutes.return_value = 120
+        return client
+
+    def test_released_session_is_reused(self, client_class: Mock):
+        """
+        Test: Only one login happens
+        When: A session is released and the same credentials are requested again
+        """
+        client_class.side_effect = self._new_client
+        client = self.pool.acquire(URL, "simple", SERVICE)
+        self.pool.release(URL, "simple", SERVICE, client)
+        assert self.pool.acquire(URL, "simple", SERVICE) is client
+        client.login.assert_called_once_with("simple", SERVICE)
+        client.logout.assert_not_called()
+
+    def test_sessions_are_keyed_by_credentials(self, client_class: Mock):
+        """
+        Test: A separate session is opened
+        When: A different sessionid is requested
+        """
+        client_class.side_effect = self._new_client
+        service_client = self.pool.acquire(URL, "simple", SERVICE)
+        self.pool.release(URL, "simple", SERVICE, service_client)
+        uows_client = self.pool.acquire(URL, "uows", UOWS)
+        assert uows_client is not service_client
+        uows_client.login.assert_called_once_with("uows", UOWS)
+
+    def test_idle_session_is_evicted_when_full(self, client_class: Mock):
+        """
+        Test: The least recently used idle session is logged out
+        When: The pool is full and a session for new credentials is needed
+        """
+        client_class.side_effect = self._new_client
+        first = self.pool.acquire(URL, "simple", SERVICE)
+        second = self.pool.acquire(URL, "uows", UOWS)
+        self.pool.release(URL, "simple", SERVICE, first)
+        logout_threads = []
+        first.logout.side_effect = lambda: logout_threads.append(threading.current_thread())
+        self.pool.acquire(URL, "uows", {"sessionid": "other"})
+        self.wait_for_logouts()
+        first.logout.assert_called_once()
+        assert logout_threads != [threading.current_thread()]
+        assert self.pool.open_sessions == 2
+        second.logout.assert_not_called()
+
+    def test_exhausted_when_all_checked_out(self, client_class: Mock):
+        """
+        Test: ICATSessionPoolExhausted is raised
+        When: Every session in a full pool is checked out
+        """
+        client_class.side_effect = self._new_client
+        self.pool.acquire(URL, "simple", SERVICE)
+        self.pool.acquire(URL, "simple", SERVICE)
+        with self.assertRaises(ICATSessionPoolExhausted):
+            self.pool.acquire(URL, "simple", SERVICE)
+
+    def test_session_near_expiry_is_refreshed(self, client_class: Mock):
+        """
+        Test: The session is refreshed rather than logged in again
+        When: A pooled session is within the refresh margin of expiring
+        """
+        client_class.side_effect = self._new_client
+        client = self.pool.acquire(URL, "simple", SERVICE)
+        self.pool.release(URL, "simple", SERVICE, client)
+        self.pool.refresh_margin = 120 * 60 + 1
+        assert self.pool.acquire(URL, "simple", SERVICE) is client
+        client.refresh.assert_called_once()
+        client.login.assert_called_once()
+
+    def test_discarded_session_is_logged_out(self, client_class: Mock):
+        """
+        Test: The session is logged out and not reused
+        When: It is released with discard=True
+        """
+        client_class.side_effect = self._new_client
+        client = self.pool.acquire(URL, "simple", SERVICE)
+        self.pool.release(URL, "simple", SERVICE, client, discard=True)
+        self.wait_for_logouts()
+        client.logout.assert_called_once()
+        assert self.pool.open_sessions == 0
+
+    def test_session_lifetime_asked_for_once(self, client_class: Mock):
+        """
+        Test: ICAT is only asked how long sessions last on the first login
+        When: Several sessions are opened to the same ICAT
+        """
+        client_class.side_effect = self._new_client
+        first = self.pool.acquire(URL, "uows", UOWS)
+        second = self.pool.acquire(URL, "uows", {"sessionid": "other"})
+        first.getRemainingMinutes.assert_called_once()
+        second.getRemainingMinutes.assert_not_called()
+
+    def test_configured_session_lifetime(self, client_class: Mock):
+        """
+        Test: ICAT isn't asked how long sessions last
+        When: The session lifetime is configured
+        """
+        client_class.side_effect = self._new_client
+        self.pool.session_lifetime = 7200
+        client = self.pool.acquire(URL, "simple", SERVICE)
+        client.getRemainingMinutes.assert_not_called()
+
+
+@patch("autoreduce_frontend.autoreduce_webapp.icat_communication.icat.Client")
+class TestICATCommunicationForThread(unittest.TestCase):
+
+    @staticmethod
+    def _in_new_thread(func):
+        """ Run func in a new thread, which has no icat.Client of its own yet, and return its result. """
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(func).result()
+
+    @patch("autoreduce_frontend.autoreduce_webapp.icat_communication.SESSION_POOL")
+    def test_for_thread_reuses_one_client_per_thread(self, session_pool: Mock, client_class: Mock):
+        """
+        Test: Each thread creates one client, which is set to the pooled session and never logs it out
+        When: Copies of ICATCommunication are made for several threads
+        """
+        client_class.side_effect = lambda **_: Mock()
+        session_pool.acquire.return_value = Mock(sessionId="pooled")
+        icat_communication = ICATCommunication(URL=URL, AUTH="simple", SESSION=SERVICE)
+
+        first, second = self._in_new_thread(lambda: (icat_communication.for_thread(), icat_communication.for_thread()))
+        other_thread = self._in_new_thread(icat_communication.for_thread)
+
+        assert first.client is second.client
+        assert other_thread.client is not first.client
+        assert client_class.call_count == 2
+        for copy in (first, other_thread):
+            assert copy.client is not icat_communication.client
+            assert copy.client.sessionId == "pooled"
+            assert not copy.client.autoLogout
@@ -0,0 +1,65 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Tests for the in-process MemoryCache.
+"""
+import unittest
+from unittest.mock import patch
+
+from autoreduce_frontend.autoreduce_webapp.memory_cache import MemoryCache
+
+
+class TestMemoryCache(unittest.TestCase):
+
+    def test_get_counts_hits_and_misses(self):
+        """
+        Test: Hits and misses are counted
+        When: Present and missing keys are looked up
+        """
+        cache = MemoryCache(max_size=10, lifetime=60)
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+        assert cache.get("missing") is None
+        assert cache.stats() == {"hits": 1, "misses": 1, "size": 1, "max_size": 10}
+
+    def test_least_recently_used_is_evicted(self):
+        """
+        Test: The least recently used entry is dropped
+        When: An entry is added to a full cache
+        """
+        cache = MemoryCache(max_size=2, lifetime=60)
+        cache.set("first", 1)
+        cache.set("second", 2)
+        cache.get("first")
+        cache.set("third", 3)
+        assert cache.get("second") is None
+        assert cache.get("first") == 1
+        assert cache.get("third") == 3
+
+    @patch("autoreduce_frontend.autoreduce_webapp.memory_cache.time.monotonic")
+    def test_expired_entries_are_misses(self, monotonic):
+        """
+        Test: An entry is not returned after its lifetime
+        When: The entry is looked up after it has expired
+        """
+        monotonic.return_value = 100
+        cache = MemoryCache(max_size=10, lifetime=60)
+        cache.set("default", 1)
+        cache.set("short", 2, lifetime=5)
+        monotonic.return_value = 110
+        assert cache.get("short") is None
+        assert cache.get("default") == 1
+        assert len(cache) == 1
+
+    def test_non_positive_lifetime_is_not_stored(self):
+        """
+        Test: Nothing is stored
+        When: The lifetime given has already passed
+        """
+        cache = MemoryCache(max_size=10, lifetime=60)
+        cache.set("key", "value", lifetime=-1)
+        assert len(cache) == 0
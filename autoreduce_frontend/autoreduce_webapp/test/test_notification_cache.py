@@ -0,0 +1,64 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Tests for the per-process cache of active notifications.
+"""
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from autoreduce_db.reduction_viewer.models import Notification
+from autoreduce_frontend.autoreduce_webapp.notification_cache import VERSION_KEY, NotificationCache
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class TestNotificationCache(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.public = Notification.objects.create(message="Everyone")
+        self.staff_only = Notification.objects.create(message="Staff", is_staff_only=True)
+        Notification.objects.create(message="Inactive", is_active=False)
+        self.notifications = NotificationCache()
+
+    def test_staff_and_non_staff_variants(self):
+        """
+        Test: Staff see every active notification and everyone else only the public ones
+        When: The notifications are fetched for each
+        """
+        assert self.notifications.get(staff=True) == [self.public, self.staff_only]
+        assert self.notifications.get(staff=False) == [self.public]
+
+    def test_cached(self):
+        """
+        Test: No queries are made
+        When: The notifications are fetched again
+        """
+        self.notifications.get(staff=False)
+        with self.assertNumQueries(0):
+            assert self.notifications.get(staff=False) == [self.public]
+
+    def test_invalidated_on_save_and_delete(self):
+        """
+        Test: The change is seen straight away
+        When: A notification is saved or deleted
+        """
+        self.notifications.get(staff=False)
+        self.public.message = "Changed"
+        self.public.save()
+        assert self.notifications.get(staff=False)[0].message == "Changed"
+        self.public.delete()
+        assert not self.notifications.get(staff=False)
+
+    def test_other_process_invalidation(self):
+        """
+        Test: The notifications are queried again
+        When: Another process has replaced the shared version
+        """
+        self.notifications.get(staff=False)
+        cache.set(VERSION_KEY, "from another process")
+        with self.assertNumQueries(1):
+            self.notifications.get(staff=False)
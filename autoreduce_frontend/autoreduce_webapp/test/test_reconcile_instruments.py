@@ -0,0 +1,67 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Tests for the reconcile_instruments management command.
+"""
+# pylint:disable=no-member
+from io import StringIO
+from unittest.mock import Mock, patch
+
+from autoreduce_db.reduction_viewer.models import Instrument
+from django.core.management import call_command
+from django.test import TestCase
+
+from autoreduce_frontend.autoreduce_webapp.management.commands.reconcile_instruments import reconcile_instruments
+
+
+def fake_script(instrument_name):
+    """ Return a ReductionScript stand-in that only exists for SCRIPTED. """
+    return Mock(exists=Mock(return_value=instrument_name == "SCRIPTED"))
+
+
+@patch("autoreduce_frontend.autoreduce_webapp.management.commands.reconcile_instruments.ReductionScript", fake_script)
+class TestReconcileInstruments(TestCase):
+    fixtures = ["status_fixture", "autoreduce_frontend/autoreduce_webapp/fixtures/eleven_runs.json"]
+
+    def setUp(self):
+        Instrument.objects.filter(name="TESTINSTRUMENT").update(is_active=False)
+        Instrument.objects.create(name="SCRIPTED", is_active=False)
+        Instrument.objects.create(name="EMPTY", is_active=True)
+
+    def test_reconcile(self):
+        """
+        Test: Instruments with runs or a script are active and the rest inactive,
+              in one query to read them and one to save the changes
+        When: The instruments are reconciled
+        """
+        with self.assertNumQueries(2):
+            changed = reconcile_instruments()
+        assert {instrument.name for instrument in changed} == {"TESTINSTRUMENT", "SCRIPTED", "EMPTY"}
+        assert dict(Instrument.objects.values_list("name", "is_active")) == {
+            "TESTINSTRUMENT": True,
+            "SCRIPTED": True,
+            "EMPTY": False
+        }
+
+    def test_nothing_saved_when_unchanged(self):
+        """
+        Test: Nothing is saved
+        When: The instruments are already reconciled
+        """
+        reconcile_instruments()
+        with self.assertNumQueries(1):
+            assert not reconcile_instruments()
+
+    def test_command_reports_changes(self):
+        """
+        Test: Each changed instrument is reported
+        When: The management command is run
+        """
+        out = StringIO()
+        call_command("reconcile_instruments", stdout=out)
+        assert "EMPTY: deactivated" in out.getvalue()
+        assert "SCRIPTED: activated" in out.getvalue()
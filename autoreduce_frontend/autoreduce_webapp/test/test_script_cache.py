@@ -0,0 +1,70 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Tests for the reduction script existence cache.
+"""
+import json
+import unittest
+from unittest.mock import Mock, patch
+
+from django.test import RequestFactory
+
+from autoreduce_frontend.autoreduce_webapp.script_cache import SCRIPT_EXISTS_CACHE, reduction_script_exists
+from autoreduce_frontend.reduction_viewer.views.status import service_status
+
+
+@patch("autoreduce_frontend.autoreduce_webapp.script_cache.ReductionScript")
+class TestReductionScriptExists(unittest.TestCase):
+
+    def setUp(self):
+        SCRIPT_EXISTS_CACHE.clear()
+
+    def tearDown(self):
+        SCRIPT_EXISTS_CACHE.clear()
+
+    def test_checked_once(self, script: Mock):
+        """
+        Test: The scripts share is only checked once for each instrument, whether the script exists or not
+        When: Asking about the same instruments again
+        """
+        script.side_effect = lambda instrument: Mock(exists=Mock(return_value=instrument == "SCRIPTED"))
+        for _ in range(3):
+            assert reduction_script_exists("SCRIPTED")
+            assert not reduction_script_exists("EMPTY")
+        assert script.call_count == 2
+        assert SCRIPT_EXISTS_CACHE.stats()["hits"] == 4
+        assert SCRIPT_EXISTS_CACHE.stats()["misses"] == 2
+
+    @patch("autoreduce_frontend.autoreduce_webapp.memory_cache.time.monotonic")
+    def test_checked_again_after_lifetime(self, monotonic: Mock, script: Mock):
+        """
+        Test: The scripts share is checked again
+        When: The remembered answer is older than the cache lifetime
+        """
+        monotonic.return_value = 0
+        script.return_value.exists.return_value = False
+        assert not reduction_script_exists("TESTINSTRUMENT")
+        script.return_value.exists.return_value = True
+        monotonic.return_value = SCRIPT_EXISTS_CACHE.lifetime + 1
+        assert reduction_script_exists("TESTINSTRUMENT")
+        assert script.call_count == 2
+
+    @patch("autoreduce_frontend.autoreduce_webapp.view_utils.DEVELOPMENT_MODE", True)
+    def test_status_reports_counters(self, script: Mock):
+        """
+        Test: The cache's hit and miss counters are returned
+        When: The status page is requested
+        """
+        script.return_value.exists.return_value = True
+        reduction_script_exists("TESTINSTRUMENT")
+        reduction_script_exists("TESTINSTRUMENT")
+        request = RequestFactory().get("/status/")
+        request.user = Mock(is_staff=True)
+        response = service_status(request)
+        stats = json.loads(response.content)["reduction_script_cache"]
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
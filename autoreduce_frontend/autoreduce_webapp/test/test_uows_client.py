@@ -0,0 +1,96 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Tests for UOWSClient and the caches in front of the UOWS.
+"""
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from autoreduce_frontend.autoreduce_webapp.settings import BASE_DIR
+from autoreduce_frontend.autoreduce_webapp.uows_client import UOWSClient, WSDLCache
+
+WSDL_URL = Path(BASE_DIR, "test_files", "uows", "UserOfficeWebService.wsdl").resolve().as_uri()
+
+
+class TestUOWSClientWSDLCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()  # pylint:disable=consider-using-with
+        self.wsdl_cache = WSDLCache(location=self.cache_dir.name, days=1)
+        patcher = patch("autoreduce_frontend.autoreduce_webapp.uows_client.WSDL_CACHE", self.wsdl_cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.cache_dir.cleanup)
+
+    def test_clients_share_parsed_wsdl(self):
+        """
+        Test: The WSDL is parsed once and shared
+        When: Several UOWSClients are created in one process
+        """
+        first = UOWSClient(URL=WSDL_URL)
+        second = UOWSClient(URL=WSDL_URL)
+        assert first.client is not second.client
+        assert first.client.wsdl is second.client.wsdl
+        assert hasattr(second.client.service, "isTokenValid")
+
+    def test_parsed_wsdl_is_stored_on_disk(self):
+        """
+        Test: The parsed WSDL is read back from disk without being parsed again
+        When: Another process, with an empty memory cache, creates a UOWSClient
+        """
+        UOWSClient(URL=WSDL_URL)
+        with patch("autoreduce_frontend.autoreduce_webapp.uows_client.WSDL_CACHE",
+                   WSDLCache(location=self.cache_dir.name, days=1)), \
+                patch("suds.client.Definitions") as parse:
+            client = UOWSClient(URL=WSDL_URL)
+        parse.assert_not_called()
+        assert hasattr(client.client.service, "getPersonDetailsFromSessionId")
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+@patch("autoreduce_frontend.autoreduce_webapp.uows_client.make_suds_client")
+class TestUOWSClientSessionCache(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_valid_session_is_cached(self, make_suds_client: Mock):
+        """
+        Test: The UOWS is only asked once
+        When: A valid session is checked twice
+        """
+        make_suds_client.return_value.service.isTokenValid.return_value = True
+        assert UOWSClient().check_session("abc123")
+        assert UOWSClient().check_session("abc123")
+        make_suds_client.return_value.service.isTokenValid.assert_called_once_with("abc123")
+
+    def test_invalid_session_is_not_cached(self, make_suds_client: Mock):
+        """
+        Test: The UOWS is asked every time
+        When: An invalid session is checked twice
+        """
+        make_suds_client.return_value.service.isTokenValid.return_value = False
+        assert not UOWSClient().check_session("abc123")
+        assert not UOWSClient().check_session("abc123")
+        assert make_suds_client.return_value.service.isTokenValid.call_count == 2
+
+    def test_logout_forgets_session(self, make_suds_client: Mock):
+        """
+        Test: The UOWS is asked again
+        When: A cached session is checked after logging out
+        """
+        service = make_suds_client.return_value.service
+        service.isTokenValid.return_value = True
+        UOWSClient().check_session("abc123")
+        UOWSClient().logout("abc123")
+        service.isTokenValid.return_value = False
+        assert not UOWSClient().check_session("abc123")
@@ -0,0 +1,59 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Tests for the warm_icat_cache management command, run against a fake ICAT.
+"""
+# pylint:disable=no-member,imported-auth-user
+from io import StringIO
+from unittest.mock import patch
+
+from autoreduce_db.reduction_viewer.models import Instrument
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from autoreduce_frontend.autoreduce_webapp.models import InstrumentCache, UserCache
+from autoreduce_frontend.autoreduce_webapp.test.test_icat_cache import FakeICATCommunication
+
+
+@patch("autoreduce_frontend.autoreduce_webapp.icat_cache.ICATCommunication", FakeICATCommunication)
+class TestWarmICATCache(TestCase):
+
+    def setUp(self):
+        Instrument.objects.create(name="WISH", is_active=True)
+        User.objects.create(username="1234", last_login=timezone.now())
+        User.objects.create(username="super", last_login=timezone.now())
+        FakeICATCommunication.results["get_upcoming_experiments_for_instrument"] = ["1234567"]
+        FakeICATCommunication.results["get_valid_experiments_for_instrument"] = ["1234567", "7654321"]
+
+    def _warm(self):
+        out = StringIO()
+        call_command("warm_icat_cache", "--concurrency=1", "--url=http://localhost:1234/fake-icat", stdout=out)
+        return out.getvalue()
+
+    def test_fills_instruments_and_recent_users(self):
+        """
+        Test: A cache entry is made for each instrument and recently active user, with its timing reported
+        When: The caches are empty
+        """
+        output = self._warm()
+        assert InstrumentCache.objects.get(id_name="WISH").valid_experiments == [1234567, 7654321]
+        assert UserCache.objects.get(id_name=1234).owned_instruments == ["WISH"]
+        assert "InstrumentCache WISH: filled in" in output
+        assert "UserCache 1234: filled in" in output
+        assert "Warmed 2 of 2 entries" in output
+
+    def test_fresh_entries_are_skipped(self):
+        """
+        Test: Nothing is refreshed
+        When: Every entry is fresh
+        """
+        self._warm()
+        output = self._warm()
+        assert "Warming 0 ICAT cache entries" in output
+        assert InstrumentCache.objects.count() == 1
@@ -5,23 +5,116 @@
 # SPDX - License - Identifier: GPL-3.0-or-later
 # ############################################################################### #
 """Client for accessing the user office logon."""
+import hashlib
 import logging
+import threading
 
 import suds
+from django.core.cache import cache
+from suds.cache import Cache, ObjectCache
 from suds.client import Client
 
+from autoreduce_frontend.autoreduce_webapp.circuit_breaker import make_breaker
+from autoreduce_frontend.autoreduce_webapp.memory_cache import MemoryCache
 # Below is a template on the repository
-from autoreduce_frontend.autoreduce_webapp.settings import UOWS_URL
+from autoreduce_frontend.autoreduce_webapp.settings import (UOWS_SESSION_CACHE_LIFETIME, UOWS_URL, UOWS_WSDL_CACHE_DAYS,
+                                                            UOWS_WSDL_CACHE_DIR)
 
 LOGGER = logging.getLogger(__package__)
 
+# A WebFault is the UOWS answering, so only failures to reach it count against the breaker
+UOWS_BREAKER = make_breaker("UOWS", ignored=(suds.WebFault, ))
+
+
+class WSDLCache(Cache):
+    """
+    suds object cache holding parsed WSDL definitions in memory for this
+    process, in front of an ObjectCache on disk that is shared by every worker
+    process. Clients built with it share one parsed copy of each WSDL, in the
+    same way as clients made with suds' Client.clone (which fails with a
+    RecursionError on Python 3.11).
+    :param location: (str) The directory of the on-disk cache
+    :param days: (int) The number of days a parsed WSDL is reused for
+    """
+
+    def __init__(self, location: str, days: int):
+        self.memory = MemoryCache(max_size=16, lifetime=days * 24 * 60 * 60)
+        self.disk = ObjectCache(location=location, days=days)
+
+    def get(self, id):  # pylint: disable=redefined-builtin,invalid-name
+        obj = self.memory.get(id)
+        if obj is None:
+            obj = self.disk.get(id)
+            if obj is not None:
+                self.memory.set(id, obj)
+        return obj
+
+    def put(self, id, object):  # pylint: disable=redefined-builtin,invalid-name
+        self.memory.set(id, object)
+        self.disk.put(id, object)
+        return object
+
+    def purge(self, id):  # pylint: disable=redefined-builtin,invalid-name
+        self.memory.delete(id)
+        self.disk.purge(id)
+
+    def clear(self):
+        self.memory.clear()
+        self.disk.clear()
+
+
+WSDL_CACHE = WSDLCache(location=UOWS_WSDL_CACHE_DIR, days=UOWS_WSDL_CACHE_DAYS)
+# URLs whose WSDL has been loaded by this process. The first load of each is done under
+# WSDL_LOAD_LOCK so that concurrent requests at startup don't all download and parse it.
+WSDL_LOADED = set()
+WSDL_LOAD_LOCK = threading.Lock()
+
+
+def make_suds_client(url: str) -> Client:
+    """
+    Return a new suds Client for the WSDL at url. The parsed WSDL is shared
+    through WSDL_CACHE, so only the first client in each process reads it from
+    disk, and only the first on the host downloads and parses it.
+    """
+    if url in WSDL_LOADED:
+        return Client(url, cache=WSDL_CACHE, cachingpolicy=1)
+    with WSDL_LOAD_LOCK:
+        client = Client(url, cache=WSDL_CACHE, cachingpolicy=1)
+        WSDL_LOADED.add(url)
+    return client
+
+
+# Prefix of the keys in the shared Django cache marking the session IDs the UOWS has
+# recently said are valid. They are shared by every worker process, so logging out in
+# one process is seen by all of them. Only positive answers are kept, so a revoked
+# session is noticed within UOWS_SESSION_CACHE_LIFETIME.
+SESSION_KEY_PREFIX = "autoreduce_webapp.uows_session."
+
+
+def session_cache_key(session_id: str) -> str:
+    """ Return the shared cache key for a session ID, so the IDs themselves aren't stored in the cache. """
+    return SESSION_KEY_PREFIX + hashlib.sha256(str(session_id).encode()).hexdigest()
+
 
 class UOWSClient:
-    """A client for interacting with the User Office Web Service."""
+    """
+    A client for interacting with the User Office Web Service.
+
+    Every call goes through UOWS_BREAKER, so it fails fast with
+    CircuitOpenError while the UOWS is unreachable. The suds client is only
+    created when a call needs it.
+    """
 
     def __init__(self, **kwargs):
-        url = kwargs.get("URL", UOWS_URL)
-        self.client = Client(url)
+        self.url = kwargs.get("URL", UOWS_URL)
+        self._client = None
+
+    @property
+    def client(self) -> Client:
+        """ The suds client, created the first time it is used. """
+        if self._client is None:
+            self._client = UOWS_BREAKER.call(make_suds_client, self.url)
+        return self._client
 
     # Add the ability to use 'with'
     def __enter__(self):
@@ -31,12 +124,22 @@ class UOWSClient:
         pass
 
     def check_session(self, session_id):
-        """Check if a session ID is still active and valid."""
+        """
+        Check if a session ID is still active and valid. A valid session is
+        remembered in the shared Django cache, so the UOWS is only asked again
+        once UOWS_SESSION_CACHE_LIFETIME has passed.
+        """
+        key = session_cache_key(session_id)
+        if cache.get(key):
+            return True
         try:
-            return self.client.service.isTokenValid(session_id)
+            valid = UOWS_BREAKER.call(self.client.service.isTokenValid, session_id)
         except suds.WebFault:
             LOGGER.warning("Session ID is not valid: %s", session_id)
             return False
+        if valid:
+            cache.set(key, True, timeout=UOWS_SESSION_CACHE_LIFETIME)
+        return valid
 
     def get_person(self, session_id):
         """
@@ -46,7 +149,7 @@ class UOWSClient:
         returned.
         """
         try:
-            person = self.client.service.getPersonDetailsFromSessionId(session_id)
+            person = UOWS_BREAKER.call(self.client.service.getPersonDetailsFromSessionId, session_id)
             if person:
                 first_name = person.givenName
                 if not first_name:
@@ -69,7 +172,8 @@ class UOWSClient:
         Note:
             This doesn't kill the local session.
         """
+        cache.delete(session_cache_key(session_id))
         try:
-            self.client.service.logout(session_id)
+            UOWS_BREAKER.call(self.client.service.logout, session_id)
         except suds.WebFault:
             LOGGER.warning("Failed to logout Session ID %s", session_id)
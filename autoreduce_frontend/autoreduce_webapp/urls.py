@@ -11,7 +11,7 @@ from django.contrib import admin
 from django.urls import path, register_converter
 
 from autoreduce_frontend.reduction_viewer.views import (accessibility_statement, experiment_summary, graph, help, index,
-                                                        logout, overview, stats, search)
+                                                        logout, overview, stats, status, search)
 
 
 class NegativeIntConverter:
@@ -37,6 +37,7 @@ urlpatterns = [
     path('logout/', logout.logout, name='logout'),
     path('help/', help.help, name='help'),
     path('accessibility_statement/', accessibility_statement.accessibility_statement, name='accessibility_statement'),
+    path('status/', status.service_status, name='service_status'),
 
     # ===========================RUNS================================= #
     path('overview/', overview.overview, name='overview'),
@@ -7,6 +7,8 @@
 """Utility functions for the Django views."""
 # pylint:disable=no-member
 import logging
+from collections import namedtuple
+from functools import lru_cache
 
 from django.core.exceptions import PermissionDenied
 from django.http import HttpRequest
@@ -14,16 +16,21 @@ from django.shortcuts import redirect
 from django.shortcuts import render
 import httpagentparser
 
-from autoreduce_db.reduction_viewer.models import Notification
 from autoreduce_db.reduction_viewer.models import ReductionRun, Experiment
 from autoreduce_frontend.autoreduce_webapp.views import render_error
 from autoreduce_frontend.autoreduce_webapp.icat_cache import ICATCache, ICATConnectionException
+from autoreduce_frontend.autoreduce_webapp.notification_cache import NOTIFICATION_CACHE
 # Below import is a template on the repository
 from autoreduce_frontend.autoreduce_webapp.settings import (DEVELOPMENT_MODE, LOGIN_URL, OUTDATED_BROWSERS,
-                                                            UOWS_LOGIN_URL, USER_ACCESS_CHECKS)
+                                                            UOWS_LOGIN_URL, USER_ACCESS_CHECKS, USER_AGENT_CACHE_SIZE)
 
 LOGGER = logging.getLogger(__package__)
 
+# The not accepted browsers from the settings, as (family, newest outdated version) pairs
+BAD_BROWSERS = tuple(OUTDATED_BROWSERS.items())
+
+BrowserCheck = namedtuple("BrowserCheck", ["family", "version", "outdated"])
+
 
 def has_valid_login(request):
     """
@@ -95,10 +102,39 @@ def require_admin(func):
 
 def get_notifications(request):
     """Gets the notifications that the user should be able to see."""
-    if request.user.is_staff and request.user.is_authenticated:
-        return Notification.objects.filter(is_active=True)
-    else:
-        return Notification.objects.filter(is_active=True, is_staff_only=False)
+    return NOTIFICATION_CACHE.get(staff=request.user.is_staff and request.user.is_authenticated)
+
+
+@lru_cache(maxsize=USER_AGENT_CACHE_SIZE)
+def check_browser(user_agent: str) -> BrowserCheck:
+    """
+    Work out the browser family and major version from a User-Agent string, and
+    whether it is one of the outdated browsers in the settings. Users send few
+    distinct User-Agents, so results are memoized.
+
+    Args:
+        user_agent: The User-Agent header sent with the request.
+
+    Returns:
+        The browser family, its major version, and whether it is outdated.
+    """
+    browser = httpagentparser.detect(user_agent).get("browser", {})
+    family = browser.get("name") or ""
+
+    # Make sure we are only comparing against a single integer
+    try:
+        version = int((browser.get("version") or "0").split('.')[0])
+    except ValueError:
+        version = 0
+
+    # Check whether the browser is outdated
+    outdated = any(family == bad_family and version <= bad_version for bad_family, bad_version in BAD_BROWSERS)
+
+    # Change to more user-friendly language
+    if family == "IE":
+        family = "Microsoft Internet Explorer"
+
+    return BrowserCheck(family, version, outdated)
 
 
 def render_with(template):
@@ -121,36 +157,11 @@ def render_with(template):
                 output['notifications'].extend(notifications)
 
             if 'bad_browsers' not in output:
-                # Load in the list of not accepted browsers from the settings
-                bad_browsers = []
-                for browser, version in OUTDATED_BROWSERS.items():
-                    bad_browsers.append((browser, version))
-
-                # Get the family and version from the user_agent
-                data = httpagentparser.detect(request.META.get('HTTP_USER_AGENT', ''))
-                family = data["browser"]["name"]
-                version = data["browser"]["version"]
-
-                # Make sure we are only comparing against a single integer
-                if '.' in version:
-                    version = int(version[0:(version.index('.'))])
-                else:
-                    version = int(version)
-
-                # Check whether the browser is outdated
-                outdated = False
-                for browser in bad_browsers:
-                    if browser[0] == family and version <= browser[1]:
-                        outdated = True
-
-                # Change to more user-friendly language
-                if family == "IE":
-                    family = "Microsoft Internet Explorer"
-
-                output['bad_browsers'] = bad_browsers
-                output['current_browser'] = family
-                output['version'] = version
-                output['outdated'] = outdated
+                browser = check_browser(request.META.get('HTTP_USER_AGENT', ''))
+                output['bad_browsers'] = BAD_BROWSERS
+                output['current_browser'] = browser.family
+                output['version'] = browser.version
+                output['outdated'] = browser.outdated
 
             return output
 
@@ -248,7 +259,7 @@ def check_icat_permissions(request: HttpRequest,
             # Check access to a valid instrument (able to view some runs etc.)
             if viewed_instrument_name is not None \
                     and viewed_instrument_name not in \
-                    owned_instrument_list + valid_instrument_list:
+                    owned_instrument_list | valid_instrument_list:
                 raise PermissionDenied()  # No access allowed
 
         # Check for access to the experiment; if the user owns one of the
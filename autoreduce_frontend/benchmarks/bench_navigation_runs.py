@@ -0,0 +1,88 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Benchmark finding the next, previous, newest and oldest runs for the run
+summary page on an instrument with many runs, with a query for each as
+get_navigation_runs used to, and with its single query.
+
+The runs are created in a throwaway test database, made the same way as the
+one the tests use.
+
+Run with: python -m autoreduce_frontend.benchmarks.bench_navigation_runs
+"""
+import argparse
+import os
+import timeit
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "autoreduce_frontend.autoreduce_webapp.settings")
+django.setup()
+
+# pylint:disable=wrong-import-position,no-member
+from django.db import connection
+from django.test.utils import setup_test_environment
+
+from autoreduce_db.reduction_viewer.models import (Experiment, Instrument, ReductionArguments, ReductionRun,
+                                                   ReductionScript, RunNumber, Status)
+from autoreduce_frontend.reduction_viewer.view_utils import get_navigation_runs, order_runs
+
+FIRST_RUN_NUMBER = 100000
+
+
+def query_per_run(instrument_name: str, run: ReductionRun, page_type: str) -> tuple:
+    """ Find the navigation runs with a query for each, as get_navigation_runs used to. """
+    runs = order_runs(page_type, ReductionRun.objects.filter(instrument__name=instrument_name, batch_run=run.batch_run))
+    next_run = runs.filter(run_numbers__run_number__gt=run.run_number).last()
+    previous_run = runs.filter(run_numbers__run_number__lt=run.run_number).first()
+    return next_run or run, previous_run or run, runs.first(), runs.last()
+
+
+def create_runs(count: int, batch_size: int = 10000):
+    """ Create count runs on one instrument, each with its own run number. """
+    instrument = Instrument.objects.create(name="BENCHINSTRUMENT")
+    experiment = Experiment.objects.create(reference_number=1234567)
+    script = ReductionScript.objects.create(text="")
+    arguments = ReductionArguments.objects.create(raw="{}", instrument=instrument)
+    status = Status.objects.create(value="c")
+    for start in range(0, count, batch_size):
+        runs = ReductionRun.objects.bulk_create(
+            ReductionRun(run_version=0,
+                         instrument=instrument,
+                         experiment=experiment,
+                         script=script,
+                         arguments=arguments,
+                         status=status) for _ in range(start, min(start + batch_size, count)))
+        RunNumber.objects.bulk_create(
+            RunNumber(reduction_run=run, run_number=FIRST_RUN_NUMBER + start + index) for index, run in enumerate(runs))
+
+
+def main():
+    """ Time each way of finding the navigation runs for a run in the middle and print the mean per page. """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=500000, help="Runs to create on the instrument")
+    parser.add_argument("--number", type=int, default=5, help="Pages to time for each measurement")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        create_runs(args.runs)
+        run = ReductionRun.objects.get(run_numbers__run_number=FIRST_RUN_NUMBER + args.runs // 2)
+        for page_type in ("-run_number", "-created"):
+            for function in (query_per_run, get_navigation_runs):
+                assert function("BENCHINSTRUMENT", run, page_type) == query_per_run("BENCHINSTRUMENT", run, page_type)
+                seconds = timeit.timeit(
+                    lambda function=function, page_type=page_type: function("BENCHINSTRUMENT", run, page_type),
+                    number=args.number) / args.number
+                print(f"{function.__name__:<20} sort={page_type:<12} {seconds * 1000:10.2f} ms per page")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
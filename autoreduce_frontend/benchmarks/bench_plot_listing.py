@@ -0,0 +1,81 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Benchmark finding the plot files of a run in a large reduction directory:
+with os.listdir and a regex rebuilt for every file name, as PlotHandler used
+to, with os.scandir and a compiled pattern, and from the listing cache.
+
+The directory is generated in a temporary directory, with a few plot files
+named after the run's data file among many files of other runs.
+
+Run with: python -m autoreduce_frontend.benchmarks.bench_plot_listing
+"""
+import argparse
+import os
+import re
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+from autoreduce_frontend.plotting.plot_handler import PLOT_LISTING_CACHE, PlotHandler
+
+DATA_FILEPATH = "/archive/NDXMARI/Instrument/data/cycle_22_1/MARI1234.nxs"
+EXTENSIONS = ("nxs", "log", "png", "json", "txt")
+
+
+def make_reduction_dir(directory: str, files: int) -> None:
+    """
+    Fill directory with that many empty files named like the output of many
+    reductions, of which four are plots of the benchmarked run.
+    """
+    for index in range(files - 4):
+        Path(directory, f"MARI{index + 2000:06d}_output.{EXTENSIONS[index % len(EXTENSIONS)]}").touch()
+    for name in ("MARI1234_1.png", "MARI1234_2.png", "MARI1234_plot.json", "MARI1234_3.png"):
+        Path(directory, name).touch()
+    # Make the directory old enough for its listing to be cached
+    modified = time.time() - 60
+    os.utime(directory, (modified, modified))
+
+
+def listdir_and_rebuilt_regex(plot_handler: PlotHandler) -> list:
+    """ Find the plot files the way _check_for_plot_files did before the listing cache. """
+    file_regex = f"{plot_handler.data_filename}.*.({'|'.join(plot_handler.file_extensions)})"
+    if os.path.exists(plot_handler.server_dir):
+        return [name for name in os.listdir(plot_handler.server_dir) if re.match(file_regex, name) is not None]
+    return []
+
+
+def scandir_and_compiled_pattern(plot_handler: PlotHandler) -> list:
+    """ Find the plot files with an empty listing cache. """
+    PLOT_LISTING_CACHE.clear()
+    return plot_handler._check_for_plot_files()  # pylint:disable=protected-access
+
+
+def listing_cache(plot_handler: PlotHandler) -> list:
+    """ Find the plot files when the directory's listing is already cached. """
+    return plot_handler._check_for_plot_files()  # pylint:disable=protected-access
+
+
+def main():
+    """ Time each way of finding the plot files and print the mean per lookup. """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=20000, help="Files in the generated reduction directory")
+    parser.add_argument("--number", type=int, default=20, help="Lookups for each measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        make_reduction_dir(directory, args.files)
+        plot_handler = PlotHandler(data_filepath=DATA_FILEPATH, server_dir=directory)
+        for find in (listdir_and_rebuilt_regex, scandir_and_compiled_pattern, listing_cache):
+            assert len(find(plot_handler)) == 4
+            seconds = timeit.timeit(lambda find=find: find(plot_handler), number=args.number) / args.number
+            print(f"{find.__name__:<28} {args.files} files {seconds * 1000:8.3f} ms per lookup")
+
+
+if __name__ == "__main__":
+    main()
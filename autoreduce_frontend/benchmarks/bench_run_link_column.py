@@ -0,0 +1,81 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Benchmark rendering a ReductionRunTable with the run number linked through the
+old per-cell TemplateColumn and through RunLinkColumn, at a range of page
+sizes. The runs are stand-ins held in memory so that no database time is
+included.
+
+Run with: python -m autoreduce_frontend.benchmarks.bench_run_link_column
+"""
+import argparse
+import datetime
+import os
+import timeit
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "autoreduce_frontend.autoreduce_webapp.settings")
+django.setup()
+
+# pylint:disable=wrong-import-position
+import django_tables2 as tables
+from django.test import RequestFactory
+
+from autoreduce_frontend.reduction_viewer.tables import ReductionRunTable
+
+
+class TemplateColumnRunTable(ReductionRunTable):
+    """ ReductionRunTable with the run number column it had before RunLinkColumn. """
+    run_number = tables.TemplateColumn(
+        """{% load generate_run_link %} <a href="{% generate_run_link record.instrument record %}?
+cursor={{ cursor }}&per_page={{ per_page }}&sort={{ sort }}&filter={{ filtering }}">
+{{ record.title }}</a>""",
+        attrs={"td": {
+            "class": "run-num-links"
+        }},
+        accessor="run_numbers__run_number")
+
+
+class FakeRun:
+    """ The fields of a ReductionRun the table reads, without a database row behind it. """
+
+    def __init__(self, run_number: int):
+        self.pk = run_number  # pylint:disable=invalid-name
+        self.run_number = run_number
+        self.run_version = 0
+        self.batch_run = False
+        self.instrument = "TESTINSTRUMENT"
+        self.status = "Completed"
+        self.created = datetime.datetime(2022, 1, 1)
+
+    def title(self):
+        """ Return the run's title, as ReductionRun.title does. """
+        return f"{self.run_number} - run title"
+
+
+def main():
+    """ Time rendering each table at each page size and print the mean per render. """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=20, help="Renders for each measurement")
+    args = parser.parse_args()
+
+    request = RequestFactory().get("/runs/TESTINSTRUMENT/")
+    for rows in (10, 100, 500):
+        runs = [FakeRun(run_number) for run_number in range(100000, 100000 + rows)]
+        for table_class in (TemplateColumnRunTable, ReductionRunTable):
+
+            def render(table_class=table_class, runs=runs):
+                return table_class(runs).as_html(request)
+
+            render()
+            seconds = timeit.timeit(render, number=args.number) / args.number
+            print(f"{table_class.__name__:<24} {rows:>4} rows {seconds * 1000:8.2f} ms per table")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Benchmark the cost of creating the suds client behind a UOWSClient, with and
+without the shared WSDL cache, against the local copy of the UOWS WSDL in
+test_files so that network time is not included.
+
+Run with: python -m autoreduce_frontend.benchmarks.bench_uows_client
+"""
+import argparse
+import tempfile
+import timeit
+from pathlib import Path
+
+from suds.cache import NoCache, ObjectCache
+from suds.client import Client
+
+from autoreduce_frontend.autoreduce_webapp.settings import BASE_DIR
+from autoreduce_frontend.autoreduce_webapp import uows_client
+
+WSDL_URL = Path(BASE_DIR, "test_files", "uows", "UserOfficeWebService.wsdl").resolve().as_uri()
+
+
+def main():
+    """ Time each way of building a client and print the mean per client. """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=200, help="Clients to build for each measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        uows_client.WSDL_CACHE = uows_client.WSDLCache(location=cache_dir, days=1)
+        document_cache = ObjectCache(location=cache_dir, days=1)
+        cases = {
+            "no cache (parse every time)": lambda: Client(WSDL_URL, cache=NoCache()),
+            "suds default (cached XML, parse every time)": lambda: Client(WSDL_URL, cache=document_cache),
+            "make_suds_client (shared parsed WSDL)": lambda: uows_client.make_suds_client(WSDL_URL),
+        }
+        for name, build in cases.items():
+            build()
+            seconds = timeit.timeit(build, number=args.number) / args.number
+            print(f"{name:<45} {seconds * 1000:8.3f} ms per client")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,14 +13,31 @@ Instructing the Plotting factory to build an IFrame based on the above
 """
 import logging
 import os
-import traceback
 import re
-import shutil
-from typing import List, Optional, Tuple
-from autoreduce_frontend.autoreduce_webapp.settings import STATIC_ROOT
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Pattern, Tuple
+
+from django.urls import reverse
+
+from autoreduce_frontend.autoreduce_webapp.memory_cache import MemoryCache
+from autoreduce_frontend.autoreduce_webapp.settings import PLOT_LISTING_CACHE_LIFETIME, PLOT_LISTING_CACHE_SIZE
 
 LOGGER = logging.getLogger(__package__)
 
+# The plot files found in each reduction directory, with the directory's modification time when it was listed
+PLOT_LISTING_CACHE = MemoryCache(PLOT_LISTING_CACHE_SIZE, PLOT_LISTING_CACHE_LIFETIME)
+# A directory modified more recently than this many nanoseconds ago might still change
+# without its modification time changing, on filesystems that only store it to the second
+RECENTLY_MODIFIED_NS = 2_000_000_000
+
+
+@lru_cache(maxsize=256)
+def compile_plot_pattern(regex: str) -> Pattern:
+    """ Compile a plot file name regex once for every PlotHandler that uses it. """
+    return re.compile(regex)
+
 
 class PlotHandler:
     """
@@ -28,17 +45,17 @@ class PlotHandler:
     :param data_filepath: (str) The full path to the input data
     :param server_dir: (str) The path for the directory to search for the data/image files
     :param rb_number: (str)The ISIS RB number.
+    :param run_id: (int) The primary key of the run, which the URLs of its plots are made from
     """
 
-    def __init__(self, data_filepath: str, server_dir: str, rb_number: str = None):
+    def __init__(self, data_filepath: str, server_dir: str, rb_number: str = None, run_id: int = None):
         self.data_filename: str = self._get_only_data_file_name(data_filepath)
         # Used when searching for full Experiment graph. TODO: not actually used right now
         self.rb_number = rb_number
         # this is a path somewhere on CEPH
         self.server_dir = server_dir
+        self.run_id = run_id
         self.file_extensions = ["png", "jpg", "bmp", "gif", "tiff", "json"]
-        # Directory to place fetched data files / images
-        self.static_graph_dir = os.path.join(STATIC_ROOT, 'graphs')
 
     @staticmethod
     def _get_only_data_file_name(data_filepath: str) -> str:
@@ -62,67 +79,76 @@ class PlotHandler:
         Regular expression used for looking for plot files.
         This assumes that the file names follow the convention:
         <data_file_name>*<.png or other extension>
+        It is matched against the whole file name.
         """
         _file_extension_regex = self._generate_file_extension_regex()
-        return f'{self.data_filename}{_file_extension_regex}'
+        return f'{re.escape(self.data_filename)}.*{_file_extension_regex}'
 
     def _generate_file_extension_regex(self) -> str:
         """
         Generates the file extension part of the file regex. For example if the file extensions were
-        .png, .gif and .jpg: The returned value would be (png|gif|jpg)
+        .png, .gif and .jpg: The returned value would be \\.(png|gif|jpg)
         :return: (str) expression pattern matching the file extensions of the plot handler
         """
-        return f".*.({','.join(self.file_extensions).replace(',', '|')})"
+        return f"\\.({'|'.join(self.file_extensions)})"
 
-    def _check_for_plot_files(self):
+    def _check_for_plot_files(self) -> List[str]:
         """
         Searches the server directory for existing plot files using the directory specified.
+        The matches are cached until the directory's modification time changes, which it
+        does whenever a file is added to, removed from or renamed in it.
         :return: (list) files on the server path that match regex
         """
-        if os.path.exists(self.server_dir):
-            file_regex = self._generate_file_name_regex()
-
-            filenames = os.listdir(self.server_dir)
-            matches = []
-
-            for name in filenames:
-                if re.match(file_regex, name) is not None:
-                    matches.append(name)
-
-            return matches
-        return []
+        try:
+            modified = Path(self.server_dir).stat().st_mtime_ns
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+
+        file_regex = self._generate_file_name_regex()
+        key = (self.server_dir, file_regex)
+        cached = PLOT_LISTING_CACHE.get(key)
+        if cached is not None and cached[0] == modified:
+            return list(cached[1])
+
+        pattern = compile_plot_pattern(file_regex)
+        with os.scandir(self.server_dir) as entries:
+            # The name is checked first so that only the matches might need a stat to tell if they're files
+            matches = [entry.name for entry in entries if pattern.fullmatch(entry.name) and entry.is_file()]
+
+        if time.time_ns() - modified > RECENTLY_MODIFIED_NS:
+            PLOT_LISTING_CACHE.set(key, (modified, tuple(matches)))
+        return matches
+
+    def get_plot_path(self, plot_name: str) -> Optional[str]:
+        """
+        Returns the path on the server of one of the run's plot files. Only the names
+        of files found in the server directory are accepted, so plot_name can't be
+        used to reach any other file.
+        :param plot_name: (str) The name of the plot file
+        :return: (str) The path of the plot file OR None if it isn't one of the run's plots
+        """
+        if plot_name in self._check_for_plot_files():
+            return f"{self.server_dir}/{plot_name}"
+        return None
 
-    def _ensure_staticfiles_graphs_exists(self):
-        if not os.path.exists(self.static_graph_dir):
-            os.makedirs(self.static_graph_dir, exist_ok=True)
+    def get_plot_url(self, plot_name: str) -> str:
+        """
+        Returns the URL that the plot file is served from, straight out of the server directory.
+        :param plot_name: (str) The name of the plot file
+        """
+        return reverse("runs:plot", kwargs={"run_id": self.run_id, "plot_name": plot_name})
 
     def get_plot_file(self) -> Tuple[Optional[List[str]], Optional[List[str]]]:
         """
-        Searches for and retrieves a plot file from CEPH.
-        Might find multiple files (e.g. if more than one plot_type is specified),
-        but will only copy over one.
-        :return: (str) local path to downloaded files OR None if no files found
+        Searches for plot files on CEPH.
+        Might find multiple files (e.g. if more than one plot_type is specified).
+        The files aren't copied anywhere: the URLs point at the view that serves them from CEPH.
+        :return: (tuple) URLs of the files and their paths on the server OR (None, None) if no files found
         """
         _existing_plot_files = self._check_for_plot_files()
-        self._ensure_staticfiles_graphs_exists()
-        local_plot_paths = []
-        server_paths = []
         if _existing_plot_files:
-            for plot_file in _existing_plot_files:
-                _server_path = f"{self.server_dir}/{plot_file}"
-                _local_path = os.path.join(self.static_graph_dir, plot_file)
-
-                try:
-                    shutil.copy(_server_path, _local_path)
-                    LOGGER.info('File \'%s\' found and saved to %s', _server_path, _local_path)
-                    # URL to retrieve the static assert from the static dir - only if succesful
-                    local_plot_paths.append(f'/static/graphs/{plot_file}')
-                    server_paths.append(_server_path)
-                except FileNotFoundError:
-                    LOGGER.error("File \'%s\' does not exist. Error: %s", _server_path, traceback.format_exc())
-                except PermissionError:
-                    LOGGER.error("Insufficient permissions to read \'%s\'. Error: %s", _server_path,
-                                 traceback.format_exc())
-            return local_plot_paths, server_paths
+            plot_urls = [self.get_plot_url(plot_file) for plot_file in _existing_plot_files]
+            server_paths = [f"{self.server_dir}/{plot_file}" for plot_file in _existing_plot_files]
+            return plot_urls, server_paths
         # No files found
         return (None, None)
@@ -12,12 +12,14 @@ construction of regular expression for looking up existing files
 calling the SFTPClient with correct parameters
 """
 import os
-import shutil
+import tempfile
+import time
 import unittest
+from pathlib import Path
 from unittest.mock import Mock, patch
 from parameterized import parameterized
 
-from autoreduce_frontend.plotting.plot_handler import PlotHandler
+from autoreduce_frontend.plotting.plot_handler import PLOT_LISTING_CACHE, PlotHandler
 
 
 # pylint:disable=line-too-long, protected-access
@@ -30,20 +32,23 @@ class TestPlotHandler(unittest.TestCase):
         """
         Create a few test PlotHandler objects
         """
-        self.expected_file_extension_regex = '(png|jpg|bmp|gif|tiff|json)'
+        PLOT_LISTING_CACHE.clear()
+        self.expected_file_extension_regex = r'\.(png|jpg|bmp|gif|tiff|json)'
         self.expected_wish_data_filename = "WISH1234"
-        self.expected_wish_file_regex = f"{self.expected_wish_data_filename}.*.{self.expected_file_extension_regex}"
+        self.expected_wish_file_regex = f"{self.expected_wish_data_filename}.*{self.expected_file_extension_regex}"
 
         self.expected_mari_data_filename = "MARI1234"
-        self.expected_mari_file_regex = f'{self.expected_mari_data_filename}.*.{self.expected_file_extension_regex}'
+        self.expected_mari_file_regex = f'{self.expected_mari_data_filename}.*{self.expected_file_extension_regex}'
         self.input_data_filepath = "\\\\isis\\inst$\\NDXMARI\\Instrument\\data\\cycle_test\\MARI1234.nxs"
         self.mari_base = "/instrument/MARI/RBNumber/RB12345678/1234"
         self.expected_mari_rb_number = 12345678
         self.expected_mari_rb_folder = f"{self.mari_base}/autoreduced"
+        self.run_id = 42
 
         self.test_plot_handler = PlotHandler(data_filepath=self.input_data_filepath,
                                              server_dir=self.expected_mari_rb_folder,
-                                             rb_number=self.expected_mari_rb_number)
+                                             rb_number=self.expected_mari_rb_number,
+                                             run_id=self.run_id)
 
     def test_init(self):
         """
@@ -84,68 +89,58 @@ class TestPlotHandler(unittest.TestCase):
         Test: Correct file extension pattern is generated
         When: _generate_file_extension_pattern() is called
         """
-        expected_pattern = '.*.(png|jpg|bmp|gif|tiff|json)'
+        expected_pattern = r'\.(png|jpg|bmp|gif|tiff|json)'
         actual_pattern = self.test_plot_handler._generate_file_extension_regex()
         self.assertEqual(expected_pattern, actual_pattern)
 
-    @patch('autoreduce_frontend.plotting.plot_handler.os')
-    def test_check_for_plot_files_path_exists(self, mock_os):
+    def test_check_for_plot_files_path_exists(self):
         """
-        Test: sftpclient.get_filenames is called with the correct parameters if only one plot_type is used
-        When: sftpclient.get_filenames is used to look for existing plot files
+        Test: Only the files named after the data file with a plot extension are found
+        When: The server directory holds plots and other files
         """
-        mock_os.path.exists.return_value = True
-        mock_os.listdir.return_value = [
-            "MARI1234_sometext_1.png", "MARI1234_sometext_2.png", "MARI1234_json_file_2.json", "MARI1234.nxs",
-            "MARI1234_sometext.nxs"
-        ]
-
-        # check that only the valid matches have been found
-        assert mock_os.listdir.return_value[0:3] == self.test_plot_handler._check_for_plot_files()
+        plot_files = ["MARI1234_sometext_1.png", "MARI1234_sometext_2.png", "MARI1234_json_file_2.json"]
+        other_files = ["MARI1234.nxs", "MARI1234_sometext.nxs", "MARI1234_sometext.png.bak", "WISH1234_1.png"]
+        with tempfile.TemporaryDirectory() as server_dir:
+            for name in plot_files + other_files:
+                Path(server_dir, name).touch()
+            Path(server_dir, "MARI1234_directory.png").mkdir()
+            self.test_plot_handler.server_dir = server_dir
+            assert sorted(self.test_plot_handler._check_for_plot_files()) == sorted(plot_files)
 
-    @patch('autoreduce_frontend.plotting.plot_handler.os')
-    def test_check_for_plot_files_path_doesnt_exist(self, mock_os):
+    def test_check_for_plot_files_path_doesnt_exist(self):
         """
-        Test: sftpclient.get_filenames is called with the correct parameters if only one plot_type is used
-        When: sftpclient.get_filenames is used to look for existing plot files
+        Test: No files are found
+        When: The server directory doesn't exist
         """
-        mock_os.path.exists.return_value = False
-        # check that only the valid matches have been found
         assert not self.test_plot_handler._check_for_plot_files()
 
     @patch('autoreduce_frontend.plotting.plot_handler.PlotHandler._check_for_plot_files')
-    @patch('autoreduce_frontend.plotting.plot_handler.shutil.copy')
-    def test_get_plot_files(self, mock_copy: Mock, mock_find_files):
+    def test_get_plot_files(self, mock_find_files):
         """
-        Test: get_plot_files returns the expected plot files
-        When: called with valid arguments and files exist on server and none exist locally
+        Test: get_plot_files returns the URL of the plot file and its path on the server
+        When: called with valid arguments and files exist on server
         """
         expected_files = ['expected.png']
         mock_find_files.return_value = expected_files
-        expected_local = os.path.join(self.test_plot_handler.static_graph_dir, expected_files[0])
-        expected_server = os.path.join(self.expected_mari_rb_folder, expected_files[0])
 
         actual_path, server_path = self.test_plot_handler.get_plot_file()
-        mock_copy.assert_called_once_with(expected_server, expected_local)
-        self.assertEqual([f'/static/graphs/{expected_files[0]}'], actual_path)
-
-        self.assertTrue(server_path[0].endswith(expected_files[0]))
+        self.assertEqual([f'/runs/plot/{self.run_id}/{expected_files[0]}'], actual_path)
+        self.assertEqual([f'{self.expected_mari_rb_folder}/{expected_files[0]}'], server_path)
 
     @patch('autoreduce_frontend.plotting.plot_handler.PlotHandler._check_for_plot_files')
-    @patch('autoreduce_frontend.plotting.plot_handler.shutil.copy')
-    def test_get_plot_files_multiple(self, mock_copy: Mock, mock_find_files):
+    def test_get_plot_files_multiple(self, mock_find_files):
         """
         Test: Multiple file paths are returned as a list
-        When: Multiple image files exist on the server relating to the same run and none exist
-        locally
+        When: Multiple image files exist on the server relating to the same run
         """
         expected_files = ['expected_1.png', 'expected_2.png']
         mock_find_files.return_value = expected_files
 
-        expected_paths = [f'/static/graphs/{expected_files[0]}', f'/static/graphs/{expected_files[1]}']
+        expected_paths = [
+            f'/runs/plot/{self.run_id}/{expected_files[0]}', f'/runs/plot/{self.run_id}/{expected_files[1]}'
+        ]
 
         actual_paths, server_paths = self.test_plot_handler.get_plot_file()
-        self.assertEqual(mock_copy.call_count, len(expected_files))
         self.assertEqual(expected_paths, actual_paths)
 
         for i, expected in enumerate(expected_files):
@@ -155,50 +150,77 @@ class TestPlotHandler(unittest.TestCase):
     def test_get_plot_file_none_found(self, mock_cfpl: Mock):
         """
         Test: None is returned
-        When: No files can be found on the server or locally
+        When: No files can be found on the server
         """
         local, server = self.test_plot_handler.get_plot_file()
         assert local is None
         assert server is None
         mock_cfpl.assert_called_once()
 
-    @parameterized.expand([[FileNotFoundError, "does not exist"], [PermissionError, "Insufficient permissions"]])
-    @patch('autoreduce_frontend.plotting.plot_handler.LOGGER')
-    @patch('autoreduce_frontend.plotting.plot_handler.PlotHandler._check_for_plot_files')
-    @patch('autoreduce_frontend.plotting.plot_handler.shutil.copy')
-    def test_get_plot_files_exception_raised(
-        self,
-        exc_type: Exception,
-        expected_log_message: str,
-        mock_copy: Mock,
-        mock_find_files,
-        mock_logger,
-    ):
-        """
-        Test: get_plot_files returns the expected plot files
-        When: called with valid arguments and files exist on server and not locally
+    @parameterized.expand([["MARI1234_plot.png", True], ["MARI1234.nxs", False], ["../MARI1234_plot.png", False],
+                           ["other.png", False]])
+    @patch('autoreduce_frontend.plotting.plot_handler.PlotHandler._check_for_plot_files',
+           return_value=["MARI1234_plot.png"])
+    def test_get_plot_path(self, plot_name: str, found: bool, _):
         """
-        expected_files = ['expected.png']
-        mock_find_files.return_value = expected_files
-        mock_copy.side_effect = exc_type
-        local, server = self.test_plot_handler.get_plot_file()
-        assert not local
-        assert not server
-        mock_logger.error.assert_called_once()
-        assert expected_log_message in mock_logger.error.call_args[0][0]
-        assert self.mari_base in mock_logger.error.call_args[0][1]
-
-    def test_ensure_staticfiles_graphs_exists(self):
-        """
-        Test that the plot handler makes the subfolders necessary for copying to succeed.
-        """
-        self.test_plot_handler.static_graph_dir = "/tmp/test_static_graph_dir/"
-        try:
-            assert not os.path.exists(self.test_plot_handler.static_graph_dir)
-            self.test_plot_handler._ensure_staticfiles_graphs_exists()
-            assert os.path.exists(self.test_plot_handler.static_graph_dir)
-        finally:
-            shutil.rmtree(self.test_plot_handler.static_graph_dir, ignore_errors=True)
+        Test: Only the names of the plot files found on the server give a path
+        When: get_plot_path is called with a plot name
+        """
+        path = self.test_plot_handler.get_plot_path(plot_name)
+        if found:
+            assert path == f"{self.expected_mari_rb_folder}/{plot_name}"
+        else:
+            assert path is None
+
+
+class TestPlotListingCache(unittest.TestCase):
+    """
+    Test caching the plot files found in a reduction directory
+    """
+
+    def setUp(self):
+        PLOT_LISTING_CACHE.clear()
+        self.directory = tempfile.TemporaryDirectory()  # pylint:disable=consider-using-with
+        self.server_dir = self.directory.name
+        Path(self.server_dir, "MARI1234_1.png").touch()
+        self.set_directory_modified(time.time() - 60)
+        self.plot_handler = PlotHandler(data_filepath="/data/MARI1234.nxs", server_dir=self.server_dir)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def set_directory_modified(self, modified: float):
+        """ Set the modification time of the server directory. """
+        os.utime(self.server_dir, (modified, modified))
+
+    def test_unchanged_directory_not_listed_again(self):
+        """
+        Test: The directory is only listed once
+        When: Its plot files are looked for twice and it hasn't changed
+        """
+        assert self.plot_handler._check_for_plot_files() == ["MARI1234_1.png"]
+        with patch('autoreduce_frontend.plotting.plot_handler.os.scandir') as scandir:
+            assert self.plot_handler._check_for_plot_files() == ["MARI1234_1.png"]
+        scandir.assert_not_called()
+
+    def test_changed_directory_listed_again(self):
+        """
+        Test: The new plot file is found
+        When: A plot file is added to the directory after it was listed
+        """
+        self.plot_handler._check_for_plot_files()
+        Path(self.server_dir, "MARI1234_2.png").touch()
+        self.set_directory_modified(time.time() - 30)
+        assert sorted(self.plot_handler._check_for_plot_files()) == ["MARI1234_1.png", "MARI1234_2.png"]
+
+    def test_recently_modified_directory_not_cached(self):
+        """
+        Test: The directory is listed every time
+        When: It was modified too recently for its modification time to be relied on
+        """
+        self.set_directory_modified(time.time())
+        self.plot_handler._check_for_plot_files()
+        assert PLOT_LISTING_CACHE.stats()["size"] == 0
 
 
 if __name__ == '__main__':
@@ -0,0 +1,237 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Keyset (cursor) pagination for the run tables.
+
+Instead of OFFSET/LIMIT and a COUNT(*) of every matching row, a page is found
+by seeking past the ordering values of the last row on the previous page, so
+fetching a deep page costs the same as fetching the first one.
+"""
+import base64
+import binascii
+import datetime
+import json
+from typing import List, NamedTuple, Optional
+
+from django.db.models import F, Q, QuerySet
+from django.db.models.expressions import OrderBy
+from django.http import HttpRequest
+from django.utils.functional import cached_property
+from django_tables2 import RequestConfig, Table
+from django_tables2.rows import BoundRow
+
+CURSOR_FIELD = "cursor"
+NEXT = "n"
+PREVIOUS = "p"
+TEMPLATE_NAME = "snippets/keyset_table.html"
+
+
+class OrderingTerm(NamedTuple):
+    """ A field the queryset is ordered by, and whether it's in descending order. """
+    name: str
+    descending: bool
+
+
+def _encode_value(value):
+    # JSON can't hold datetimes, and DjangoJSONEncoder drops their microseconds
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+
+class KeysetPage:
+    """
+    One page of rows from a KeysetPaginator, with the cursors that link to
+    the pages either side of it.
+    """
+
+    def __init__(self, paginator: "KeysetPaginator", records: list, has_previous: bool, has_next: bool):
+        self.paginator = paginator
+        self.records = records
+        self.has_previous = has_previous
+        self.has_next = has_next
+        self.cursor_field = paginator.cursor_field
+
+    @cached_property
+    def object_list(self) -> List[BoundRow]:
+        """ The rows of the page, bound to the table for rendering. """
+        return [BoundRow(record, table=self.paginator.rows.table) for record in self.records]
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def previous_cursor(self) -> Optional[str]:
+        """ The cursor of the page before this one. """
+        if not self.has_previous:
+            return None
+        return self.paginator.encode_cursor(PREVIOUS, self.records[0])
+
+    @property
+    def next_cursor(self) -> Optional[str]:
+        """ The cursor of the page after this one. """
+        if not self.has_next:
+            return None
+        return self.paginator.encode_cursor(NEXT, self.records[-1])
+
+
+class KeysetPaginator:
+    """
+    Paginates the rows of a table backed by a QuerySet on the queryset's
+    ordering. A primary key term is added to the ordering if it doesn't have
+    one, so that every row has a unique position. Null values of an ordering
+    field are put after all the others, whichever way it's ordered, so that
+    the database orders them the same way as the seek filters expect.
+
+    Has the same signature as the paginators used by Table.paginate, except
+    that the "page" is a cursor string (or None for the first page), and the
+    total number of rows is only counted if something asks for it.
+
+    :param rows: (BoundRows) The rows of the table
+    :param per_page: (int) The number of rows on each page
+    :param cursor_field: (str) The name of the query parameter holding the cursor
+    """
+
+    def __init__(self, rows, per_page: int, cursor_field: str = CURSOR_FIELD):
+        queryset = rows.data.data
+        if not isinstance(queryset, QuerySet):
+            raise TypeError("KeysetPaginator can only paginate tables of QuerySets")
+        self.rows = rows
+        self.per_page = per_page
+        self.cursor_field = cursor_field
+        self.base_queryset = queryset
+        self.terms = self._ordering_terms(queryset)
+        self.keys = [f"_keyset_{index}" for index in range(len(self.terms))]
+        self.queryset = queryset.annotate(**{key: F(term.name)
+                                             for key, term in zip(self.keys, self.terms)}).order_by(*self._order_by())
+        # Included in each cursor so that one from a different sort order is ignored
+        self.signature = ",".join(f"{'-' if term.descending else ''}{term.name}" for term in self.terms)
+
+    @staticmethod
+    def _ordering_terms(queryset: QuerySet) -> List[OrderingTerm]:
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        terms = []
+        for field in ordering:
+            if not isinstance(field, str) or field == "?":
+                raise ValueError(f"Can't paginate by keyset on the ordering {field!r}")
+            terms.append(OrderingTerm(field.lstrip("-"), field.startswith("-")))
+        if not any(term.name in ("pk", queryset.model._meta.pk.name) for term in terms):
+            terms.append(OrderingTerm("pk", terms[-1].descending if terms else True))
+        return terms
+
+    def _order_by(self, reverse: bool = False) -> List[OrderBy]:
+        # Nulls are last in the page order, so first when the pages are walked backwards
+        order_by = []
+        for key, term in zip(self.keys, self.terms):
+            if term.descending != reverse:
+                order_by.append(F(key).desc(nulls_last=not reverse, nulls_first=reverse))
+            else:
+                order_by.append(F(key).asc(nulls_last=not reverse, nulls_first=reverse))
+        return order_by
+
+    @staticmethod
+    def _after(key: str, term: OrderingTerm, value, forward: bool) -> Q:
+        """
+        Return a filter for the rows whose value of key comes after (or, if not
+        forward, before) value in the page order, where nulls come last.
+        """
+        if value is None:
+            # Nothing comes after a null, and every other value comes before one
+            return Q(pk__in=[]) if forward else Q(**{f"{key}__isnull": False})
+        lookup = "lt" if term.descending == forward else "gt"
+        after = Q(**{f"{key}__{lookup}": value})
+        return after | Q(**{f"{key}__isnull": True}) if forward else after
+
+    def _seek(self, values: list, forward: bool) -> Q:
+        """
+        Return a filter for the rows after (or, if not forward, before) the row
+        whose ordering values are values.
+        """
+        seek = Q()
+        equal = Q()
+        for key, term, value in zip(self.keys, self.terms, values):
+            seek |= equal & self._after(key, term, value, forward)
+            equal &= Q(**{f"{key}__isnull": True}) if value is None else Q(**{key: value})
+        return seek
+
+    def encode_cursor(self, direction: str, record) -> str:
+        """ Return a cursor for the page in direction from record. """
+        values = [_encode_value(getattr(record, key)) for key in self.keys]
+        data = json.dumps([direction, self.signature, values], separators=(",", ":"))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor: Optional[str]):
+        """
+        Return the direction and ordering values held by cursor, or (None, None)
+        if it is missing, malformed or for a different ordering.
+        """
+        if not cursor:
+            return None, None
+        try:
+            data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            direction, signature, values = json.loads(data)
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+            return None, None
+        if (direction not in (NEXT, PREVIOUS) or signature != self.signature or not isinstance(values, list)
+                or len(values) != len(self.keys)):
+            return None, None
+        return direction, values
+
+    def page(self, cursor: Optional[str] = None) -> KeysetPage:
+        """ Return the page that cursor points at, or the first page if there is no valid cursor. """
+        direction, values = self.decode_cursor(cursor)
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, forward=direction == NEXT))
+        if direction == PREVIOUS:
+            queryset = queryset.order_by(*self._order_by(reverse=True))
+
+        # Fetch one extra row to find out if there is another page beyond this one
+        records = list(queryset[:self.per_page + 1])
+        has_more = len(records) > self.per_page
+        records = records[:self.per_page]
+
+        if direction == PREVIOUS:
+            records.reverse()
+            return KeysetPage(self, records, has_previous=has_more, has_next=True)
+        return KeysetPage(self, records, has_previous=values is not None, has_next=has_more)
+
+    @cached_property
+    def count(self) -> int:
+        """ The total number of rows. Only queried when it's used. """
+        return self.base_queryset.count()
+
+
+def configure_keyset(request: HttpRequest, table: Table, per_page: int = 10) -> Table:
+    """
+    Configure a table from the request in the same way as
+    RequestConfig(request, paginate={"per_page": per_page}).configure(table),
+    but paginating it with KeysetPaginator.
+
+    Args:
+        request: The original sent request.
+
+        table: A table of a QuerySet.
+
+        per_page: The number of rows on each page, if the request doesn't give one.
+
+    Return:
+        The table.
+    """
+    # Apply the ordering selected in the request
+    RequestConfig(request, paginate=False).configure(table)
+    try:
+        per_page = int(request.GET[table.prefixed_per_page_field])
+    except (KeyError, ValueError):
+        pass
+    cursor_field = f"{table.prefix}{CURSOR_FIELD}"
+    table.paginate(paginator_class=KeysetPaginator,
+                   per_page=per_page,
+                   page=request.GET.get(cursor_field),
+                   cursor_field=cursor_field)
+    table.template_name = TEMPLATE_NAME
+    return table
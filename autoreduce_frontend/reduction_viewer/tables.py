@@ -1,20 +1,79 @@
+from functools import lru_cache
+from urllib.parse import quote
+
 import django_tables2 as tables
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils.http import RFC3986_SUBDELIMS
 from django_tables2 import Table
 from autoreduce_db.reduction_viewer.models import ReductionRun, Experiment
-from autoreduce_frontend.reduction_viewer.view_utils import data_status, started_by_id_to_name
+from autoreduce_frontend.reduction_viewer.view_utils import (data_status, started_by_id_to_name,
+                                                             started_by_ids_to_names)
+
+# The table options in the page context that run links carry to the run summary, as (query parameter, context name)
+RUN_LINK_OPTIONS = (("cursor", "cursor"), ("per_page", "per_page"), ("sort", "sort"), ("filter", "filtering"))
+
+
+@lru_cache(maxsize=None)
+def run_url_format(viewname: str, *names: str) -> str:
+    """
+    Return the URL of viewname as a format string with a replacement field for
+    each of the URL arguments in names, so that run links can be built without
+    a reverse() for every row.
+
+    The URL arguments are all reversed as integers that can't appear
+    elsewhere in the URL, and then replaced with their names.
+    """
+    sentinels = {name: 987654321000 + index for index, name in enumerate(names)}
+    url = reverse(viewname, kwargs=sentinels).replace("{", "{{").replace("}", "}}")
+    for name, sentinel in sentinels.items():
+        url = url.replace(str(sentinel), f"{{{name}}}")
+    return url
+
+
+class RunLinkColumn(tables.Column):
+    """
+    Links to the summary of the run, with the options of the table the link is
+    in, and the run's title as the text. Does the same as generate_run_link
+    in a template, but the URL is formatted from a prefix reversed once, and
+    the table options are read from the page context once per table.
+    """
+    empty_values = ()
+
+    @staticmethod
+    def options(table) -> str:
+        """ Return the query string of table options for the context the table is being rendered in. """
+        context = getattr(table, "context", None)
+        cached = getattr(table, "_run_link_options", None)
+        if cached is None or cached[0] is not context:
+            values = [(field, context.get(name, "") if context is not None else "") for field, name in RUN_LINK_OPTIONS]
+            cached = (context, "&".join(f"{field}={value}" for field, value in values))
+            table._run_link_options = cached  # pylint:disable=protected-access
+        return cached[1]
+
+    @staticmethod
+    def quote_instrument(instrument) -> str:
+        """ Return the instrument's name quoted for a URL path in the same way as reverse() does. """
+        return quote(str(instrument), safe=RFC3986_SUBDELIMS + "~:@")
+
+    def render(self, record, table):  # pylint:disable=arguments-differ
+        if record.batch_run:
+            url = run_url_format("runs:batch_summary", "instrument_name", "pk", "run_version")
+            url = url.format(instrument_name=self.quote_instrument(record.instrument),
+                             pk=record.pk,
+                             run_version=record.run_version)
+        else:
+            url = run_url_format("runs:summary", "instrument_name", "run_number", "run_version")
+            url = url.format(instrument_name=self.quote_instrument(record.instrument),
+                             run_number=record.run_number,
+                             run_version=record.run_version)
+        return format_html('<a href="{}?{}">{}</a>', url, self.options(table), record.title())
 
 
 class ReductionRunTable(Table):
     '''Table model for displaying Reduction Runs (and batch-runs)'''
 
-    run_number = tables.TemplateColumn(
-        """{% load generate_run_link %} <a href="{% generate_run_link record.instrument record %}?
-page={{ current_page }}&per_page={{ per_page }}&sort={{ sort }}&filter={{ filtering }}">{{ record.title }}
-</a>""",
-        attrs={"td": {
-            "class": "run-num-links"
-        }},
-        accessor="run_numbers__run_number")
+    run_number = RunLinkColumn(attrs={"td": {"class": "run-num-links"}}, accessor="run_numbers__run_number")
 
     status = tables.Column(attrs={"td": {"class": lambda record: data_status(str(record.status))}})
 
@@ -62,14 +121,7 @@ RB{{ record.reference_number }}</a>""",
 class ExperimentSummaryTable(Table):
     '''Table model for displaying Reduction Runs (and batch-runs)'''
 
-    run_number = tables.TemplateColumn(
-        """{% load generate_run_link %} <a href="{% generate_run_link record.instrument record %}?
-page={{ current_page }}&per_page={{ per_page }}&sort={{ sort }}&filter={{ filtering }}">{{ record.title }}
-</a>""",
-        attrs={"td": {
-            "class": "run-num-links"
-        }},
-        accessor="run_numbers__run_number")
+    run_number = RunLinkColumn(attrs={"td": {"class": "run-num-links"}}, accessor="run_numbers__run_number")
 
     status = tables.Column(attrs={"td": {"class": lambda record: data_status(str(record.status))}})
 
@@ -95,12 +147,18 @@ page={{ current_page }}&per_page={{ per_page }}&sort={{ sort }}&filter={{ filter
             'started_by',
         )
 
-    @staticmethod
-    def render_started_by(value):
+    def render_started_by(self, value):
         '''
         Render method for started_by column to populate with name
-        instead of id.
+        instead of id. The names for every run on the page are looked up
+        together when the first one is rendered.
         '''
+        names = getattr(self, "_started_by_names", None)
+        if names is None:
+            names = started_by_ids_to_names(row.record.started_by for row in self.paginated_rows)
+            self._started_by_names = names  # pylint:disable=attribute-defined-outside-init
+        if value in names:
+            return names[value]
         return started_by_id_to_name(value)
 
 
@@ -110,14 +168,7 @@ class FailQueueTable(Table):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-    run_number = tables.TemplateColumn(
-        """{% load generate_run_link %} <a href="{% generate_run_link record.instrument record %}?
-page={{ current_page }}&per_page={{ per_page }}&sort={{ sort }}&filter={{ filtering }}">{{ record.title }}
-</a>""",
-        attrs={"td": {
-            "class": "failed-run-link"
-        }},
-        accessor="run_numbers__run_number")
+    run_number = RunLinkColumn(attrs={"td": {"class": "failed-run-link"}}, accessor="run_numbers__run_number")
 
     checkbox = tables.CheckBoxColumn(
         accessor="pk",
@@ -1,4 +1,14 @@
-from autoreduce_frontend.reduction_viewer.views.common import DEFAULT_WHEN_NO_VALUE, _combine_dicts
+import base64
+from unittest.mock import patch
+
+import pytest
+
+from autoreduce_frontend.reduction_viewer.views.common import (DEFAULT_VARIABLES_CACHE, DEFAULT_WHEN_NO_VALUE,
+                                                               EMPTY_DEFAULT_VARIABLES, _combine_dicts,
+                                                               get_arguments_from_file, get_default_variables,
+                                                               make_reduction_arguments)
+
+COMMON = "autoreduce_frontend.reduction_viewer.views.common"
 
 
 def test_combine_dicts_empty_current():
@@ -40,3 +50,81 @@ def test_combine_dicts_current_more_vars():
         }
     }
     assert _combine_dicts(current_test, default_test) == expected
+
+
+@pytest.fixture(name="reduce_vars")
+def fixture_reduce_vars(tmp_path):
+    """
+    Point the instrument's reduce_vars file at an empty cache and a temporary
+    file, and yield the file and a mock that loads the variables from it.
+    """
+    path = tmp_path / "reduce_vars.py"
+    path.write_text("standard_vars = {'numbers': [1, 2]}")
+    variables = {
+        "standard_vars": {
+            "numbers": [1, 2]
+        },
+        "advanced_vars": {},
+        "variable_help": {
+            "standard_vars": {},
+            "advanced_vars": {}
+        }
+    }
+    with patch.dict(DEFAULT_VARIABLES_CACHE, clear=True), \
+            patch(f"{COMMON}.reduce_vars_path", return_value=path), \
+            patch(f"{COMMON}.VariableUtils.get_default_variables", return_value=variables) as load:
+        yield path, load
+
+
+def test_default_variables_cached(reduce_vars):
+    """
+    Test: The reduce_vars file is loaded once, and the variables can't be changed
+    When: The default variables are got twice
+    """
+    _, load = reduce_vars
+    variables = get_default_variables("TESTINSTRUMENT")
+    assert get_default_variables("TESTINSTRUMENT") is variables
+    load.assert_called_once_with("TESTINSTRUMENT", raise_exc=True)
+    assert variables["standard_vars"]["numbers"] == (1, 2)
+    with pytest.raises(TypeError):
+        variables["standard_vars"]["numbers"] = 3
+
+
+def test_default_variables_reloaded_when_file_changes(reduce_vars):
+    """
+    Test: The reduce_vars file is loaded again
+    When: The file is changed
+    """
+    path, load = reduce_vars
+    get_default_variables("TESTINSTRUMENT")
+    path.write_text("standard_vars = {'numbers': [1, 2, 3]}")
+    get_default_variables("TESTINSTRUMENT")
+    assert load.call_count == 2
+
+
+def test_default_variables_errors_not_cached(reduce_vars):
+    """
+    Test: Errors are raised when asked for, and otherwise give empty variables
+    When: The reduce_vars file has a syntax error
+    """
+    _, load = reduce_vars
+    load.side_effect = SyntaxError
+    assert get_default_variables("TESTINSTRUMENT") is EMPTY_DEFAULT_VARIABLES
+    with pytest.raises(SyntaxError):
+        get_default_variables("TESTINSTRUMENT", raise_exc=True)
+    assert not DEFAULT_VARIABLES_CACHE
+
+
+def test_default_variables_copied_for_callers(reduce_vars):
+    """
+    Test: Callers get mutable copies of the variables, and changing them doesn't change the cache
+    When: Making the arguments for a POST and getting the arguments for rendering
+    """
+    name = base64.urlsafe_b64encode(b"numbers").decode()
+    arguments = make_reduction_arguments([(f"var-standard-{name}", "[3, 4]")], "TESTINSTRUMENT")
+    assert arguments["standard_vars"]["numbers"] == [3, 4]
+    standard_vars, _, __ = get_arguments_from_file("TESTINSTRUMENT")
+    assert standard_vars == {"numbers": [1, 2]}
+    standard_vars["numbers"].append(3)
+    assert get_default_variables("TESTINSTRUMENT")["standard_vars"]["numbers"] == (1, 2)
+    reduce_vars[1].assert_called_once()
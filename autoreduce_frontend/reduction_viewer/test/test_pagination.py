@@ -0,0 +1,137 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Tests for keyset pagination of the run tables.
+"""
+# pylint:disable=no-member
+from django.test import RequestFactory, TestCase
+from parameterized import parameterized
+
+from autoreduce_db.reduction_viewer.models import ReductionRun
+from autoreduce_frontend.reduction_viewer.pagination import configure_keyset
+from autoreduce_frontend.reduction_viewer.tables import (ExperimentSummaryTable, FailQueueTable, ReductionRunTable)
+from autoreduce_frontend.selenium_tests.tests.base_tests import BaseTestCase
+
+
+class KeysetPaginationTestCase(TestCase):
+    fixtures = BaseTestCase.fixtures + ["autoreduce_frontend/autoreduce_webapp/fixtures/eleven_runs.json"]
+
+    @staticmethod
+    def make_table(sort: str, cursor: str = None, table_class=ReductionRunTable):
+        """ Return a keyset paginated table of every run, three to a page. """
+        params = {"sort": sort, "per_page": 3}
+        if cursor:
+            params["cursor"] = cursor
+        request = RequestFactory().get("/runs/", params)
+        return configure_keyset(request, table_class(ReductionRun.objects.all()))
+
+    @staticmethod
+    def pks(table) -> list:
+        """ Return the primary keys of the runs on the table's page. """
+        return [row.record.pk for row in table.page.object_list]
+
+    @parameterized.expand([["-run_number"], ["run_number"], ["-created"], ["created"]])
+    def test_pages_cover_every_run_once(self, sort):
+        """
+        Test: Following the next links visits every run once, in the same order as OFFSET pagination would
+        When: The runs are sorted by each of the orderings used on the runs list
+        """
+        table = self.make_table(sort)
+        expected = [record.pk for record in table.paginator.queryset]
+        seen = self.pks(table)
+        while table.page.has_next:
+            table = self.make_table(sort, table.page.next_cursor)
+            seen += self.pks(table)
+        assert seen == expected
+        assert len(seen) == 11
+
+    @parameterized.expand([[ExperimentSummaryTable, "started_by"], [ExperimentSummaryTable, "-started_by"],
+                           [FailQueueTable, "message"], [FailQueueTable, "-message"]])
+    def test_pages_cover_every_run_when_ordering_has_nulls(self, table_class, sort):
+        """
+        Test: Following the next links, then the previous links, visits every run once in the same order
+        When: The runs are sorted by a column that is null for some of them
+        """
+        ReductionRun.objects.filter(pk__lte=4).update(started_by=None, message=None)
+        ReductionRun.objects.filter(pk__gt=4, pk__lte=8).update(started_by=-1, message="a")
+        ReductionRun.objects.filter(pk__gt=8).update(started_by=7, message="b")
+
+        table = self.make_table(sort, table_class=table_class)
+        expected = [record.pk for record in table.paginator.queryset]
+        pages = [self.pks(table)]
+        while table.page.has_next:
+            table = self.make_table(sort, table.page.next_cursor, table_class)
+            pages.append(self.pks(table))
+        assert sum(pages, []) == expected
+        assert len(expected) == 11
+
+        while table.page.has_previous:
+            table = self.make_table(sort, table.page.previous_cursor, table_class)
+            pages.pop()
+            assert self.pks(table) == pages[-1]
+        assert len(pages) == 1
+
+    def test_previous_returns_to_the_same_page(self):
+        """
+        Test: The previous page has the same runs as before
+        When: Following a next link and then a previous link
+        """
+        first = self.make_table("created")
+        second = self.make_table("created", first.page.next_cursor)
+        back = self.make_table("created", second.page.previous_cursor)
+        assert self.pks(back) == self.pks(first)
+        assert not back.page.has_previous
+        assert back.page.has_next
+
+    def test_deep_pages_cost_one_query(self):
+        """
+        Test: A page is fetched with one query, without counting the rows
+        When: Fetching the last page
+        """
+        table = self.make_table("-run_number")
+        for _ in range(2):
+            table = self.make_table("-run_number", table.page.next_cursor)
+        with self.assertNumQueries(1):
+            table = self.make_table("-run_number", table.page.next_cursor)
+            assert len(table.page) == 2
+        assert not table.page.has_next
+
+    @parameterized.expand([["not a cursor"], ["bm90IGpzb24"]])
+    def test_invalid_cursor_gives_first_page(self, cursor):
+        """
+        Test: The first page is shown
+        When: The cursor can't be decoded
+        """
+        assert self.pks(self.make_table("created", cursor)) == self.pks(self.make_table("created"))
+
+    def test_cursor_for_other_ordering_gives_first_page(self):
+        """
+        Test: The first page is shown
+        When: The sort order was changed after following a next link
+        """
+        cursor = self.make_table("created").page.next_cursor
+        assert self.pks(self.make_table("-run_number", cursor)) == self.pks(self.make_table("-run_number"))
+
+    def test_total_is_lazy(self):
+        """
+        Test: The total number of runs is only counted when it is used
+        When: Reading the paginator's count
+        """
+        table = self.make_table("created")
+        with self.assertNumQueries(1):
+            assert table.paginator.count == 11
+            assert table.paginator.count == 11
+
+    def test_renders_next_link(self):
+        """
+        Test: The pager links to the next page by cursor
+        When: The table is rendered
+        """
+        table = self.make_table("-run_number")
+        html = table.as_html(table.request)
+        assert f"cursor={table.page.next_cursor}" in html
+        assert "page=2" not in html
@@ -0,0 +1,232 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Tests for serving plot files from the reduction location.
+"""
+# pylint:disable=no-member
+import gzip
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from autoreduce_db.reduction_viewer.models import ReductionLocation
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404
+from django.test import RequestFactory, TestCase
+from django.utils.http import http_date
+from parameterized import parameterized
+
+from autoreduce_frontend.reduction_viewer.views.plots import (UNSATISFIABLE, accepted_encoding, parse_range, serve_plot)
+from autoreduce_frontend.selenium_tests.tests.base_tests import BaseTestCase
+
+PLOT_DATA = b"0123456789" * 100
+JSON_PLOT_DATA = b'{"data": [{"type": "bar", "x": [1, 2, 3], "y": [1, 3, 2]}]}' * 50
+
+
+@patch("autoreduce_frontend.autoreduce_webapp.view_utils.DEVELOPMENT_MODE", True)
+class TestServePlot(TestCase):
+    fixtures = BaseTestCase.fixtures + ["one_run_plot"]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        ReductionLocation.objects.filter(reduction_run_id=1).update(file_path=self.directory)
+        with open(os.path.join(self.directory, "data_plot.png"), "wb") as plot_file:
+            plot_file.write(PLOT_DATA)
+        with open(os.path.join(self.directory, "data_plot.json"), "wb") as plot_file:
+            plot_file.write(JSON_PLOT_DATA)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    @staticmethod
+    def get(plot_name: str = "data_plot.png", **headers):
+        """ Request the plot from the view. """
+        request = RequestFactory().get(f"/runs/plot/1/{plot_name}", **headers)
+        request.user = AnonymousUser()
+        return serve_plot(request, run_id=1, plot_name=plot_name)
+
+    def test_serves_file(self):
+        """
+        Test: The whole file is streamed with validators for caching
+        When: The plot is requested
+        """
+        response = self.get()
+        assert response.status_code == 200
+        assert b"".join(response.streaming_content) == PLOT_DATA
+        assert response["Content-Type"] == "image/png"
+        assert response["Content-Length"] == str(len(PLOT_DATA))
+        assert response["Accept-Ranges"] == "bytes"
+        assert response["ETag"].startswith('"')
+        assert "Last-Modified" in response
+        response.close()
+
+    def test_not_modified(self):
+        """
+        Test: A 304 is returned without the file
+        When: The browser's cached copy has the current ETag or modification time
+        """
+        etag = self.get()["ETag"]
+        assert self.get(HTTP_IF_NONE_MATCH=etag).status_code == 304
+        modified = http_date(os.path.getmtime(os.path.join(self.directory, "data_plot.png")))
+        assert self.get(HTTP_IF_MODIFIED_SINCE=modified).status_code == 304
+
+    def test_changed_file_gets_new_etag(self):
+        """
+        Test: The whole file is sent again
+        When: The plot has been replaced since the browser cached it
+        """
+        etag = self.get()["ETag"]
+        with open(os.path.join(self.directory, "data_plot.png"), "wb") as plot_file:
+            plot_file.write(b"new plot")
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert b"".join(response.streaming_content) == b"new plot"
+        response.close()
+
+    @parameterized.expand([["bytes=0-9", "0123456789", "bytes 0-9/1000"], ["bytes=995-", "56789", "bytes 995-999/1000"],
+                           ["bytes=-3", "789", "bytes 997-999/1000"],
+                           ["bytes=990-5000", "0123456789", "bytes 990-999/1000"]])
+    def test_range(self, header: str, expected: str, content_range: str):
+        """
+        Test: Only the requested bytes are sent
+        When: A single byte range is requested
+        """
+        response = self.get(HTTP_RANGE=header)
+        assert response.status_code == 206
+        assert b"".join(response.streaming_content) == expected.encode()
+        assert response["Content-Range"] == content_range
+        assert response["Content-Length"] == str(len(expected))
+
+    def test_unsatisfiable_range(self):
+        """
+        Test: A 416 is returned with the size of the file
+        When: The range starts past the end of the file
+        """
+        response = self.get(HTTP_RANGE="bytes=1000-")
+        assert response.status_code == 416
+        assert response["Content-Range"] == "bytes */1000"
+
+    def test_stale_if_range_gets_whole_file(self):
+        """
+        Test: The whole file is sent instead of the range
+        When: If-Range names a different version of the file
+        """
+        response = self.get(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale"')
+        assert response.status_code == 200
+        response.close()
+
+    @parameterized.expand([["data.nxs"], ["other_plot.png"], ["..%2Fdata_plot.png"]])
+    def test_only_run_plots_served(self, plot_name: str):
+        """
+        Test: A 404 is raised
+        When: The name isn't one of the run's plot files
+        """
+        with open(os.path.join(self.directory, "other_plot.png"), "wb") as plot_file:
+            plot_file.write(PLOT_DATA)
+        with self.assertRaises(Http404):
+            self.get(plot_name)
+
+    @patch("autoreduce_frontend.reduction_viewer.views.plots.PLOT_SENDFILE_HEADER", "X-Accel-Redirect")
+    @patch("autoreduce_frontend.reduction_viewer.views.plots.PLOT_SENDFILE_PREFIX", "/plots")
+    def test_sendfile_header(self):
+        """
+        Test: The response is empty and tells the front web server which file to send
+        When: A sendfile header is configured
+        """
+        response = self.get()
+        assert response.status_code == 200
+        assert response.content == b""
+        assert response["X-Accel-Redirect"] == f"/plots{self.directory}/data_plot.png"
+
+    @patch("autoreduce_frontend.reduction_viewer.views.plots.ENCODINGS", ("gzip", ))
+    def test_json_plot_gzipped(self):
+        """
+        Test: The JSON is sent gzipped, with a strong ETag of its own, and the same bytes every time
+        When: An interactive plot is requested by a browser that accepts gzip
+        """
+        plain = self.get("data_plot.json")
+        plain_etag = plain["ETag"]
+        plain.close()
+        response = self.get("data_plot.json", HTTP_ACCEPT_ENCODING="gzip, deflate")
+        compressed = b"".join(response.streaming_content)
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/json"
+        assert response["Content-Encoding"] == "gzip"
+        assert response["Accept-Ranges"] == "none"
+        assert "Accept-Encoding" in response["Vary"]
+        assert gzip.decompress(compressed) == JSON_PLOT_DATA
+        assert len(compressed) < len(JSON_PLOT_DATA)
+        assert response["ETag"].startswith('"')
+        assert response["ETag"] != plain_etag
+
+        again = self.get("data_plot.json", HTTP_ACCEPT_ENCODING="gzip")
+        assert b"".join(again.streaming_content) == compressed
+        assert again["ETag"] == response["ETag"]
+
+    @patch("autoreduce_frontend.reduction_viewer.views.plots.ENCODINGS", ("gzip", ))
+    def test_json_plot_not_modified(self):
+        """
+        Test: A 304 is returned without compressing the file again
+        When: The browser's cached copy of the gzipped JSON is current
+        """
+        etag = self.get("data_plot.json", HTTP_ACCEPT_ENCODING="gzip")["ETag"]
+        response = self.get("data_plot.json", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+
+    def test_json_plot_uncompressed(self):
+        """
+        Test: The JSON is sent as it is
+        When: The browser doesn't accept a compressed response
+        """
+        response = self.get("data_plot.json", HTTP_ACCEPT_ENCODING="gzip;q=0")
+        assert not response.has_header("Content-Encoding")
+        assert response["Accept-Ranges"] == "bytes"
+        assert "Accept-Encoding" in response["Vary"]
+        assert b"".join(response.streaming_content) == JSON_PLOT_DATA
+        response.close()
+
+    def test_json_plot_uncompressed_range(self):
+        """
+        Test: Only the requested bytes of the JSON are sent, as it is
+        When: The browser doesn't accept a compressed response and asks for a range
+        """
+        response = self.get("data_plot.json", HTTP_ACCEPT_ENCODING="gzip;q=0", HTTP_RANGE="bytes=0-9")
+        assert response.status_code == 206
+        assert not response.has_header("Content-Encoding")
+        assert response["Content-Range"] == f"bytes 0-9/{len(JSON_PLOT_DATA)}"
+        assert b"".join(response.streaming_content) == JSON_PLOT_DATA[:10]
+        response.close()
+
+
+class TestAcceptedEncoding(TestCase):
+
+    @parameterized.expand([["gzip, deflate, br", ("br", "gzip"), "br"], ["gzip, deflate, br", ("gzip", ), "gzip"],
+                           ["deflate", ("br", "gzip"), None], ["br;q=0, gzip;q=0.5", ("br", "gzip"), "gzip"],
+                           ["*", ("gzip", ), "gzip"], ["", ("gzip", ), None]])
+    def test_accepted_encoding(self, header: str, encodings: tuple, expected):
+        """
+        Test: The most preferred encoding the browser accepts is chosen
+        When: accepted_encoding is called with an Accept-Encoding header
+        """
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=header)
+        with patch("autoreduce_frontend.reduction_viewer.views.plots.ENCODINGS", encodings):
+            assert accepted_encoding(request) == expected
+
+
+class TestParseRange(TestCase):
+
+    @parameterized.expand([["bytes=0-0", 10, (0, 0)], ["bytes=5-", 10, (5, 9)], ["bytes=-20", 10, (0, 9)],
+                           ["bytes=10-", 10, UNSATISFIABLE], ["bytes=-0", 10, UNSATISFIABLE], ["bytes=5-2", 10, None],
+                           ["bytes=0-1,4-5", 10, None], ["lines=0-1", 10, None], ["bytes=-", 10, None]])
+    def test_parse_range(self, header: str, size: int, expected):
+        """
+        Test: The range is parsed, or ignored if it's not a single byte range
+        When: parse_range is called with a Range header
+        """
+        assert parse_range(header, size) == expected
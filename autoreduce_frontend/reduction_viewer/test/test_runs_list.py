@@ -0,0 +1,114 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Tests for the queries made by the runs list view.
+"""
+# pylint:disable=no-member
+from unittest.mock import patch
+
+from autoreduce_db.reduction_viewer.models import Experiment, ReductionRun, RunNumber, Status
+from django.contrib.auth.models import AnonymousUser
+from django.shortcuts import render
+from django.test import RequestFactory, TestCase
+
+from autoreduce_frontend.reduction_viewer.views.runs_list import runs_list
+from autoreduce_frontend.selenium_tests.tests.base_tests import BaseTestCase
+
+# Getting the instrument, the status aggregate, the status panel runs and their run numbers,
+# and a page of the run table and its run numbers, including rendering the page
+QUERY_BUDGET = 6
+# ...with the run table replaced by counting the experiments and getting a page of them
+EXPERIMENT_QUERY_BUDGET = QUERY_BUDGET
+
+
+@patch("autoreduce_frontend.autoreduce_webapp.view_utils.DEVELOPMENT_MODE", True)
+@patch("autoreduce_frontend.autoreduce_webapp.view_utils.get_notifications", lambda request: [])
+@patch("autoreduce_frontend.autoreduce_webapp.view_utils.render", wraps=render)
+class TestRunsListQueries(TestCase):
+    fixtures = BaseTestCase.fixtures + ["autoreduce_frontend/autoreduce_webapp/fixtures/eleven_runs.json"]
+
+    @staticmethod
+    def get_context(render_spy, **params) -> dict:
+        """ Render the page for TESTINSTRUMENT and return the context it was rendered with. """
+        request = RequestFactory().get("/runs/TESTINSTRUMENT/", params)
+        request.user = AnonymousUser()
+        assert runs_list(request, instrument="TESTINSTRUMENT").status_code == 200
+        return render_spy.call_args[0][2]
+
+    @staticmethod
+    def add_runs(count: int, status: Status, new_experiments: bool = False):
+        """
+        Add count more runs to the instrument, copying its first run, each in
+        a new experiment if new_experiments.
+        """
+        template = ReductionRun.objects.get(pk=1)
+        last_number = RunNumber.objects.order_by("-run_number").first().run_number
+        for number in range(last_number + 1, last_number + 1 + count):
+            template.pk = None
+            template.status = status
+            if new_experiments:
+                template.experiment = Experiment.objects.create(reference_number=number)
+            template.save()
+            RunNumber.objects.create(reduction_run=template, run_number=number)
+
+    def test_status_panel(self, render_spy):
+        """
+        Test: The first, last, processing and queued runs are found
+        When: Some of the instrument's runs are processing or queued
+        """
+        ReductionRun.objects.filter(pk=3).update(status=Status.get_processing())
+        ReductionRun.objects.filter(pk__in=(4, 5)).update(status=Status.get_queued())
+        context = self.get_context(render_spy)
+        assert context['first_instrument_run'].pk == 1
+        assert context['last_instrument_run'].pk == 11
+        assert [run.pk for run in context['processing']] == [3]
+        assert sorted(run.pk for run in context['queued']) == [4, 5]
+
+    def test_query_budget(self, render_spy):
+        """
+        Test: Rendering the page makes the same fixed number of queries
+        When: The instrument has more runs, and more processing and queued runs
+        """
+        with self.assertNumQueries(QUERY_BUDGET):
+            self.get_context(render_spy)
+        self.add_runs(50, Status.get_processing())
+        self.add_runs(50, Status.get_queued())
+        with self.assertNumQueries(QUERY_BUDGET):
+            context = self.get_context(render_spy)
+        assert len(context['processing']) == 50
+        assert len(context['queued']) == 50
+
+    def test_experiment_filter(self, render_spy):
+        """
+        Test: Only a page of experiments is fetched, newest first, without their runs or a page of the run table,
+              in the same number of queries however many experiments there are
+        When: The runs are filtered by experiment
+        """
+        self.add_runs(5, Status.get_completed(), new_experiments=True)
+        with self.assertNumQueries(EXPERIMENT_QUERY_BUDGET):
+            context = self.get_context(render_spy, filter="experiment")
+        assert len(context['experiment_table'].page) == 6
+        assert 'run_table' not in context
+
+        self.add_runs(30, Status.get_completed(), new_experiments=True)
+        with self.assertNumQueries(EXPERIMENT_QUERY_BUDGET):
+            context = self.get_context(render_spy, filter="experiment")
+        reference_numbers = [row.record.reference_number for row in context['experiment_table'].page.object_list]
+        assert len(reference_numbers) == 10
+        assert reference_numbers == sorted(reference_numbers, reverse=True)
+
+    def test_no_runs(self, render_spy):
+        """
+        Test: The view reports that there are no runs without fetching any
+        When: The instrument has no runs
+        """
+        ReductionRun.objects.all().delete()
+        request = RequestFactory().get("/runs/TESTINSTRUMENT/")
+        request.user = AnonymousUser()
+        with self.assertNumQueries(2):
+            runs_list(request, instrument="TESTINSTRUMENT")
+        assert render_spy.call_args[0][2]['message'] == "No runs found for instrument."
@@ -0,0 +1,54 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Tests for the run link column of the run tables.
+"""
+# pylint:disable=no-member
+from django.template import Context
+from django.test import TestCase
+from parameterized import parameterized
+
+from autoreduce_db.reduction_viewer.models import ReductionRun
+from autoreduce_frontend.autoreduce_webapp.templatetags.generate_run_link import generate_run_link
+from autoreduce_frontend.reduction_viewer.tables import ExperimentSummaryTable, FailQueueTable, ReductionRunTable
+from autoreduce_frontend.selenium_tests.tests.base_tests import BaseTestCase
+
+OPTIONS = {"cursor": "abc", "per_page": 10, "sort": "-run_number", "filtering": "run"}
+
+
+class TestRunLinkColumn(TestCase):
+    fixtures = BaseTestCase.fixtures + [
+        "autoreduce_frontend/autoreduce_webapp/fixtures/eleven_runs.json",
+        "autoreduce_frontend/autoreduce_webapp/fixtures/batch_run.json"
+    ]
+
+    @parameterized.expand([[ReductionRunTable], [ExperimentSummaryTable], [FailQueueTable]])
+    def test_links_match_generate_run_link(self, table_class):
+        """
+        Test: Each run links to the same URL as generate_run_link, with the table options and the run's title
+        When: Rendering a table of normal and batch runs
+        """
+        runs = list(ReductionRun.objects.all())
+        assert any(run.batch_run for run in runs)
+        table = table_class(runs)
+        table.context = Context(OPTIONS)
+        for row, run in zip(table.rows, runs):
+            link = generate_run_link(run.instrument, run)
+            query = "cursor=abc&amp;per_page=10&amp;sort=-run_number&amp;filter=run"
+            assert row.get_cell("run_number") == f'<a href="{link}?{query}">{run.title()}</a>'
+
+    def test_title_escaped(self):
+        """
+        Test: The run's title is HTML escaped
+        When: It contains markup
+        """
+        run = ReductionRun.objects.filter(batch_run=False).first()
+        run.run_title = "<b>title</b>"
+        table = ReductionRunTable([run])
+        cell = table.rows[0].get_cell("run_number")
+        assert "&lt;b&gt;title&lt;/b&gt;" in cell
+        assert "?cursor=&amp;per_page=" in cell
@@ -1,12 +1,14 @@
-from django.core.exceptions import ObjectDoesNotExist
+from django.contrib.auth import get_user_model
 from django.test import TestCase
-from unittest.mock import Mock, mock_open, patch
+from unittest.mock import Mock, patch
 from parameterized import parameterized
 from autoreduce_db.reduction_viewer.models import ReductionRun
 from autoreduce_frontend.autoreduce_webapp.settings import DATA_ANALYSIS_BASE_URL
-from autoreduce_frontend.reduction_viewer.view_utils import (convert_software_string_to_dict, get_interactive_plot_data,
-                                                             make_data_analysis_url, started_by_id_to_name, order_runs,
-                                                             data_status)
+from autoreduce_frontend.reduction_viewer.tables import ExperimentSummaryTable
+from autoreduce_frontend.reduction_viewer.view_utils import (STARTED_BY_CACHE, convert_software_string_to_dict,
+                                                             get_interactive_plot_urls, make_data_analysis_url,
+                                                             started_by_id_to_name, started_by_ids_to_names, order_runs,
+                                                             get_navigation_runs, data_status)
 from autoreduce_frontend.selenium_tests.tests.base_tests import BaseTestCase
 
 
@@ -22,17 +24,16 @@ def test_make_data_analysis_url_good_url():
     assert DATA_ANALYSIS_BASE_URL in result
 
 
-def test_get_interactive_plot_data():
+def test_get_interactive_plot_urls():
     """
-    Test that get_interactive_plot_data will read only the json calls as expected
+    Test that get_interactive_plot_urls gives the URLs of only the JSON plots, by file name
     """
-    locations = ["location1.png", "location1.json", "location2.jpg", "location2.json"]
-    mopen: Mock = mock_open()
-    with patch("autoreduce_frontend.reduction_viewer.view_utils.open", mopen, create=True):
-        get_interactive_plot_data(locations)
-    mopen.assert_any_call(locations[1], mode='r', encoding='utf-8')
-    mopen.assert_any_call(locations[3], mode='r', encoding='utf-8')
-    assert mopen.call_count == 2
+    urls = ["/runs/plot/1/location1.png", "/runs/plot/1/location1.json", "/runs/plot/1/location%202.json"]
+    locations = ["/reduced/location1.png", "/reduced/location1.json", "/reduced/location 2.json"]
+    assert get_interactive_plot_urls(urls, locations) == {
+        "location1.json": "/runs/plot/1/location1.json",
+        "location 2.json": "/runs/plot/1/location%202.json"
+    }
 
 
 @parameterized.expand([
@@ -52,11 +53,52 @@ def test_started_by_id_to_name_missing_user(logger: Mock, get_user_model_mock: M
     """
     Test that started_by_id_to_name will log the error if the user does not exist
     """
-    get_user_model_mock.return_value.objects.get.side_effect = ObjectDoesNotExist
+    get_user_model_mock.return_value.objects.only.return_value.in_bulk.return_value = {}
     assert started_by_id_to_name(100) is None
     logger.error.assert_called_once()
 
 
+class StartedByNamesTestCase(TestCase):
+
+    def setUp(self):
+        STARTED_BY_CACHE.clear()
+        self.users = [
+            get_user_model().objects.create(username=f"user{index}", first_name="First", last_name=f"Last{index}")
+            for index in range(3)
+        ]
+
+    def tearDown(self):
+        STARTED_BY_CACHE.clear()
+
+    def test_names_fetched_in_one_query(self):
+        """
+        Test: Every user's name is fetched in one query, and then remembered
+        When: Resolving the submitters of many runs, twice
+        """
+        ids = [user.pk for user in self.users] * 2 + [-1, 0, None]
+        with self.assertNumQueries(1):
+            names = started_by_ids_to_names(ids)
+        assert names == {
+            **{user.pk: f"First {user.last_name}"
+               for user in self.users}, -1: "Development team",
+            0: "Autoreduction service",
+            None: None
+        }
+        with self.assertNumQueries(0):
+            assert started_by_ids_to_names(ids) == names
+
+    def test_table_looks_up_page_once(self):
+        """
+        Test: The submitters of every run on the page are looked up in one query
+        When: Rendering the started_by column of an ExperimentSummaryTable
+        """
+        runs = [Mock(started_by=user.pk) for user in self.users * 4]
+        table = ExperimentSummaryTable(runs)
+        with self.assertNumQueries(1):
+            rendered = [table.render_started_by(run.started_by) for run in runs]
+        assert rendered == [f"First {user.last_name}" for user in self.users * 4]
+
+
 # Test convert_software_string_to_dict in view_utils
 def test_convert_software_string_to_dict():
     """
@@ -86,6 +128,48 @@ class ReductionRunTestCase(TestCase):
         assert runs.first().run_number == 100009
 
 
+class NavigationRunsTestCase(TestCase):
+    fixtures = BaseTestCase.fixtures + [
+        "autoreduce_frontend/autoreduce_webapp/fixtures/eleven_runs.json",
+        "autoreduce_frontend/autoreduce_webapp/fixtures/batch_run.json"
+    ]
+
+    @staticmethod
+    def expected_navigation_runs(run: ReductionRun, page_type: str) -> tuple:
+        """ Find the navigation runs with a query for each, as get_navigation_runs used to. """
+        runs = order_runs(page_type, ReductionRun.objects.filter(instrument=run.instrument, batch_run=run.batch_run))
+        if not run.batch_run:
+            next_run = runs.filter(run_numbers__run_number__gt=run.run_number).last()
+            previous_run = runs.filter(run_numbers__run_number__lt=run.run_number).first()
+        else:
+            next_run = runs.filter(pk__gt=run.pk).last()
+            previous_run = runs.filter(pk__lt=run.pk).first()
+        return next_run or run, previous_run or run, runs.first(), runs.last()
+
+    @parameterized.expand([["-run_number"], ["run_number"], ["-created"], ["created"]])
+    def test_same_runs_in_one_query(self, page_type):
+        """
+        Test: The next, previous, newest and oldest runs are found with one query
+        When: Viewing each run, with each of the run list orderings
+        """
+        for run in ReductionRun.objects.all():
+            expected = self.expected_navigation_runs(run, page_type)
+            with self.assertNumQueries(1):
+                navigation_runs = get_navigation_runs(run.instrument.name, run, page_type)
+            assert navigation_runs == expected
+
+    def test_steps_through_run_numbers(self):
+        """
+        Test: Next and previous step to the adjacent run numbers, and newest and oldest are the ends
+        When: Viewing a run in the middle, ordered by run number
+        """
+        run = ReductionRun.objects.get(run_numbers__run_number=100005)
+        next_run, previous_run, newest_run, oldest_run = get_navigation_runs("TESTINSTRUMENT", run, "-run_number")
+        assert (next_run.run_number, previous_run.run_number) == (100006, 100004)
+        assert newest_run.run_number == 100009
+        assert oldest_run == ReductionRun.objects.filter(batch_run=False).order_by("run_numbers__run_number").first()
+
+
 def test_status_column_colour():
     assert data_status("Error") == "text-danger run-status"
     assert data_status("Processing") == "text-warning run-status"
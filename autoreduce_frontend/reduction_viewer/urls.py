@@ -9,13 +9,14 @@ from django.urls import path
 from autoreduce_frontend.autoreduce_webapp.view_utils import login_and_uows_valid
 from autoreduce_frontend.reduction_viewer.views import (run_queue, run_summary, runs_list, fail_queue, run_confirmation,
                                                         variables, pause, configure_new_batch_run, configure_new_runs,
-                                                        rerun_jobs)
+                                                        rerun_jobs, plots)
 
 app_name = "runs"
 
 urlpatterns = [
     path('queue/', run_queue.run_queue, name='queue'),
     path('failed/', fail_queue.fail_queue, name='failed'),
+    path('plot/<int:run_id>/<str:plot_name>', plots.serve_plot, name='plot'),
     path('<str:instrument>/', runs_list.runs_list, name='list'),
     path('<str:instrument_name>/<int:run_number>/', run_summary.run_summary, name='summary'),
     path('<str:instrument_name>/batch/<int:pk>/', run_summary.run_summary_batch_run, name='batch_summary'),
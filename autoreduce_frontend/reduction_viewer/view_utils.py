@@ -6,60 +6,46 @@
 # ############################################################################### #
 """Utility functions for the view of django models."""
 # pylint:disable=no-member
-import functools
 import logging
 import os
-from typing import Dict, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from django.contrib.auth import get_user_model
-from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Q, Subquery, Value
 from django.utils.http import url_has_allowed_host_and_scheme
-from autoreduce_db.reduction_viewer.models import Instrument, ReductionRun
-from autoreduce_qp.queue_processor.reduction.service import ReductionScript
+from autoreduce_db.reduction_viewer.models import ReductionRun, RunNumber
 from autoreduce_frontend.autoreduce_webapp.settings import DATA_ANALYSIS_BASE_URL
-from autoreduce_frontend.autoreduce_webapp.settings import (ALLOWED_HOSTS, UOWS_LOGIN_URL)
+from autoreduce_frontend.autoreduce_webapp.memory_cache import MemoryCache
+from autoreduce_frontend.autoreduce_webapp.settings import (ALLOWED_HOSTS, STARTED_BY_CACHE_LIFETIME,
+                                                            STARTED_BY_CACHE_SIZE, UOWS_LOGIN_URL)
 from autoreduce_frontend.autoreduce_webapp.templatetags.colour_table_row import colour_table_row
 
 LOGGER = logging.getLogger(__package__)
 
+# Names of the users who have submitted runs, by user ID
+STARTED_BY_CACHE = MemoryCache(STARTED_BY_CACHE_SIZE, STARTED_BY_CACHE_LIFETIME)
 
-def deactivate_invalid_instruments(func):
-    """Deactivate instruments if they are invalid."""
 
-    @functools.wraps(func)
-    def request_processor(request, *args, **kws):
-        """
-        Function decorator that checks the reduction script for all active
-        instruments and deactivates any that cannot be found.
-
-        Active: instruments that have a script file, or have previous runs
-        with a stored script.
-        """
-        instruments = Instrument.objects.all()
-        for instrument in instruments:
-            script_path = ReductionScript(instrument.name)
-            instrument.is_active = False
-            if script_path.exists() or len(ReductionRun.objects.filter(instrument=instrument)) > 0:
-                instrument.is_active = True
-            instrument.save(update_fields=['is_active'])
-
-        return func(request, *args, **kws)
-
-    return request_processor
-
-
-def get_interactive_plot_data(plot_locations):
-    """Get the data for the interactive plots from the saved JSON files."""
-    json_files = [location for location in plot_locations if location.endswith(".json")]
+def get_interactive_plot_urls(plot_urls: List[str], plot_locations: List[str]) -> Dict[str, str]:
+    """
+    Get the URLs the interactive plots are fetched from, by the names of their
+    JSON files, from the URLs and locations of all of a run's plot files.
+    """
+    return {
+        os.path.basename(location): url
+        for url, location in zip(plot_urls, plot_locations) if location.endswith(".json")
+    }
 
-    output = {}
-    for filepath in json_files:
-        name = os.path.basename(filepath)
-        with open(filepath, mode='r', encoding='utf-8') as file:
-            data = file.read()
-        output[name] = data
 
-    return output
+def get_reduction_location(run: ReductionRun) -> str:
+    """
+    Get the directory the run's output was saved to, with forward slashes,
+    or an empty string if it hasn't got one.
+    """
+    location_list = run.reduction_location.all()
+    if not location_list:
+        return ""
+    return location_list[0].file_path.replace('\\', '/')
 
 
 def make_data_analysis_url(reduction_location: str) -> str:
@@ -88,6 +74,44 @@ def linux_to_windows_path(path: str) -> str:
     return path
 
 
+def started_by_ids_to_names(started_by_ids: Iterable[Optional[int]]) -> Dict[Optional[int], Optional[str]]:
+    """
+    Return the names of the users or teams that submitted autoreduction runs,
+    as started_by_id_to_name does, for many runs at once. The names of users
+    not remembered by this process are fetched in one query.
+
+    Args:
+        started_by_ids: The started_by values of the runs.
+
+    Returns:
+        A dictionary from each started_by value to the name.
+    """
+    names = {}
+    to_fetch = set()
+    for started_by_id in set(started_by_ids):
+        if started_by_id is None or started_by_id < -1:
+            names[started_by_id] = None
+        elif started_by_id == -1:
+            names[started_by_id] = "Development team"
+        elif started_by_id == 0:
+            names[started_by_id] = "Autoreduction service"
+        else:
+            names[started_by_id] = STARTED_BY_CACHE.get(started_by_id)
+            if names[started_by_id] is None:
+                to_fetch.add(started_by_id)
+
+    if to_fetch:
+        users = get_user_model().objects.only("first_name", "last_name").in_bulk(to_fetch)
+        for started_by_id in to_fetch:
+            if started_by_id in users:
+                user_record = users[started_by_id]
+                names[started_by_id] = f"{user_record.first_name} {user_record.last_name}"
+                STARTED_BY_CACHE.set(started_by_id, names[started_by_id])
+            else:
+                LOGGER.error("User with ID %s does not exist", started_by_id)
+    return names
+
+
 def started_by_id_to_name(started_by_id=None):
     """
     Return the name of the user or team that submitted an autoreduction run.
@@ -105,22 +129,7 @@ def started_by_id_to_name(started_by_id=None):
 
         Otherwise, return None.
     """
-    if started_by_id is None or started_by_id < -1:
-        return None
-
-    if started_by_id == -1:
-        return "Development team"
-
-    if started_by_id == 0:
-        return "Autoreduction service"
-
-    try:
-        user = get_user_model()
-        user_record = user.objects.get(id=started_by_id)
-        return f"{user_record.first_name} {user_record.last_name}"
-    except ObjectDoesNotExist as exception:
-        LOGGER.error(exception)
-        return None
+    return started_by_ids_to_names([started_by_id])[started_by_id]
 
 
 def make_return_url(request, next_url):
@@ -173,6 +182,9 @@ def get_navigation_runs(instrument_name: str, run: ReductionRun, page_type: str)
     """
     Return a tuple of runs that will be used for navigation in the view.
 
+    All four runs are found with one query: a UNION ALL of a LIMIT 1 probe
+    for each.
+
     Args:
         instrument_name: The name of the instrument.
         run: The run that is currently being viewed.
@@ -183,22 +195,27 @@ def get_navigation_runs(instrument_name: str, run: ReductionRun, page_type: str)
     runs = order_runs(sort_by=page_type, runs=runs)
 
     if not run.batch_run:
-        next_run = runs.filter(run_numbers__run_number__gt=run.run_number).last()
-        previous_run = runs.filter(run_numbers__run_number__lt=run.run_number).first()
+        run_number = Subquery(RunNumber.objects.filter(reduction_run=run.pk).values('run_number')[:1])
+        later = Q(run_numbers__run_number__gt=run_number)
+        earlier = Q(run_numbers__run_number__lt=run_number)
     else:
-        next_run = runs.filter(pk__gt=run.pk).last()
-        previous_run = runs.filter(pk__lt=run.pk).first()
-
-    if next_run is None:
-        next_run = run
-
-    if previous_run is None:
-        previous_run = run
-
-    newest_run = runs.first()
-    oldest_run = runs.last()
-
-    return next_run, previous_run, newest_run, oldest_run
+        later = Q(pk__gt=run.pk)
+        earlier = Q(pk__lt=run.pk)
+
+    # The same runs as runs.filter(later).last(), runs.filter(earlier).first(), runs.first() and runs.last()
+    probes = {
+        "next": runs.filter(later).reverse(),
+        "previous": runs.filter(earlier),
+        "newest": runs,
+        "oldest": runs.reverse(),
+    }
+    # Each probe picks its run by primary key, and a UNION ALL of them returns all four in one query
+    picked = [
+        ReductionRun.objects.filter(pk=Subquery(probe.values('pk')[:1])).annotate(navigation=Value(name))
+        for name, probe in probes.items()
+    ]
+    found = {neighbour.navigation: neighbour for neighbour in picked[0].union(*picked[1:], all=True)}
+    return (found.get("next", run), found.get("previous", run), found.get("newest"), found.get("oldest"))
 
 
 def convert_software_string_to_dict(software_str: str) -> Dict[str, str]:
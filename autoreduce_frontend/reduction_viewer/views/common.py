@@ -1,16 +1,104 @@
 import base64
 import itertools
 import json
+import logging
+import traceback
+from pathlib import Path
+from types import MappingProxyType
 from typing import Tuple
 from autoreduce_db.reduction_viewer.models import ReductionArguments
+from autoreduce_qp.queue_processor.reduction.service import ReductionScript
 from autoreduce_qp.queue_processor.variable_utils import VariableUtils
 
+LOGGER = logging.getLogger(__package__)
+
 UNAUTHORIZED_MESSAGE = "User is not authorized to submit batch runs. Please contact the Autoreduce team "\
                        "at ISISREDUCE@stfc.ac.uk to request the permissions."
 # Holds the default value used when there is no value for the variable
 # in the default variables dictionary. Stored in a parameter for re-use in tests.
 DEFAULT_WHEN_NO_VALUE = ""
 
+# The parsed default variables of each instrument, as (key, variables), where the
+# key is the path, modification time and size of the reduce_vars file they came from
+DEFAULT_VARIABLES_CACHE = {}
+
+
+def _freeze(value):
+    """ Return a deep, read-only copy of value: dicts become mappingproxies, lists tuples and sets frozensets. """
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
+def _thaw(value):
+    """ Return a deep, mutable copy of a value returned by _freeze. """
+    if isinstance(value, MappingProxyType):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    if isinstance(value, frozenset):
+        return set(value)
+    return value
+
+
+EMPTY_DEFAULT_VARIABLES = _freeze({
+    "standard_vars": {},
+    "advanced_vars": {},
+    "variable_help": {
+        "standard_vars": {},
+        "advanced_vars": {},
+    }
+})
+
+
+def reduce_vars_path(instrument: str) -> Path:
+    """ Return the path of the instrument's reduce_vars file. """
+    return ReductionScript(instrument, module='reduce_vars.py').script_path
+
+
+def get_default_variables(instrument: str, raise_exc: bool = False) -> MappingProxyType:
+    """
+    Return the default variables from the instrument's reduce_vars file, in the
+    same form as VariableUtils.get_default_variables.
+
+    The file is only loaded again when its modification time or size changes,
+    so most calls cost a stat. The variables are shared between callers, so
+    they are returned read-only: dicts as mappingproxies and lists as tuples.
+    Use _thaw to get a copy that can be changed.
+
+    Args:
+        instrument: The instrument to load the variables for.
+
+        raise_exc: If True, raise errors loading the file instead of logging
+        them and returning empty variables.
+
+    Raises (if raise_exc=True):
+        FileNotFoundError: If the instrument's reduce_vars file is not found.
+        ImportError: If the instrument's reduce_vars file contains an import error.
+        SyntaxError: If the instrument's reduce_vars file contains a syntax error.
+    """
+    path = reduce_vars_path(instrument)
+    try:
+        stat = path.stat()
+        key = (str(path), stat.st_mtime_ns, stat.st_size)
+        cached = DEFAULT_VARIABLES_CACHE.get(instrument)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        variables = _freeze(VariableUtils.get_default_variables(instrument, raise_exc=True))
+    except (FileNotFoundError, ImportError, SyntaxError):
+        # Failures aren't cached, so that a caller asking for the error still gets it
+        if raise_exc:
+            raise
+        LOGGER.error(traceback.format_exc())
+        return EMPTY_DEFAULT_VARIABLES
+
+    DEFAULT_VARIABLES_CACHE[instrument] = (key, variables)
+    return variables
+
 
 def _combine_dicts(current: dict, default: dict):
     """
@@ -63,12 +151,14 @@ def get_arguments_from_file(instrument: str) -> Tuple[dict, dict, dict]:
         ImportError: If the instrument's reduce_vars file contains an import error.
         SyntaxError: If the instrument's reduce_vars file contains a syntax error.
     """
-    default_variables = VariableUtils.get_default_variables(instrument)
+    default_variables = _thaw(get_default_variables(instrument))
     default_standard_variables, default_advanced_variables, variable_help = unpack_arguments(default_variables)
     return default_standard_variables, default_advanced_variables, variable_help
 
 
-def prepare_arguments_for_render(arguments: ReductionArguments, instrument: str) -> Tuple[dict, dict, dict]:
+def prepare_arguments_for_render(arguments: ReductionArguments,
+                                 instrument: str,
+                                 defaults: Tuple[dict, dict, dict] = None) -> Tuple[dict, dict, dict]:
     """
     Converts the arguments into a dictionary containing their "current" and "default" values.
 
@@ -78,6 +168,8 @@ def prepare_arguments_for_render(arguments: ReductionArguments, instrument: str)
     Args:
         arguments: The arguments to convert.
         instrument: The instrument to get the default variables for.
+        defaults: The instrument's default variables, if the caller has already
+        got them from get_arguments_from_file.
 
     Returns:
         A dictionary containing the arguments and their current and default values.
@@ -86,7 +178,9 @@ def prepare_arguments_for_render(arguments: ReductionArguments, instrument: str)
     standard_vars = vars_kwargs.get("standard_vars", {})
     advanced_vars = vars_kwargs.get("advanced_vars", {})
 
-    default_standard_variables, default_advanced_variables, variable_help = get_arguments_from_file(instrument)
+    if defaults is None:
+        defaults = get_arguments_from_file(instrument)
+    default_standard_variables, default_advanced_variables, variable_help = defaults
 
     final_standard = _combine_dicts(standard_vars, default_standard_variables)
     final_advanced = _combine_dicts(advanced_vars, default_advanced_variables)
@@ -146,7 +240,8 @@ def make_reduction_arguments(post_arguments: dict, instrument: str) -> dict:
         ValueError if any variable values exceed the allowed maximum
     """
 
-    defaults = VariableUtils.get_default_variables(instrument)
+    # A copy, as the cached defaults are shared and read-only
+    defaults = _thaw(get_default_variables(instrument))
 
     for key, value in post_arguments:
         if 'var-' in key:
@@ -1,10 +1,10 @@
 import logging
 
 from autoreduce_db.reduction_viewer.models import Experiment, ReductionRun
-from django_tables2.config import RequestConfig
 from autoreduce_frontend.autoreduce_webapp.icat_cache import ICATCache
 from autoreduce_frontend.autoreduce_webapp.settings import DEVELOPMENT_MODE
 from autoreduce_frontend.autoreduce_webapp.view_utils import check_permissions, login_and_uows_valid, render_with
+from autoreduce_frontend.reduction_viewer.pagination import configure_keyset
 from autoreduce_frontend.reduction_viewer.tables import ExperimentSummaryTable
 
 LOGGER = logging.getLogger(__package__)
@@ -19,8 +19,7 @@ def experiment_summary(request, reference_number=None):
     try:
         experiment = Experiment.objects.get(reference_number=reference_number)
         runs = ReductionRun.objects.filter(experiment=experiment, batch_run=False).order_by('-last_updated')
-        experiment_summary_table = ExperimentSummaryTable(runs)
-        RequestConfig(request, paginate={"per_page": 10}).configure(experiment_summary_table)
+        experiment_summary_table = configure_keyset(request, ExperimentSummaryTable(runs))
 
         try:
             if DEVELOPMENT_MODE:
@@ -49,10 +48,10 @@ def experiment_summary(request, reference_number=None):
             'runs': runs,
             'experiment_summary_table': experiment_summary_table,
             'experiment': experiment,
-            'run_count': len(runs),
+            'run_count': experiment_summary_table.paginator.count,
             'experiment_details': experiment_details,
             'per_page': request.GET.get('per_page', 10),
-            'current_page': request.GET.get('page', 1),
+            'cursor': request.GET.get('cursor', ''),
         }
 
     except Exception as exception:
@@ -1,10 +1,10 @@
 import json
 import logging
 from django.db.models import Q
-from django_tables2.config import RequestConfig
 
 from autoreduce_db.reduction_viewer.models import ReductionRun, Status
 from autoreduce_frontend.autoreduce_webapp.view_utils import (login_and_uows_valid, render_with, require_admin)
+from autoreduce_frontend.reduction_viewer.pagination import configure_keyset
 from autoreduce_frontend.reduction_viewer.tables import FailQueueTable
 from autoreduce_frontend.reduction_viewer.forms import FailedQueueOptionsForm
 
@@ -21,11 +21,10 @@ def fail_queue(request):
     error_status = Status.get_error()
     failed_jobs = ReductionRun.objects.filter(Q(status=error_status)
                                               & Q(hidden_in_failviewer=False)).order_by('-created')
-    if len(failed_jobs) == 0:
+    if not failed_jobs.exists():
         return {'queue': []}
 
-    fail_queue_table = FailQueueTable(failed_jobs)
-    RequestConfig(request, paginate={"per_page": 10}).configure(fail_queue_table)
+    fail_queue_table = configure_keyset(request, FailQueueTable(failed_jobs))
 
     options_form = FailedQueueOptionsForm(initial={'per_page': request.GET.get('per_page', 10)})
 
@@ -35,7 +34,7 @@ def fail_queue(request):
         'status_success': Status.get_completed(),
         'status_failed': Status.get_error(),
         'per_page': request.GET.get('per_page', 10),
-        'current_page': request.GET.get('page', 1),
+        'cursor': request.GET.get('cursor', ''),
         'options_form': options_form
     }
 
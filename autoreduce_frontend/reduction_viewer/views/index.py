@@ -1,16 +1,21 @@
 from django.contrib.auth import authenticate, login
 from django.shortcuts import redirect
 
+from autoreduce_frontend.autoreduce_webapp.circuit_breaker import CircuitOpenError
 from autoreduce_frontend.autoreduce_webapp.icat_cache import ICATConnectionException
 from autoreduce_frontend.autoreduce_webapp.settings import DEVELOPMENT_MODE
 from autoreduce_frontend.autoreduce_webapp.uows_client import UOWSClient
 from autoreduce_frontend.autoreduce_webapp.views import render_error
-from autoreduce_frontend.reduction_viewer.view_utils import deactivate_invalid_instruments, make_return_url
+from autoreduce_frontend.reduction_viewer.view_utils import make_return_url
 
 
-@deactivate_invalid_instruments
 def index(request):
-    """Render the index page."""
+    """
+    Render the index page.
+
+    Instruments are marked active or inactive by the reconcile_instruments
+    command, at container start and from cron, rather than here.
+    """
     return_url = make_return_url(request, request.GET.get('next'))
 
     use_query_next = request.build_absolute_uri(request.GET.get('next'))
@@ -24,7 +29,11 @@ def index(request):
         authenticated = True
     else:
         if 'sessionid' in request.session.keys():
-            authenticated = request.user.is_authenticated and UOWSClient().check_session(request.session['sessionid'])
+            try:
+                authenticated = request.user.is_authenticated and UOWSClient().check_session(
+                    request.session['sessionid'])
+            except CircuitOpenError as excep:
+                return render_error(request, str(excep))
 
     if authenticated:
         return_url = use_query_next if request.GET.get('next') else default_next
@@ -32,7 +41,7 @@ def index(request):
         request.session['sessionid'] = request.GET.get('sessionid')
         try:
             user = authenticate(token=request.GET.get('sessionid'))
-        except ICATConnectionException as excep:
+        except (ICATConnectionException, CircuitOpenError) as excep:
             return render_error(request, str(excep))
 
         if user is not None:
@@ -1,15 +1,24 @@
+import logging
+
 from django.contrib.auth import logout as django_logout
 from django.shortcuts import redirect
+from autoreduce_frontend.autoreduce_webapp.circuit_breaker import CircuitOpenError
 from autoreduce_frontend.autoreduce_webapp.uows_client import UOWSClient
 from autoreduce_frontend.autoreduce_webapp.view_utils import login_and_uows_valid
 
+LOGGER = logging.getLogger(__package__)
+
 
 @login_and_uows_valid
 def logout(request):
     """Render the logout page."""
     session_id = request.session.get('sessionid')
     if session_id:
-        UOWSClient().logout(session_id)
+        try:
+            UOWSClient().logout(session_id)
+        except CircuitOpenError:
+            # The local session is still ended below, the UOWS session will expire on its own
+            LOGGER.warning("UOWS is unavailable, could not end session %s", session_id)
     django_logout(request)
     request.session.flush()
     return redirect('overview')
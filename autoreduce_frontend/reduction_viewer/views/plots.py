@@ -0,0 +1,256 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+"""
+Serves the plot files of a run straight from the directory it was reduced to,
+with conditional and range requests, instead of copying them to the static
+files first. The run summary fetches its interactive plots' JSON from here
+after the page has loaded, compressed.
+"""
+import logging
+import mimetypes
+import re
+import zlib
+from functools import partial
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from autoreduce_db.reduction_viewer.models import ReductionRun
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+
+from autoreduce_frontend.autoreduce_webapp.icat_cache import ICATConnectionException
+from autoreduce_frontend.autoreduce_webapp.settings import (PLOT_SENDFILE_HEADER, PLOT_SENDFILE_PREFIX,
+                                                            USER_ACCESS_CHECKS)
+from autoreduce_frontend.autoreduce_webapp.view_utils import check_icat_permissions, login_and_uows_valid
+from autoreduce_frontend.autoreduce_webapp.views import render_error
+from autoreduce_frontend.plotting.plot_handler import PlotHandler
+from autoreduce_frontend.reduction_viewer.view_utils import get_reduction_location
+
+try:
+    import brotli
+except ImportError:
+    # Optional: without it, JSON plots are only sent gzipped
+    brotli = None
+
+LOGGER = logging.getLogger(__package__)
+
+# The types of plot file worth compressing, as the images already are
+COMPRESSIBLE_TYPES = {"application/json"}
+# The encodings JSON plots can be sent with, in order of preference
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip", )
+GZIP_LEVEL = 6
+
+# A single byte range: "bytes=first-last", "bytes=first-" or "bytes=-suffix length"
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+# Returned by parse_range for a range that doesn't overlap the file
+UNSATISFIABLE = (-1, -1)
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a Range header for a file of size bytes. Only single ranges are
+    supported; anything else is ignored and the whole file is sent, which the
+    HTTP spec allows.
+
+    Args:
+        header: The value of the Range header.
+
+        size: The size of the file in bytes.
+
+    Returns:
+        The first and last byte of the range, UNSATISFIABLE if it doesn't
+        overlap the file, or None if the whole file should be sent.
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        # The last bytes of the file
+        length = int(last)
+        if length == 0 or size == 0:
+            return UNSATISFIABLE
+        return max(size - length, 0), size - 1
+    first = int(first)
+    if last and int(last) < first:
+        return None
+    if first >= size:
+        return UNSATISFIABLE
+    last = min(int(last), size - 1) if last else size - 1
+    return first, last
+
+
+def if_range_matches(request, etag: str, last_modified: int) -> bool:
+    """ Check that the If-Range header, if there is one, names the current version of the file. """
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def read_range(path: str, first: int, length: int, block_size: int = FileResponse.block_size) -> Iterator[bytes]:
+    """ Yield length bytes of the file at path, starting at first, a block at a time. """
+    with open(path, "rb") as plot_file:
+        plot_file.seek(first)
+        while length > 0:
+            block = plot_file.read(min(block_size, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+def accepted_encoding(request) -> Optional[str]:
+    """
+    Choose the encoding to compress a response to the request with: brotli if
+    it's installed and accepted, otherwise gzip if that's accepted.
+    """
+    accepted = set()
+    for coding in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        name, _, params = coding.partition(";")
+        quality = params.strip().partition("q=")[2]
+        try:
+            if quality and float(quality) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(name.strip().lower())
+    for encoding in ENCODINGS:
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return None
+
+
+def compress_file(path: str, encoding: str, block_size: int = FileResponse.block_size) -> Iterator[bytes]:
+    """
+    Yield the file at path compressed with encoding, a block at a time. The
+    output is the same every time for the same file, so it can have a strong ETag.
+    """
+    if encoding == "br":
+        compressor = brotli.Compressor()
+        compress, flush = compressor.process, compressor.finish
+    else:
+        # A gzip stream, with zlib's fixed header rather than one holding the time
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        compress, flush = compressor.compress, compressor.flush
+    with open(path, "rb") as plot_file:
+        for block in iter(partial(plot_file.read, block_size), b""):
+            compressed = compress(block)
+            if compressed:
+                yield compressed
+    yield flush()
+
+
+def file_body_response(request, path: str, size: int, content_type: str, validators: Tuple[str, int]):
+    """
+    Make the response that sends the file at path uncompressed: the byte range
+    asked for, or the whole file with FileResponse, which the WSGI server can
+    send with sendfile.
+    """
+    file_range = None
+    if "HTTP_RANGE" in request.META and if_range_matches(request, *validators):
+        file_range = parse_range(request.META["HTTP_RANGE"], size)
+
+    if file_range == UNSATISFIABLE:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+    elif file_range is not None:
+        first, last = file_range
+        response = StreamingHttpResponse(read_range(path, first, last - first + 1),
+                                         status=206,
+                                         content_type=content_type)
+        response["Content-Range"] = f"bytes {first}-{last}/{size}"
+        response["Content-Length"] = str(last - first + 1)
+    else:
+        try:
+            # pylint:disable=consider-using-with
+            response = FileResponse(open(path, "rb"), content_type=content_type)
+        except (FileNotFoundError, IsADirectoryError) as err:
+            raise Http404("Plot not found") from err
+    return response
+
+
+def plot_file_response(request, path: str) -> HttpResponse:
+    """
+    Make the response for a plot file. Conditional requests are answered from
+    the file's size and modification time without opening it. If the front web
+    server is configured to send files, it's left to send this one. Otherwise
+    JSON plots are compressed if the browser accepts it, and other plots are
+    sent as they are, or the single byte range asked for.
+
+    Args:
+        request: The sent HTTP request.
+
+        path: The path of the plot file.
+
+    Returns:
+        The response.
+    """
+    try:
+        stat = Path(path).stat()
+    except (FileNotFoundError, NotADirectoryError) as err:
+        raise Http404("Plot not found") from err
+
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    compressible = content_type in COMPRESSIBLE_TYPES and not PLOT_SENDFILE_HEADER
+    encoding = accepted_encoding(request) if compressible else None
+    # Each encoding of the file is a different representation of it, with its own ETag
+    etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}{f"-{encoding}" if encoding else ""}"'
+    last_modified = int(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None and PLOT_SENDFILE_HEADER:
+        response = HttpResponse(content_type=content_type)
+        response[PLOT_SENDFILE_HEADER] = f"{PLOT_SENDFILE_PREFIX}{path}"
+    elif response is None and encoding:
+        response = StreamingHttpResponse(compress_file(path, encoding), content_type=content_type)
+        response["Content-Encoding"] = encoding
+    elif response is None:
+        response = file_body_response(request, path, stat.st_size, content_type, (etag, last_modified))
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    # Ranges are only served when the file is sent as it is, not while compressing it on the fly
+    response["Accept-Ranges"] = "none" if encoding else "bytes"
+    if compressible:
+        patch_vary_headers(response, ("Accept-Encoding", ))
+    # A rerun can replace the plots, so browsers check they're current before using a cached copy
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@login_and_uows_valid
+# pylint:disable=no-member
+def serve_plot(request, run_id: int, plot_name: str):
+    """
+    Serve one of the plot files of a run from the directory the run was
+    reduced to. Only files the PlotHandler finds for the run are served.
+    """
+    run = get_object_or_404(ReductionRun.objects.select_related('experiment', 'instrument'), pk=run_id)
+    if USER_ACCESS_CHECKS and not request.user.is_superuser:
+        try:
+            check_icat_permissions(request,
+                                   run.experiment.reference_number,
+                                   viewed_instrument_name=run.instrument.name,
+                                   optional_instrument_names=set())
+        except ICATConnectionException as excep:
+            return render_error(request, str(excep))
+
+    reduction_location = get_reduction_location(run)
+    data_location = run.data_location.first()
+    if not reduction_location or data_location is None:
+        raise Http404("Plot not found")
+
+    plot_handler = PlotHandler(data_filepath=data_location.file_path, server_dir=reduction_location, run_id=run.pk)
+    path = plot_handler.get_plot_path(plot_name)
+    if path is None:
+        raise Http404("Plot not found")
+    return plot_file_response(request, path)
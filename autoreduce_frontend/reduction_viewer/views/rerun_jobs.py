@@ -1,7 +1,7 @@
 import logging
 
 from autoreduce_db.reduction_viewer.models import (Instrument, Status)
-from autoreduce_qp.queue_processor.reduction.service import ReductionScript
+from autoreduce_frontend.autoreduce_webapp.script_cache import reduction_script_exists
 from autoreduce_frontend.autoreduce_webapp.view_utils import (check_permissions, login_and_uows_valid, render_with)
 from autoreduce_frontend.reduction_viewer.forms import RerunForm
 from autoreduce_frontend.reduction_viewer.views.common import prepare_arguments_for_render
@@ -30,7 +30,7 @@ def rerun_jobs(request, instrument=None):
 
         standard_vars, advanced_vars, variable_help = prepare_arguments_for_render(last_run.arguments,
                                                                                    last_run.instrument.name)
-        script_present = ReductionScript(instrument).exists()
+        script_present = reduction_script_exists(instrument.name)
         rerun_form = RerunForm(script_present=script_present)
         # pylint:disable=no-member
         context_dictionary = {
@@ -6,7 +6,7 @@ from autoreduce_frontend.autoreduce_webapp.settings import USER_ACCESS_CHECKS
 from autoreduce_frontend.autoreduce_webapp.view_utils import login_and_uows_valid, render_with
 from autoreduce_frontend.autoreduce_webapp.views import render_error
 
-from autoreduce_frontend.reduction_viewer.view_utils import started_by_id_to_name
+from autoreduce_frontend.reduction_viewer.view_utils import started_by_ids_to_names
 
 
 @login_and_uows_valid
@@ -24,20 +24,18 @@ def run_queue(request):
     if USER_ACCESS_CHECKS and not request.user.is_superuser:
         try:
             with ICATCache(AUTH='uows', SESSION={'sessionid': request.session['sessionid']}) as icat:
-                pending_jobs = filter(lambda job: job.experiment.reference_number in icat.get_associated_experiments(
-                    int(request.user.username)), pending_jobs)  # Check RB numbers
-                pending_jobs = filter(
-                    lambda job: job.instrument.name in icat.get_owned_instruments(int(request.user.username)),
-                    pending_jobs)  # Check instrument
+                associated_experiments = icat.get_associated_experiments(int(request.user.username))
+                owned_instruments = icat.get_owned_instruments(int(request.user.username))
+            pending_jobs = [
+                job for job in pending_jobs
+                if job.experiment.reference_number in associated_experiments  # Check RB numbers
+                and job.instrument.name in owned_instruments  # Check instrument
+            ]
         except ICATConnectionException as excep:
             return render_error(request, str(excep))
-    # Initialise list to contain the names of user/team that started runs
-    started_by = []
-
-    # Cycle through all filtered runs and retrieve the name of the user/team
-    # that started the run
-    for run in pending_jobs:
-        started_by.append(started_by_id_to_name(run.started_by))
+    # Retrieve the names of the users/teams that started the runs, all at once
+    names = started_by_ids_to_names(run.started_by for run in pending_jobs)
+    started_by = [names[run.started_by] for run in pending_jobs]
 
     # Zip the run information with the user/team name to enable simultaneous
     # iteration with django
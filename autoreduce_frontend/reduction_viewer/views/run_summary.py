@@ -2,15 +2,16 @@ import logging
 from django.shortcuts import redirect
 from django.urls import reverse
 from autoreduce_db.reduction_viewer.models import ReductionRun
-from autoreduce_qp.queue_processor.reduction.service import ReductionScript
+from autoreduce_frontend.autoreduce_webapp.script_cache import reduction_script_exists
 from autoreduce_frontend.autoreduce_webapp.view_utils import (check_permissions, login_and_uows_valid, render_with)
 
 from autoreduce_frontend.plotting.plot_handler import PlotHandler
 from autoreduce_frontend.reduction_viewer.forms import RerunForm
 from autoreduce_frontend.reduction_viewer.views.common import get_arguments_from_file, prepare_arguments_for_render
-from autoreduce_frontend.reduction_viewer.view_utils import (get_interactive_plot_data, get_navigation_runs,
-                                                             linux_to_windows_path, make_data_analysis_url,
-                                                             windows_to_linux_path, started_by_id_to_name)
+from autoreduce_frontend.reduction_viewer.view_utils import (get_interactive_plot_urls, get_navigation_runs,
+                                                             get_reduction_location, linux_to_windows_path,
+                                                             make_data_analysis_url, windows_to_linux_path,
+                                                             started_by_id_to_name)
 
 LOGGER = logging.getLogger(__package__)
 
@@ -71,12 +72,7 @@ def run_summary_run(request, history, instrument_name=None, run_version=0, run_n
     is_skipped = run.status.value == "s"
     is_rerun = len(history) > 1
 
-    location_list = run.reduction_location.all()
-    reduction_location = ""
-    if location_list:
-        reduction_location = location_list[0].file_path
-    if reduction_location and '\\' in reduction_location:
-        reduction_location = reduction_location.replace('\\', '/')
+    reduction_location = get_reduction_location(run)
 
     path_type = request.GET.get("path_type", "linux")  # defaults to Linux
     if path_type == "linux":
@@ -88,8 +84,11 @@ def run_summary_run(request, history, instrument_name=None, run_version=0, run_n
 
     data_analysis_link_url = make_data_analysis_url(reduction_location) if reduction_location else ""
     rb_number = run.experiment.reference_number
-    standard_vars, advanced_vars, variable_help = prepare_arguments_for_render(run.arguments, run.instrument.name)
-    default_standard_variables, _, __ = get_arguments_from_file(run.instrument.name)
+    defaults = get_arguments_from_file(run.instrument.name)
+    default_standard_variables = defaults[0]
+    standard_vars, advanced_vars, variable_help = prepare_arguments_for_render(run.arguments,
+                                                                               run.instrument.name,
+                                                                               defaults=defaults)
 
     # picks the unique identifier for a run - for batch runs, it's the pk,
     # and for normal runs it's just the run number
@@ -99,7 +98,7 @@ def run_summary_run(request, history, instrument_name=None, run_version=0, run_n
     page_type = request.GET.get('sort', '-run_number')
     next_run, previous_run, newest_run, oldest_run = get_navigation_runs(instrument_name, run, page_type)
 
-    script_present = ReductionScript(instrument_name).exists()
+    script_present = reduction_script_exists(instrument_name)
     rerun_form = RerunForm(script_present=script_present)
 
     context_dictionary = {
@@ -121,7 +120,7 @@ def run_summary_run(request, history, instrument_name=None, run_version=0, run_n
         'reduction_location': reduction_location,
         'started_by': started_by,
         'data_analysis_link_url': data_analysis_link_url,
-        'current_page': int(request.GET.get('page', 1)),
+        'cursor': request.GET.get('cursor', ''),
         'per_page': int(request.GET.get('per_page', 10)),
         'page_type': page_type,
         'filtering': request.GET.get('filter', 'run'),
@@ -138,14 +137,16 @@ def run_summary_run(request, history, instrument_name=None, run_version=0, run_n
         try:
             plot_handler = PlotHandler(data_filepath=run.data_location.first().file_path,
                                        server_dir=reduction_location,
-                                       rb_number=rb_number)
+                                       rb_number=rb_number,
+                                       run_id=run.pk)
             local_plot_locs, server_plot_locs = plot_handler.get_plot_file()
             if local_plot_locs:
                 context_dictionary['static_plots'] = [
                     location for location in local_plot_locs if not location.endswith(".json")
                 ]
 
-                context_dictionary['interactive_plots'] = get_interactive_plot_data(server_plot_locs)
+                # Fetched by the page once it has loaded, rather than inlined in it
+                context_dictionary['interactive_plots'] = get_interactive_plot_urls(local_plot_locs, server_plot_locs)
         except Exception as exception:  # pylint: disable=broad-except
             # Lack of plot images is recoverable - we shouldn't stop the whole
             # page rendering if something is wrong with the plot images - but
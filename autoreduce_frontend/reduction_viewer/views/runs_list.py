@@ -1,17 +1,80 @@
 import traceback
 import logging
 
-from autoreduce_db.reduction_viewer.models import Experiment, Instrument, ReductionRun, Status
-from autoreduce_qp.queue_processor.variable_utils import VariableUtils
+from autoreduce_db.reduction_viewer.models import Experiment, Instrument, ReductionRun, RunNumber
+from django.db.models import Count, Max, Min, Prefetch, Q
 from django_tables2 import RequestConfig
 
 from autoreduce_frontend.autoreduce_webapp.view_utils import check_permissions, login_and_uows_valid, render_with
+from autoreduce_frontend.reduction_viewer.pagination import configure_keyset
+from autoreduce_frontend.reduction_viewer.views.common import get_default_variables
 from autoreduce_frontend.reduction_viewer.view_utils import order_runs
 from autoreduce_frontend.reduction_viewer.tables import ExperimentTable, ReductionRunTable
 from autoreduce_frontend.reduction_viewer.forms import RunsListOptionsForm
 
 LOGGER = logging.getLogger(__package__)
 
+# The values of Status.get_processing() and Status.get_queued(), used in lookups
+# so that the Status rows don't need to be fetched first
+PROCESSING = 'p'
+QUEUED = 'q'
+
+# The fields of a run shown in the run tables, and by the title used as the text of each run's link
+RUN_TABLE_FIELDS = ('status', 'last_updated', 'created', 'run_version', 'run_title', 'run_description', 'batch_run',
+                    'instrument')
+
+
+def prefetch_run_numbers() -> Prefetch:
+    """
+    Return a Prefetch of the run numbers of each run. They are ordered so that
+    ReductionRun.run_number and title read them from the prefetched rows
+    instead of querying them again.
+    """
+    return Prefetch('run_numbers', queryset=RunNumber.objects.order_by('pk'))
+
+
+def get_instrument_status(runs, sort_by: str) -> dict:
+    """
+    Summarise the runs of an instrument for its status panel in three queries,
+    however many runs there are: one aggregate for the number of runs, the
+    first and last runs and the numbers of processing and queued runs, one to
+    fetch those runs, and one for their run numbers, which the panel shows.
+
+    Args:
+        runs: The runs of the instrument.
+
+        sort_by: The order to list the processing and queued runs in.
+
+    Returns:
+        The number of runs, the first and last runs, and lists of the
+        processing and queued runs.
+    """
+    summary = runs.order_by().aggregate(total=Count('pk'),
+                                        first_pk=Min('pk'),
+                                        last_pk=Max('pk'),
+                                        processing=Count('pk', filter=Q(status__value=PROCESSING)),
+                                        queued=Count('pk', filter=Q(status__value=QUEUED)))
+    status = {'total': summary['total'], 'first': None, 'last': None, 'processing': [], 'queued': []}
+    if not summary['total']:
+        return status
+
+    wanted = Q(pk__in=(summary['first_pk'], summary['last_pk']))
+    if summary['processing'] or summary['queued']:
+        wanted |= Q(status__value__in=(PROCESSING, QUEUED))
+    # The status panel shows each run's title and instrument, so load all its fields
+    summary_runs = runs.defer(None).select_related('status',
+                                                   'instrument').prefetch_related(prefetch_run_numbers()).filter(wanted)
+    for run in order_runs(sort_by=sort_by, runs=summary_runs):
+        if run.pk == summary['first_pk']:
+            status['first'] = run
+        if run.pk == summary['last_pk']:
+            status['last'] = run
+        if run.status.value == PROCESSING:
+            status['processing'].append(run)
+        elif run.status.value == QUEUED:
+            status['queued'].append(run)
+    return status
+
 
 @login_and_uows_valid
 @check_permissions
@@ -31,25 +94,22 @@ def runs_list(request, instrument=None):
         runs = ReductionRun.objects.only('status', 'last_updated', 'run_version',
                                          'run_description').select_related('status').filter(instrument=instrument_obj,
                                                                                             batch_run=False)
-        last_instrument_run = runs.filter(batch_run=False).last()
-        first_instrument_run = runs.filter(batch_run=False).first()
-
-        runs = order_runs(sort_by=sort_by, runs=runs)
+        instrument_status = get_instrument_status(runs, sort_by)
+        if not instrument_status['total']:
+            return {'message': "No runs found for instrument."}
 
-        run_table = ReductionRunTable(runs)
-        RequestConfig(request, paginate={"per_page": 10}).configure(run_table)
+        runs = order_runs(sort_by=sort_by,
+                          runs=runs.only(*RUN_TABLE_FIELDS).select_related('instrument').prefetch_related(
+                              prefetch_run_numbers()))
 
         options_form = RunsListOptionsForm(initial={
             'per_page': request.GET.get('per_page', 10),
             'filter': request.GET.get('filter', "run")
         })
 
-        if len(runs) == 0:
-            return {'message': "No runs found for instrument."}
-
         current_variables = {}
         try:
-            current_variables.update(VariableUtils.get_default_variables(instrument_obj.name, raise_exc=True))
+            current_variables.update(get_default_variables(instrument_obj.name, raise_exc=True))
         except FileNotFoundError:
             error_reason = "reduce_vars.py is missing for this instrument"
         except (ImportError, SyntaxError):
@@ -61,40 +121,35 @@ def runs_list(request, instrument=None):
             'instrument': instrument_obj,
             'instrument_name': instrument_obj.name,
             'runs': runs,
-            'last_instrument_run': last_instrument_run,
-            'first_instrument_run': first_instrument_run,
-            'processing': runs.filter(status=Status.get_processing(), batch_run=False),
-            'queued': runs.filter(status=Status.get_queued(), batch_run=False),
+            'last_instrument_run': instrument_status['last'],
+            'first_instrument_run': instrument_status['first'],
+            'processing': instrument_status['processing'],
+            'queued': instrument_status['queued'],
             'filtering': filter_by,
             'sort': sort_by,
             'has_variables': bool(current_variables),
             'error_reason': error_reason,
-            'run_table': run_table,
             'per_page': request.GET.get('per_page', 10),
-            'current_page': request.GET.get('page', 1),
+            'cursor': request.GET.get('cursor', ''),
             'options_form': options_form,
             'info_message': request.GET.get('message', ''),
         }
 
         if filter_by == 'experiment':
-            experiments_and_runs = {}
+            # The table only links to each experiment's summary, so their runs aren't fetched
             experiments = Experiment.objects.filter(reduction_runs__instrument=instrument_obj). \
                 order_by('-reference_number').distinct()
-            for experiment in experiments:
-                associated_runs = runs.filter(experiment=experiment). \
-                    order_by('-created')
-                experiments_and_runs[experiment] = associated_runs
             experiment_table = ExperimentTable(experiments)
             RequestConfig(request, paginate={"per_page": 10}).configure(experiment_table)
-            context_dictionary['experiments'] = experiments_and_runs
             context_dictionary['experiment_table'] = experiment_table
         elif filter_by == 'batch_runs':
-            runs = ReductionRun.objects.only('status', 'last_updated', 'run_version',
-                                             'run_description').filter(instrument=instrument_obj, batch_run=True)
+            runs = ReductionRun.objects.only(*RUN_TABLE_FIELDS).select_related('status', 'instrument').prefetch_related(
+                prefetch_run_numbers()).filter(instrument=instrument_obj, batch_run=True)
             runs = order_runs(sort_by=sort_by, runs=runs)
-            run_table = ReductionRunTable(runs)
-            RequestConfig(request, paginate={"per_page": 10}).configure(run_table)
-            context_dictionary['run_table'] = run_table
+            context_dictionary['run_table'] = configure_keyset(request, ReductionRunTable(runs))
+        elif filter_by == 'run':
+            # Each table fetches its page when it's configured, so only the one shown is configured
+            context_dictionary['run_table'] = configure_keyset(request, ReductionRunTable(runs))
 
     except Exception:
         LOGGER.error(traceback.format_exc())
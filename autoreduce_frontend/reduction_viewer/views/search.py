@@ -3,6 +3,7 @@ from django_tables2 import RequestConfig
 
 from autoreduce_frontend.autoreduce_webapp.view_utils import (check_permissions, login_and_uows_valid, render_with)
 from autoreduce_frontend.reduction_viewer.filters import ExperimentFilter, ReductionRunFilter
+from autoreduce_frontend.reduction_viewer.pagination import configure_keyset
 from autoreduce_frontend.reduction_viewer.tables import ExperimentTable, ReductionRunTable
 from autoreduce_frontend.reduction_viewer.forms import SearchOptionsForm
 
@@ -30,8 +31,7 @@ def search(request):
         run_filter = ReductionRunFilter(request.GET,
                                         run_description_qualifier=run_description_qualifier,
                                         queryset=run_list)
-        run_table = ReductionRunTable(run_filter.qs, order_by="-run_number")
-        RequestConfig(request, paginate={"per_page": 10}).configure(run_table)
+        run_table = configure_keyset(request, ReductionRunTable(run_filter.qs, order_by="-run_number"))
     if "reference_number" in request.GET:
         experiment_list = Experiment.objects.all()
         experiment_filter = ExperimentFilter(request.GET, queryset=experiment_list)
@@ -51,7 +51,7 @@ def search(request):
         'experiment_message': experiment_message,
         'options_form': options_form,
         'per_page': request.GET.get('per_page', 10),
-        'current_page': int(request.GET.get('page', 1)),
+        'cursor': request.GET.get('cursor', ''),
         'sort': request.GET.get('sort', '-run_number'),
         'run_description_qualifier': run_description_qualifier,
         'filtering': filter_by,
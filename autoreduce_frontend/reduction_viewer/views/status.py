@@ -0,0 +1,30 @@
+# ############################################################################### #
+# Autoreduction Repository : https://github.com/autoreduction/autoreduce
+#
+# Copyright &copy; 2022 ISIS Rutherford Appleton Laboratory UKRI
+# SPDX - License - Identifier: GPL-3.0-or-later
+# ############################################################################### #
+from django.http import HttpRequest, JsonResponse
+
+from autoreduce_frontend.autoreduce_webapp.circuit_breaker import BREAKERS
+from autoreduce_frontend.autoreduce_webapp.script_cache import SCRIPT_EXISTS_CACHE
+from autoreduce_frontend.autoreduce_webapp.view_utils import require_staff
+
+
+@require_staff
+def service_status(request: HttpRequest):
+    """
+    Return the state of the circuit breaker for each external service, and the
+    hit and miss counters of this worker process's reduction script cache, as
+    JSON for monitoring. Only staff can see it.
+
+    Args:
+        request: The original sent request.
+
+    Return:
+        A JSON response with one entry per breaker, and the cache counters.
+    """
+    return JsonResponse({
+        "circuit_breakers": [breaker.snapshot() for breaker in BREAKERS.values()],
+        "reduction_script_cache": SCRIPT_EXISTS_CACHE.stats(),
+    })
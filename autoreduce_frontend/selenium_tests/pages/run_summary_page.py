@@ -140,7 +140,10 @@ class RunSummaryPage(Page, RerunFormMixin, NavbarMixin, FooterMixin, TourMixin):
         return self.driver.find_elements(By.TAG_NAME, "img")
 
     def plotly_plots(self) -> List[WebElement]:
-        """Return all plotly plot elements."""
+        """Return all plotly plot elements, once the page has fetched and drawn every interactive plot."""
+        expected = len(self.driver.find_elements(By.CLASS_NAME, "interactive-plot"))
+        WebDriverWait(self.driver,
+                      10).until(lambda driver: len(driver.find_elements(By.CLASS_NAME, "js-plotly-plot")) >= expected)
         return self.driver.find_elements(By.CLASS_NAME, "js-plotly-plot")
 
     def _do_cancel_btn(self, url):
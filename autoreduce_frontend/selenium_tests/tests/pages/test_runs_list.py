@@ -6,6 +6,7 @@
 # ############################################################################### #
 """Selenium tests for the runs summary page."""
 import time
+from urllib.parse import parse_qs, urlparse
 
 from autoreduce_qp.systemtests.utils.data_archive import DataArchive
 from autoreduce_frontend.selenium_tests.pages.runs_list_page import RunsListPage
@@ -105,12 +106,19 @@ class TestRunsListQueries(BaseTestCase, AccessibilityTestMixin, FooterTestMixin,
 
     def test_each_query(self):
         """Test that each potential query is maintained."""
-        for query in ("sort=-run_number", "per_page=10", "filter=run", "page="):
+        for query in ("sort=-run_number", "per_page=10", "filter=run"):
             self.page.launch()
-            self._test_page_query(query + ("1" if query == "page=" else ""))
+            self._test_page_query(query)
 
             self.page.click_next_page_button()
-            self._test_page_query(query + ("2" if query == "page=" else ""))
+            self._test_page_query(query)
+
+    def test_cursor_query(self):
+        """Test that the cursor of the page the run was opened from is maintained."""
+        self.page.launch()
+        self.page.click_next_page_button()
+        cursor = parse_qs(urlparse(self.page.driver.current_url).query)["cursor"][0]
+        self._test_page_query(f"cursor={cursor}")
 
     def test_pagination_filter(self):
         """Test that changing the pagination filter also updates the URL query."""
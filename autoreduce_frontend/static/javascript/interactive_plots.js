@@ -0,0 +1,33 @@
+(function(){
+    var showError = function showError(elem, error){
+        var message = document.createElement('p');
+        message.className = 'card text-center';
+        message.textContent = 'Encountered error while retrieving this plot: ' + error.message;
+        elem.appendChild(message);
+    };
+
+    var loadPlot = function loadPlot(elem){
+        fetch(elem.dataset.plotUrl, {credentials: 'same-origin'})
+            .then(function(response){
+                if (!response.ok) {
+                    throw new Error(response.status + ' ' + response.statusText);
+                }
+                return response.json();
+            })
+            .then(function(data){
+                Plotly.newPlot(elem, data);
+            })
+            .catch(function(error){
+                showError(elem, error);
+            });
+    };
+
+    var init = function init(){
+        document.querySelectorAll('.interactive-plot').forEach(loadPlot);
+    };
+
+    // Wait for the page to be painted before fetching the plots
+    window.requestAnimationFrame(function(){
+        setTimeout(init, 0);
+    });
+}())